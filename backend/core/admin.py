@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import Blob, Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('user', 'model', 'object_id', 'deleted_at')
+    list_filter = ('model', 'deleted_at')
+    search_fields = ('user__username',)
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('name',)
+    readonly_fields = ('name', 'size', 'ref_count', 'created_at')
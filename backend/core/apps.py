@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        from . import authentication, storage, sync
+        sync.connect_signals()
+        storage.connect_signals()
+        authentication.connect_signals()
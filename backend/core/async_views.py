@@ -0,0 +1,140 @@
+"""
+Async read path for API viewsets served over ASGI.
+
+With ``ASYNC_READ_VIEWS`` on (the default when ``SERVER_MODE=asgi``),
+viewsets using ``AsyncReadMixin`` answer ``GET`` list and detail requests
+from a coroutine: rows are fetched with Django's async ORM and everything
+else that may block (authentication, the cache, serializers resolving
+lazy relations) is handed to the sync thread with ``sync_to_async``. The
+event loop keeps serving other requests while one waits on the database
+or on a slow client. Writes and custom actions take the regular sync
+path, adapted by ``sync_to_async`` like any sync view under ASGI.
+
+Mixins taking part in reads (``ResponseCacheMixin``,
+``ConditionalGetMixin``) provide ``alist``/``aretrieve`` beside their sync
+counterparts; the ones here sit innermost, next to ``ModelViewSet``.
+
+Under ASGI, streaming responses are iterated on the event loop, and Django
+reads a sync iterator there into a list before sending any of it. Views
+streaming large bodies (exports, media files) pass their content through
+``stream_content()`` to keep it streaming.
+"""
+from functools import update_wrapper
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+
+READ_ACTIONS = {'list', 'retrieve'}
+
+
+def is_asgi(request):
+    """Whether a Django or DRF request came in through the ASGI handler"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def aiterate(iterator):
+    """Async iterator advancing the sync ``iterator`` in the sync thread, one item at a time"""
+    step = sync_to_async(next)
+    done = object()
+    while (item := await step(iterator, done)) is not done:
+        yield item
+
+
+def stream_content(request, chunks):
+    """Streaming response content for ``chunks``: an async iterator over them under ASGI"""
+    chunks = iter(chunks)
+    return aiterate(chunks) if is_asgi(request) else chunks
+
+
+class AsyncReadMixin:
+    """
+    Serves ``list`` and ``retrieve`` from an async view when
+    ``ASYNC_READ_VIEWS`` is on; a plain sync viewset otherwise.
+    """
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READ_VIEWS or not READ_ACTIONS & set(actions.values()):
+            return view
+
+        # DRF adds the HEAD mapping on the first request; the async path needs it up front
+        if 'get' in actions and 'head' not in actions:
+            actions['head'] = actions['get']
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            action = actions.get(request.method.lower())
+            if action not in READ_ACTIONS:
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = actions
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, action, *args, **kwargs)
+
+        # Keeps cls, initkwargs and actions for the router and schema generation
+        update_wrapper(async_view, view)
+        markcoroutinefunction(async_view)
+        return csrf_exempt(async_view)
+
+    async def adispatch(self, request, action, *args, **kwargs):
+        """``APIView.dispatch()`` awaiting ``a<action>`` as the handler"""
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication and throttling may read the cache or the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await getattr(self, f'a{action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(await self.aserialize(page, many=True))
+
+        return Response(await self.aserialize([instance async for instance in queryset], many=True))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(await self.aserialize(instance))
+
+    async def aget_object(self):
+        """``get_object()`` fetching the row with the async ORM"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        apaginate = getattr(self.paginator, 'apaginate_queryset', None)
+        if apaginate is None:
+            return await sync_to_async(self.paginate_queryset)(queryset)
+        return await apaginate(queryset, self.request, view=self)
+
+    async def aserialize(self, instance, many=False):
+        # Serializers are sync, and fields such as exercise names may query lazily
+        return await sync_to_async(lambda: self.get_serializer(instance, many=many).data)()
@@ -0,0 +1,67 @@
+"""
+JWT authentication resolving users from the cache.
+
+``CachedJWTAuthentication`` keeps the ``User`` row of each token's user in
+the cache for ``AUTH_USER_CACHE_TIMEOUT`` seconds, under a key holding the
+user id and a per-user version. Saving or deleting a user moves the version
+on, so a deactivated user or a changed password takes effect on the next
+request rather than when the entry expires. Writes that skip signals, such
+as ``QuerySet.update()``, are picked up once the entry expires.
+
+That only holds when every server process shares the cache, so users are
+looked up on each request unless ``SHARED_CACHE`` is set.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import bump_version, get_version
+
+
+def _version_key(user_id):
+    return f'auth-user:version:{user_id}'
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}:{get_version(_version_key(user_id))}'
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached user so the next request loads the saved row"""
+    bump_version(_version_key(instance.pk))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` without the per-request ``User`` query"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not settings.SHARED_CACHE:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Unknown and inactive users raise here and are never cached
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        # The token, unlike the user, differs per request
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+
+def connect_signals():
+    user_model = get_user_model()
+    post_save.connect(invalidate_cached_user, sender=user_model, dispatch_uid='auth_user_cache_save')
+    post_delete.connect(invalidate_cached_user, sender=user_model, dispatch_uid='auth_user_cache_delete')
@@ -0,0 +1,196 @@
+"""
+Per-user cache of read responses.
+
+Cache keys embed a per-user version counter (and a global one for shared
+data such as the exercise catalog). Writes bump the counter, which orphans every cached response of that user at
+once instead of deleting keys one by one; orphaned entries simply expire.
+
+Responses are only cached when ``SHARED_CACHE`` says every server process
+uses the same cache (Redis). With per-process local memory a write would
+only orphan the entries of the worker that served it.
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+
+GLOBAL_VERSION_KEY = 'response-cache:version'
+HITS_KEY = 'response-cache:hits'
+MISSES_KEY = 'response-cache:misses'
+
+# Response headers replayed on cache hits
+CACHED_HEADERS = ['ETag', 'Last-Modified', 'Cache-Control', 'Vary']
+
+
+def _user_version_key(user_id):
+    return f'response-cache:version:{user_id}'
+
+
+def _incr(key):
+    if cache.add(key, 1, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def _bump(key):
+    # A version key that was evicted restarts from the clock rather than 1,
+    # so it never lands on a version whose entries may still be cached
+    if cache.add(key, time.time_ns() // 1000, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+def get_version(key):
+    """Current value of the version counter ``key``, starting it if missing"""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """
+    Move the version counter ``key`` on, now and again on commit.
+
+    Bumping right away covers reads later in the same transaction; bumping
+    again on commit orphans anything a concurrent read cached in between
+    from the not yet committed state.
+    """
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def _versions(user_id):
+    keys = [GLOBAL_VERSION_KEY, _user_version_key(user_id)]
+    versions = cache.get_many(keys)
+    return [versions[key] if key in versions else get_version(key) for key in keys]
+
+
+def invalidate_user_cache(user_id):
+    """Drop the user's cached responses"""
+    bump_version(_user_version_key(user_id))
+
+
+def invalidate_all():
+    """Drop every user's cached responses"""
+    bump_version(GLOBAL_VERSION_KEY)
+
+
+def cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
+
+
+class ResponseCacheMixin:
+    """
+    Caches ``list`` and ``retrieve`` responses per user, endpoint, query
+    string and media type, and invalidates them from ``perform_create``,
+    ``perform_update`` and ``perform_destroy``.
+
+    Viewsets overriding those hooks call ``invalidate_user_cache()`` themselves.
+    """
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(super().aretrieve, request, *args, **kwargs)
+
+    def cached_response(self, view, request, *args, **kwargs):
+        if not settings.SHARED_CACHE:
+            return view(request, *args, **kwargs)
+
+        key, cached = self.cache_lookup(request)
+        if cached is not None:
+            return self.cache_hit(request, cached)
+
+        response = view(request, *args, **kwargs)
+        self.cache_store(key, response)
+        return response
+
+    async def acached_response(self, view, request, *args, **kwargs):
+        if not settings.SHARED_CACHE:
+            return await view(request, *args, **kwargs)
+
+        # The version counters are read and bumped through the sync cache API
+        key, cached = await sync_to_async(self.cache_lookup)(request)
+        if cached is not None:
+            return self.cache_hit(request, cached)
+
+        response = await view(request, *args, **kwargs)
+        await sync_to_async(self.cache_store)(key, response)
+        return response
+
+    def cache_lookup(self, request):
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        _incr(HITS_KEY if cached is not None else MISSES_KEY)
+        return key, cached
+
+    def cache_hit(self, request, cached):
+        data, headers = cached
+        response = Response(data, headers=headers)
+        response['X-Cache'] = 'HIT'
+        if 'ETag' in headers:
+            response = get_conditional_response(request, etag=headers['ETag'], response=response)
+        return response
+
+    def cache_store(self, key, response):
+        if response.status_code == 200:
+            headers = {name: response[name] for name in CACHED_HEADERS if name in response}
+            timeout = self.cache_timeout if self.cache_timeout is not None else settings.RESPONSE_CACHE_TIMEOUT
+            cache.set(key, (response.data, headers), timeout)
+        response['X-Cache'] = 'MISS'
+
+    def get_cache_key(self, request):
+        global_version, user_version = _versions(request.user.pk)
+        request_key = '|'.join([
+            self.basename,
+            self.action,
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', None) or '',
+        ])
+        digest = hashlib.sha1(request_key.encode('utf-8')).hexdigest()
+        return f'response-cache:{request.user.pk}:{global_version}:{user_version}:{digest}'
+
+    def invalidate_user_cache(self):
+        invalidate_user_cache(self.request.user.pk)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.invalidate_user_cache()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.invalidate_user_cache()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate_user_cache()
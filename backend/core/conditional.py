@@ -0,0 +1,129 @@
+"""
+Conditional GET for per-user list and detail endpoints.
+
+Validators are computed with one aggregate query over the same queryset the
+view would serialize: the row count and the newest ``updated_at``, plus the
+same pair for any related rows rendered in the response. A matching
+``If-None-Match`` is answered with ``304 Not Modified`` before anything is
+fetched or serialized.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    Adds weak ``ETag`` and ``Last-Modified`` validators to ``list`` and
+    ``retrieve``.
+
+    ``conditional_related`` names relations whose rows are part of the
+    representation (e.g. nested exercise logs), so editing or removing one
+    of them changes the parent's validators too. Representations that also
+    change without any row changing (e.g. expiring signed URLs) override
+    ``get_representation_version()``.
+    """
+    conditional_related = []
+
+    def list(self, request, *args, **kwargs):
+        # Keyset pages cost one indexed query by design; counting the whole
+        # history for their validators would defeat that
+        use_keyset = getattr(self.paginator, 'use_keyset', None)
+        if use_keyset is not None and use_keyset(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(queryset, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.get_object_queryset(kwargs)
+        return self.conditional_response(queryset, super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        use_keyset = getattr(self.paginator, 'use_keyset', None)
+        if use_keyset is not None and use_keyset(request):
+            return await super().alist(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return await self.aconditional_response(queryset, super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = self.get_object_queryset(kwargs)
+        return await self.aconditional_response(queryset, super().aretrieve, request, *args, **kwargs)
+
+    def get_object_queryset(self, kwargs):
+        """The visible rows matching the URL's lookup: the object, or nothing"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Like get_object_or_404(), a malformed lookup is not found
+            raise Http404
+
+    def conditional_response(self, queryset, view, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(queryset)
+
+        # Only If-None-Match is honoured: a deletion can move the newest
+        # updated_at backwards, which If-Modified-Since would miss
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    async def aconditional_response(self, queryset, view, request, *args, **kwargs):
+        values = await queryset.order_by().aaggregate(**self.get_validator_aggregates())
+        etag, last_modified = self.validators_from(values)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code not in (200, 304):
+            return response
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Always revalidate, and never share responses between users
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def get_validators(self, queryset):
+        return self.validators_from(queryset.order_by().aggregate(**self.get_validator_aggregates()))
+
+    def get_validator_aggregates(self):
+        distinct = bool(self.conditional_related)
+        aggregates = {
+            'count': Count('pk', distinct=distinct),
+            'updated': Max('updated_at'),
+        }
+        for index, relation in enumerate(self.conditional_related):
+            aggregates[f'count_{index}'] = Count(relation, distinct=True)
+            aggregates[f'updated_{index}'] = Max(f'{relation}__updated_at')
+        return aggregates
+
+    def validators_from(self, values):
+        timestamps = [value for key, value in values.items() if key.startswith('updated') and value is not None]
+
+        # The same rows rendered for another user, URL or format must not match
+        key = '|'.join([
+            str(self.request.user.pk),
+            self.request.get_full_path(),
+            getattr(self.request, 'accepted_media_type', None) or '',
+            self.get_representation_version(),
+        ] + [str(values[name]) for name in sorted(values)])
+        etag = 'W/"%s"' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+        return etag, max(timestamps, default=None)
+
+    def get_representation_version(self):
+        return ''
@@ -0,0 +1,128 @@
+"""
+Downscaled derivatives of uploaded photos.
+
+Every upload gets a few renditions bounded by a maximum edge, with the EXIF
+orientation applied, each in WebP and JPEG. They are rendered off the
+request path by a small thread pool once the upload's transaction commits,
+and recorded on the model's ``derivatives`` field as
+``{size: {'width', 'height', 'webp', 'jpeg'}}`` with storage names.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import invalidate_user_cache
+from .storage import release_derivatives
+
+
+logger = logging.getLogger(__name__)
+
+# Size name -> longest edge in pixels, smallest first
+DERIVATIVE_SIZES = {
+    'thumb': 160,
+    'small': 480,
+    'medium': 1080,
+    'large': 2048,
+}
+
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+
+
+def render_derivatives(field_file):
+    """Write the derivatives of an image file and describe them with the names the storage chose"""
+    storage = field_file.storage
+    base, _ = os.path.splitext(field_file.name)
+    directory, stem = os.path.split(base)
+    largest_edge = max(DERIVATIVE_SIZES.values())
+
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as original:
+            # Let the JPEG decoder downscale by a power of two while decoding
+            original.draft('RGB', (largest_edge, largest_edge))
+            image = ImageOps.exif_transpose(original).convert('RGB')
+    finally:
+        field_file.close()
+
+    derivatives = {}
+    for name, edge in DERIVATIVE_SIZES.items():
+        rendition = image.copy()
+        rendition.thumbnail((edge, edge), Image.LANCZOS)
+
+        derivative = {'width': rendition.width, 'height': rendition.height}
+        for extension, (image_format, options) in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            rendition.save(buffer, image_format, **options)
+            derivative[extension] = storage.save(
+                f'{directory}/derivatives/{stem}_{name}.{extension}', ContentFile(buffer.getvalue())
+            )
+        derivatives[name] = derivative
+
+        # Never upscale: larger sizes would just repeat this one
+        if max(image.size) <= edge:
+            break
+
+    return derivatives
+
+
+def build_derivatives(model_label, pk):
+    """Render and record the derivatives of one stored image"""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return
+
+    derivatives = render_derivatives(instance.image)
+    updates = {'derivatives': derivatives}
+    # Let sync and conditional GETs see the new URLs
+    if any(field.name == 'updated_at' for field in model._meta.fields):
+        updates['updated_at'] = timezone.now()
+    # The image may have been replaced or deleted while rendering; then these
+    # renditions describe nothing, and the new image's own run records its own
+    if not model.objects.filter(pk=pk, image=instance.image.name).update(**updates):
+        release_derivatives(instance.image.storage, derivatives)
+        return
+    # Renditions of a previous image or run are no longer referenced
+    release_derivatives(instance.image.storage, instance.derivatives)
+    invalidate_user_cache(instance.user_id)
+
+
+def _build_in_worker(model_label, pk):
+    try:
+        build_derivatives(model_label, pk)
+    except Exception:
+        logger.exception('Rendering derivatives of %s %s failed', model_label, pk)
+    finally:
+        # Worker threads keep their own connection; don't leak it
+        connection.close()
+
+
+def schedule_derivatives(instance):
+    """Render the derivatives of ``instance.image`` after the current transaction commits"""
+    model_label, pk = instance._meta.label, instance.pk
+
+    def submit():
+        global _executor
+        if not settings.IMAGE_DERIVATIVE_WORKERS:
+            build_derivatives(model_label, pk)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_DERIVATIVE_WORKERS, thread_name_prefix='derivatives'
+            )
+        _executor.submit(_build_in_worker, model_label, pk)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,82 @@
+import csv
+import json
+from datetime import date, datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+
+from .async_views import stream_content
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    """
+    Adds ``export/csv/`` and ``export/ndjson/`` actions that stream the
+    viewset's full queryset as flat ``values()`` rows.
+
+    Rows are pulled with ``QuerySet.iterator()`` and written out chunk by
+    chunk, so memory use does not grow with the size of the history; under
+    ASGI each chunk is fetched in the sync thread as it is sent.
+    """
+    export_fields = []
+    export_ordering = None
+    export_chunk_size = 2000
+
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<export_format>csv|ndjson)')
+    def export(self, request, export_format=None):
+        # Eager loading is useless for values() rows and breaks chunked iteration
+        queryset = self.get_queryset().prefetch_related(None).select_related(None)
+        if self.export_ordering:
+            queryset = queryset.order_by(*self.export_ordering)
+        rows = queryset.values_list(*self.export_fields).iterator(chunk_size=self.export_chunk_size)
+
+        if export_format == 'csv':
+            content, content_type = self._csv_chunks(rows), 'text/csv'
+        else:
+            content, content_type = self._ndjson_chunks(rows), 'application/x-ndjson'
+
+        response = StreamingHttpResponse(stream_content(request, content), content_type=content_type)
+        filename = f'{self.basename}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _batches(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.export_chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _csv_chunks(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self._column_names())
+        for batch in self._batches(rows):
+            yield ''.join(
+                writer.writerow([
+                    value.isoformat() if isinstance(value, (date, datetime)) else value
+                    for value in row
+                ])
+                for row in batch
+            )
+
+    def _ndjson_chunks(self, rows):
+        columns = self._column_names()
+        for batch in self._batches(rows):
+            yield ''.join(
+                json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+                for row in batch
+            )
+
+    def _column_names(self):
+        # Related lookups such as exercise__name are exported as exercise_name
+        return [field.replace('__', '_') for field in self.export_fields]
@@ -0,0 +1,130 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from health.models import WeightEntry, BloodPressureReading, ProgressPhoto
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a throwaway dataset, then compares query plans and timings of the '
+        'per-user time-series lists with and without the composite indexes. '
+        'Runs against the configured database (SQLite, or PostgreSQL when DB_HOST '
+        'is set) and rolls everything back when done.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Number of seeded users')
+        parser.add_argument('--rows', type=int, default=2000, help='Rows per user and table')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        self.runs = options['runs']
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+
+        with transaction.atomic():
+            target, exercise = self.seed(options['users'], options['rows'])
+            queries = self.build_queries(target, exercise)
+
+            self.analyze()
+            with_indexes = self.measure('with indexes', queries)
+
+            self.drop_indexes()
+
+            self.analyze()
+            without_indexes = self.measure('without indexes', queries)
+
+            # Nothing seeded or dropped here may survive the benchmark
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (median ms, without -> with indexes)'))
+        for label in queries:
+            self.stdout.write(
+                f"  {label:<16} {without_indexes[label]:>8.2f} -> {with_indexes[label]:>8.2f}"
+            )
+
+    def seed(self, user_count, rows):
+        self.stdout.write(f"Seeding {user_count} users x {rows} rows per table...")
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        exercises = Exercise.objects.bulk_create([
+            Exercise(name=f'Benchmark exercise {i}', muscles_targeted='Full Body', equipment_type='OT')
+            for i in range(10)
+        ])
+
+        users = []
+        for n in range(user_count):
+            user = User.objects.create_user(username=f'benchmark-{n}-{random.getrandbits(32)}')
+            users.append(user)
+            # Shuffle so insertion order does not match the sort order
+            stamps = [start + timedelta(hours=h) for h in range(rows)]
+            random.shuffle(stamps)
+
+            WeightEntry.objects.bulk_create(
+                [WeightEntry(user=user, weight_kg=80.0, timestamp=ts) for ts in stamps],
+                batch_size=1000,
+            )
+            BloodPressureReading.objects.bulk_create(
+                [BloodPressureReading(user=user, systolic=120, diastolic=80, timestamp=ts) for ts in stamps],
+                batch_size=1000,
+            )
+            ProgressPhoto.objects.bulk_create(
+                [ProgressPhoto(user=user, image='benchmark.jpg', timestamp=ts) for ts in stamps],
+                batch_size=1000,
+            )
+            workouts = WorkoutLog.objects.bulk_create(
+                [WorkoutLog(user=user, date=ts) for ts in stamps],
+                batch_size=1000,
+            )
+            ExerciseLog.objects.bulk_create(
+                [
+                    ExerciseLog(workout=workout, exercise=random.choice(exercises), sets=3, reps=10, weight=50.0)
+                    for workout in workouts
+                ],
+                batch_size=1000,
+            )
+
+        return users[len(users) // 2], exercises[0]
+
+    def build_queries(self, user, exercise):
+        workout_ids = list(WorkoutLog.objects.filter(user=user).values_list('id', flat=True)[:25])
+        return {
+            'weight_entries': WeightEntry.objects.filter(user=user)[:25],
+            'bp_readings': BloodPressureReading.objects.filter(user=user)[:25],
+            'progress_photos': ProgressPhoto.objects.filter(user=user)[:25],
+            'workouts': WorkoutLog.objects.filter(user=user)[:25],
+            'exercise_logs': ExerciseLog.objects.filter(workout_id__in=workout_ids, exercise=exercise),
+        }
+
+    def drop_indexes(self):
+        # Raw DROP INDEX statements, since SQLite's schema editor refuses to run
+        # inside a transaction with foreign key checks enabled
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in (WeightEntry, BloodPressureReading, ProgressPhoto, WorkoutLog, ExerciseLog):
+                for index in model._meta.indexes:
+                    cursor.execute(str(index.remove_sql(model, schema_editor)))
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def measure(self, label, queries):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {label} ==="))
+        medians = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(self.runs):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            medians[name] = statistics.median(timings)
+
+            self.stdout.write(f"\n{name}: median {medians[name]:.2f} ms")
+            self.stdout.write(queryset.explain())
+        return medians
@@ -0,0 +1,129 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests running servers: fast clients request an API endpoint back to '
+        'back while slow clients trickle their requests in byte by byte, then '
+        'reports requests/sec and latency percentiles of the fast clients. Pass '
+        'several --url values (e.g. a SERVER_MODE=wsgi and a SERVER_MODE=asgi '
+        'deployment) to compare them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', required=True, help='Base URL of a running server (repeatable)')
+        parser.add_argument('--path', default='/api/weight-entries/', help='Endpoint requested by all clients')
+        parser.add_argument('--username', help='User the JWT is issued for (must exist in this database)')
+        parser.add_argument('--token', help='Access token to send instead of issuing one')
+        parser.add_argument('--clients', type=int, default=20, help='Concurrent fast clients')
+        parser.add_argument('--slow-clients', type=int, default=10, help='Concurrent slow clients')
+        parser.add_argument('--slow-seconds', type=float, default=5.0, help='Time a slow client takes to send a request')
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds to run per URL')
+
+    def handle(self, *args, **options):
+        token = options['token']
+        if not token:
+            if not options['username']:
+                raise CommandError('Pass --token, or --username to issue one')
+            token = str(AccessToken.for_user(User.objects.get(username=options['username'])))
+        self.options = options
+
+        results = {}
+        for url in options['url']:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {url} ==="))
+            results[url] = asyncio.run(self.run(url, token))
+            self.report(results[url])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (fast clients)'))
+        self.stdout.write(f"  {'url':<32} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for url, result in results.items():
+            self.stdout.write(
+                f"  {url:<32} {result['rps']:>8.1f} {result['p50']:>8.1f} {result['p99']:>8.1f} {result['errors']:>7}"
+            )
+
+    async def run(self, url, token):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.request = (
+            f"GET {self.options['path']} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode('ascii')
+
+        latencies, errors, slow_done = [], [], []
+        deadline = time.perf_counter() + self.options['duration']
+        clients = [self.fast_client(deadline, latencies, errors) for _ in range(self.options['clients'])]
+        clients += [self.slow_client(deadline, slow_done) for _ in range(self.options['slow_clients'])]
+        await asyncio.gather(*clients)
+
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'rps': len(latencies) / self.options['duration'],
+            'p50': self.percentile(latencies, 50),
+            'p99': self.percentile(latencies, 99),
+            'max': latencies[-1] if latencies else 0.0,
+            'errors': len(errors),
+            'slow_requests': len(slow_done),
+        }
+
+    async def fetch(self, trickle=0.0):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if trickle:
+                # One byte at a time, spread over the whole send
+                delay = trickle / len(self.request)
+                for index in range(len(self.request)):
+                    writer.write(self.request[index:index + 1])
+                    await writer.drain()
+                    await asyncio.sleep(delay)
+            else:
+                writer.write(self.request)
+                await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        status_line = response.split(b'\r\n', 1)[0].split()
+        return int(status_line[1]) if len(status_line) > 1 else 0
+
+    async def fast_client(self, deadline, latencies, errors):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(self.fetch(), timeout=60)
+            except (OSError, asyncio.TimeoutError) as exc:
+                errors.append(exc)
+                continue
+            if status != 200:
+                errors.append(status)
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    async def slow_client(self, deadline, done):
+        while time.perf_counter() < deadline:
+            try:
+                await asyncio.wait_for(self.fetch(trickle=self.options['slow_seconds']), timeout=120)
+            except (OSError, asyncio.TimeoutError):
+                continue
+            done.append(1)
+
+    def percentile(self, values, percent):
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+    def report(self, result):
+        self.stdout.write(f"Fast requests: {result['requests']} ({result['rps']:.1f} req/s), errors: {result['errors']}")
+        self.stdout.write(
+            f"Latency: p50 {result['p50']:.1f} ms, p99 {result['p99']:.1f} ms, max {result['max']:.1f} ms"
+        )
+        self.stdout.write(f"Slow requests completed: {result['slow_requests']}")
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.finders import get_finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+# Fingerprint of the collected static sources, kept next to the collected files
+STATIC_HASH_FILE = '.collectstatic-hash'
+
+
+def static_sources_hash():
+    """
+    Hash of every static source file's path, size and mtime, and of the
+    staticfiles storage. Files baked into an image keep their mtimes, so the
+    hash only changes with a new image or an edited source.
+    """
+    digest = hashlib.sha256(settings.STORAGES['staticfiles']['BACKEND'].encode('utf-8'))
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list([]):
+            stat = os.stat(storage.path(path))
+            entries.append(f'{path}|{stat.st_size}|{stat.st_mtime_ns}')
+    for entry in sorted(entries):
+        digest.update(entry.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        'Prepares a container for serving: waits for the database with backoff, '
+        'then runs migrate and collectstatic only when there are unapplied '
+        'migrations or changed static sources, reporting the time of each phase.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to wait for and migrate')
+        parser.add_argument('--db-timeout', type=float, default=60.0, help='Seconds to wait for the database')
+        parser.add_argument('--skip-static', action='store_true', help='Never run collectstatic (e.g. in development)')
+        parser.add_argument(
+            '--create-superuser',
+            action='store_true',
+            help='Create the DJANGO_SUPERUSER_USERNAME account if it does not exist',
+        )
+
+    def handle(self, *args, **options):
+        self.database = options['database']
+        started = time.perf_counter()
+
+        self.phase('database', self.wait_for_database, options['db_timeout'])
+        self.phase('migrate', self.migrate)
+        if options['skip_static']:
+            self.report('collectstatic', 0.0, 'skipped (--skip-static)')
+        else:
+            self.phase('collectstatic', self.collectstatic)
+        if options['create_superuser']:
+            self.phase('superuser', self.create_superuser)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Successfully booted in {elapsed:.2f}s'))
+
+    def phase(self, name, step, *args):
+        started = time.perf_counter()
+        outcome = step(*args)
+        self.report(name, time.perf_counter() - started, outcome)
+
+    def report(self, name, elapsed, outcome):
+        self.stdout.write(f"  {name:<14} {elapsed:>7.2f}s  {outcome}")
+
+    def wait_for_database(self, timeout):
+        connection = connections[self.database]
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        attempts = 1
+        while True:
+            try:
+                connection.ensure_connection()
+                return f'ready after {attempts} attempt(s)'
+            except OperationalError as exc:
+                connection.close()
+                if time.monotonic() + delay > deadline:
+                    raise CommandError(f'Database unavailable after {timeout:.0f}s: {exc}')
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+                attempts += 1
+
+    def migrate(self):
+        executor = MigrationExecutor(connections[self.database])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan:
+            return 'up to date'
+        call_command('migrate', database=self.database, interactive=False, verbosity=0)
+        return f'applied {len(plan)} migration(s)'
+
+    def collectstatic(self):
+        current = static_sources_hash()
+        hash_path = os.path.join(settings.STATIC_ROOT, STATIC_HASH_FILE)
+        try:
+            with open(hash_path) as hash_file:
+                previous = hash_file.read().strip()
+        except FileNotFoundError:
+            previous = None
+
+        # A wiped static volume has to be refilled even if the sources are unchanged
+        manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+        collected = manifest_name is None or staticfiles_storage.exists(manifest_name)
+        if previous == current and collected:
+            return 'unchanged'
+
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(hash_path, 'w') as hash_file:
+            hash_file.write(current)
+        return 'collected'
+
+    def create_superuser(self):
+        username = os.environ.get('DJANGO_SUPERUSER_USERNAME')
+        password = os.environ.get('DJANGO_SUPERUSER_PASSWORD')
+        if not username or not password:
+            return 'skipped (DJANGO_SUPERUSER_USERNAME/PASSWORD not set)'
+
+        user_model = get_user_model()
+        if user_model.objects.using(self.database).filter(username=username).exists():
+            return 'exists'
+        user_model.objects.db_manager(self.database).create_superuser(
+            username, os.environ.get('DJANGO_SUPERUSER_EMAIL', ''), password
+        )
+        return 'created'
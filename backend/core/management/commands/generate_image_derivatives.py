@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from core.derivatives import build_derivatives
+from health.models import ProgressPhoto
+from users.models import ProfilePicture
+
+
+class Command(BaseCommand):
+    help = 'Renders the resized derivatives of progress photos and profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help='Only render images without derivatives')
+
+    def handle(self, *args, **options):
+        rendered = 0
+        for model in (ProgressPhoto, ProfilePicture):
+            queryset = model.objects.exclude(image='')
+            if options['missing']:
+                queryset = queryset.filter(derivatives={})
+            for pk in queryset.values_list('pk', flat=True).iterator():
+                try:
+                    build_derivatives(model._meta.label, pk)
+                except Exception as exc:
+                    self.stderr.write(f'{model._meta.label} {pk}: {exc}')
+                    continue
+                rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully rendered derivatives of {rendered} images'))
@@ -0,0 +1,19 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from core.storage import prune_orphaned_blobs
+
+
+class Command(BaseCommand):
+    help = 'Removes stored blobs that no row references, left behind by rolled back uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Keep files younger than this many seconds, they may belong to uploads in progress',
+        )
+
+    def handle(self, *args, **options):
+        removed = prune_orphaned_blobs(default_storage, min_age=options['min_age'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully removed {removed} orphaned blob files'))
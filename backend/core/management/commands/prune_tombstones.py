@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS; '
+        'clients with an older cursor get a full resync instead'
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully pruned {deleted} tombstones older than {settings.SYNC_TOMBSTONE_RETENTION_DAYS} days'
+        ))
@@ -0,0 +1,187 @@
+"""
+Authenticated media.
+
+Uploaded images are not served publicly. API responses link them through
+``/api/media/<kind>/<pk>/<variant>/`` URLs signed for the owner, where the
+variant is ``original`` or a derivative such as ``thumb.webp``. The view
+checks the signature (or the request's own credentials) and that the row
+belongs to that user, then hands the transfer to nginx with
+``X-Accel-Redirect``, so workers never read file bytes.
+
+Signed URLs expire at the end of the next ``MEDIA_URL_MAX_AGE`` period, so
+they stay stable, and cacheable, for at least one full period. They also
+carry a short hash of the stored file name, which changes with the image.
+"""
+import hashlib
+import mimetypes
+import time
+from urllib.parse import quote, urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signing import Signer
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from rest_framework import permissions
+from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied
+from rest_framework.views import APIView
+
+from .async_views import aiterate, is_asgi
+from .derivatives import DERIVATIVE_FORMATS
+from .uploads import ProbedImageField
+
+
+# URL segment -> model with ``user``, ``image`` and ``derivatives`` fields
+MEDIA_KINDS = {
+    'progress-photos': 'health.ProgressPhoto',
+    'profile-pictures': 'users.ProfilePicture',
+}
+
+ORIGINAL = 'original'
+
+_signer = Signer(salt='core.media')
+
+
+def url_expiry(now=None):
+    """Expiry of URLs signed now: the end of the next ``MEDIA_URL_MAX_AGE`` period"""
+    max_age = settings.MEDIA_URL_MAX_AGE
+    now = time.time() if now is None else now
+    return (int(now) // max_age + 2) * max_age
+
+
+def file_version(name):
+    return hashlib.sha1(name.encode('utf-8')).hexdigest()[:12]
+
+
+def _signature(path, user_id, version, expires):
+    return _signer.signature(f'{path}:{user_id}:{version}:{expires}')
+
+
+def protected_media_url(instance, name, variant=ORIGINAL, request=None):
+    """Signed URL of ``instance``'s stored file ``name`` for its owner"""
+    kind = next(kind for kind, label in MEDIA_KINDS.items() if label == instance._meta.label)
+    path = reverse('protected-media', kwargs={'kind': kind, 'pk': instance.pk, 'variant': variant})
+    version = file_version(name)
+    expires = url_expiry()
+    query = urlencode({
+        'u': instance.user_id,
+        'v': version,
+        'e': expires,
+        's': _signature(path, instance.user_id, version, expires),
+    })
+    url = f'{path}?{query}'
+    return request.build_absolute_uri(url) if request else url
+
+
+def resolve_variant(image, derivatives, variant):
+    """Stored file name of ``variant``, or ``None`` if there is no such file"""
+    if variant == ORIGINAL:
+        return image or None
+    size, _, extension = variant.partition('.')
+    if extension not in DERIVATIVE_FORMATS:
+        return None
+    return (derivatives or {}).get(size, {}).get(extension)
+
+
+def derivative_urls(field_file, derivatives, request=None):
+    """Size name -> dimensions and signed WebP/JPEG URLs, for serializers"""
+    return {
+        name: {
+            'width': derivative['width'],
+            'height': derivative['height'],
+            **{
+                extension: protected_media_url(
+                    field_file.instance, derivative[extension], f'{name}.{extension}', request
+                )
+                for extension in DERIVATIVE_FORMATS
+            },
+        }
+        for name, derivative in (derivatives or {}).items()
+    }
+
+
+class ProtectedImageField(ProbedImageField):
+    """Image field rendering the signed, authenticated URL of the original"""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return protected_media_url(value.instance, value.name, request=self.context.get('request'))
+
+
+class ProtectedMediaView(APIView):
+    """
+    Serves an uploaded image to its owner.
+
+    Browsers load images without the API's Authorization header, so a valid
+    signature from ``protected_media_url()`` stands in for it.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Image requests accept image types only; errors still render as JSON
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, kind, pk, variant):
+        signed_user_id = self.signed_user_id(request)
+        if signed_user_id is not None:
+            user_id = signed_user_id
+        elif request.user.is_authenticated:
+            user_id = request.user.pk
+        else:
+            raise NotAuthenticated()
+
+        if kind not in MEDIA_KINDS:
+            raise NotFound()
+        # The ownership check is the only query
+        row = apps.get_model(MEDIA_KINDS[kind]).objects.filter(pk=pk, user_id=user_id).values_list(
+            'image', 'derivatives'
+        ).first()
+        name = resolve_variant(*row, variant) if row else None
+        if name is None:
+            raise NotFound()
+        # Links to a replaced image must not serve its successor
+        version = request.query_params.get('v')
+        if signed_user_id is not None and version != file_version(name):
+            raise NotFound()
+
+        response = self.file_response(request, name)
+        if signed_user_id is not None:
+            max_age = int(request.query_params['e']) - int(time.time())
+            patch_cache_control(response, private=True, max_age=max_age, immutable=True)
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def signed_user_id(self, request):
+        """Owner the URL was signed for, or ``None`` without a signature"""
+        params = request.query_params
+        if 's' not in params:
+            return None
+        try:
+            user_id = int(params['u'])
+            expires = int(params['e'])
+        except (KeyError, ValueError):
+            raise PermissionDenied('Invalid media link')
+        expected = _signature(request.path, user_id, params.get('v', ''), expires)
+        if not constant_time_compare(expected, params['s']):
+            raise PermissionDenied('Invalid media link')
+        if expires < time.time():
+            raise PermissionDenied('Media link has expired')
+        return user_id
+
+    def file_response(self, request, name):
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if not settings.MEDIA_ACCEL_REDIRECT:
+            # Development without nginx
+            response = FileResponse(default_storage.open(name), content_type=content_type)
+            if is_asgi(request):
+                # The file stays registered to be closed with the response
+                response.streaming_content = aiterate(response.streaming_content)
+            return response
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_LOCATION + quote(name)
+        return response
@@ -0,0 +1,227 @@
+"""
+Prometheus metrics for every request.
+
+``MetricsMiddleware`` records, per route (the URL pattern's name, e.g.
+``workoutlog-list``): request latency, status counts, the number and total
+time of SQL queries, in-flight requests and request body bytes. ``/metrics``
+serves them in the Prometheus text format.
+
+Streaming responses (exports, files) are recorded when their body has
+been sent, so latency and query counts cover the streaming too. Body bytes
+are the Content-Length, or for chunked bodies under ASGI the size of the
+body the handler received; Django under WSGI does not read bodies without
+a Content-Length.
+
+Under gunicorn each worker has its own counters. With
+``PROMETHEUS_MULTIPROC_DIR`` set (``gunicorn.conf.py`` does), workers
+write them to per-process files in that directory and ``/metrics`` sums
+them up, whichever worker answers the scrape.
+"""
+import os
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency', ['method', 'route'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUESTS = Counter('http_requests', 'Requests by response status', ['method', 'route', 'status'])
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries per request', ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_TIME = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in SQL queries per request', ['route'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests being served', multiprocess_mode='livesum')
+BODY_BYTES = Counter('http_request_body_bytes', 'Request body bytes received', ['method', 'route'])
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class QueryTimer:
+    """Execute wrapper counting the queries run through it and their total time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(sql, time.perf_counter() - started)
+
+    def add(self, sql, duration):
+        self.duration += duration
+        self.count += 1
+
+
+def timing_queries(timer):
+    """Context manager running ``timer`` around every query on every connection"""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(timer))
+    return stack
+
+
+def route_name(request):
+    # Pattern names keep the label set small; raw paths would hold ids
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.view_name or match.route
+
+
+def body_size(request):
+    """Bytes of the request body, whether or not it came with a Content-Length"""
+    if request.META.get('CONTENT_LENGTH'):
+        return int(request.META['CONTENT_LENGTH'])
+    if isinstance(request, ASGIRequest):
+        # The ASGI handler spools the whole body to a file before building
+        # the request (the test client's payload cannot be measured this way)
+        try:
+            size = request._stream.seek(0, os.SEEK_END)
+            request._stream.seek(0)
+        except (AttributeError, OSError):
+            return 0
+        return size
+    return 0
+
+
+class TimedStream:
+    """
+    Streaming response content timing the queries run for each chunk (such
+    as an export's next batch), and recording the request once the body is
+    exhausted or the response closed, whichever comes first
+    """
+
+    def __init__(self, content, timer, record):
+        self.content = content
+        self.timer = timer
+        self.record = record
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with timing_queries(self.timer):
+            try:
+                return next(self.content)
+            except StopIteration:
+                self.close()
+                raise
+
+    def close(self):
+        # Called by the response's close() too
+        record, self.record = self.record, None
+        if record is not None:
+            record()
+
+
+class AsyncTimedStream(TimedStream):
+    """``TimedStream`` over async content"""
+    # Not iterable synchronously, so the response treats it as async
+    __iter__ = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        # Chunks are fetched in the sync thread, whose connections are not
+        # the event loop's, so the timer is installed there
+        queries = await sync_to_async(timing_queries)(self.timer)
+        try:
+            return await anext(self.content)
+        except StopAsyncIteration:
+            self.close()
+            raise
+        finally:
+            await sync_to_async(queries.close)()
+
+
+class MetricsMiddleware:
+    """Records the metrics above; goes first so it times the whole stack"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer, started, body_bytes = self.start(request)
+        try:
+            with timing_queries(timer):
+                response = self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        return self.finish(request, response, timer, started, body_bytes)
+
+    async def __acall__(self, request):
+        timer, started, body_bytes = self.start(request)
+        try:
+            with timing_queries(timer):
+                response = await self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        return self.finish(request, response, timer, started, body_bytes)
+
+    def start(self, request):
+        IN_FLIGHT.inc()
+        return QueryTimer(), time.perf_counter(), body_size(request)
+
+    def finish(self, request, response, timer, started, body_bytes):
+        def record():
+            self.record(request, response, timer, started, body_bytes)
+
+        if not response.streaming:
+            record()
+        elif response.is_async:
+            response.streaming_content = AsyncTimedStream(response.streaming_content, timer, record)
+        else:
+            response.streaming_content = TimedStream(response.streaming_content, timer, record)
+        return response
+
+    def record(self, request, response, timer, started, body_bytes):
+        route = route_name(request)
+        REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - started)
+        REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+        DB_QUERIES.labels(route).observe(timer.count)
+        DB_TIME.labels(route).observe(timer.duration)
+        if body_bytes:
+            BODY_BYTES.labels(request.method, route).inc(body_bytes)
+
+
+def metrics_view(request):
+    """
+    The metrics in the Prometheus text format, for scraping from inside the
+    Docker network. The nginx configs do not pass ``/metrics`` on (the host
+    config denies it outright); ``METRICS_TOKEN`` adds a bearer token on top.
+    """
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
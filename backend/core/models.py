@@ -0,0 +1,33 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class Tombstone(models.Model):
+    """Deletion log entry telling sync clients that one of a user's rows is gone"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    model = models.CharField(max_length=32, help_text="Sync collection of the deleted row")
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.model} #{self.object_id} deleted"
+    
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+
+class Blob(models.Model):
+    """Stored file named by its content hash, shared by every file field holding the same bytes"""
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name, derived from the SHA-256 of the content")
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0, help_text="Number of file field values pointing at this blob")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+    
+    class Meta:
+        ordering = ['-created_at']
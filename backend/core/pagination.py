@@ -0,0 +1,179 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Keyset (seek) pagination over the model's ``Meta.ordering``.
+
+    The first ordering field is the sort key and the primary key breaks ties,
+    so every page is fetched with an indexed range filter instead of an
+    OFFSET, and no COUNT(*) is run. Cursors are opaque base64 tokens holding
+    the boundary row's sort key, primary key and direction.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page([instance async for instance in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """The one-row-longer slice holding the requested page"""
+        self.base_url = request.build_absolute_uri()
+        self.field_name, descending = self.get_ordering(queryset)
+        self.field = queryset.model._meta.get_field(self.field_name)
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor['reverse'] if self.cursor else False
+
+        # Walking "backwards" from a cursor flips the scan direction
+        if descending != reverse:
+            ordering = ('-' + self.field_name, '-pk')
+            lookup = 'lt'
+        else:
+            ordering = (self.field_name, 'pk')
+            lookup = 'gt'
+
+        if self.cursor:
+            value = self.cursor['value']
+            queryset = queryset.filter(
+                Q(**{f'{self.field_name}__{lookup}': value})
+                | Q(**{self.field_name: value, f'pk__{lookup}': self.cursor['pk']})
+            )
+
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.cursor and self.cursor['reverse']:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, queryset):
+        ordering = queryset.model._meta.ordering
+        if not ordering:
+            return 'pk', True
+        field_name = ordering[0]
+        if field_name.startswith('-'):
+            return field_name[1:], True
+        return field_name, False
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        token = json.dumps({
+            'v': self.field.value_to_string(instance),
+            'pk': instance.pk,
+            'r': int(reverse),
+        }, separators=(',', ':'))
+        encoded = urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            token = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            return {
+                'value': self.field.to_python(token['v']),
+                'pk': int(token['pk']),
+                'reverse': bool(token['r']),
+            }
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class TimeSeriesPagination(pagination.PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset mode.
+
+    Requests with ``?pagination=cursor`` (or carrying a ``cursor`` from a
+    previous keyset page) are served by ``KeysetPagination``; all others keep
+    the regular ``count``/``next``/``previous`` page-number response.
+    """
+    mode_query_param = 'pagination'
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset()`` counting and fetching with the async ORM"""
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_pagination_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached property; prime it instead of a sync COUNT
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [instance async for instance in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        self.request = request
+        return list(self.page)
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,206 @@
+"""
+``Server-Timing`` breakdown of API responses, for browser devtools.
+
+With ``SERVER_TIMING`` set to ``staff`` (staff users only) or ``all``,
+``ServerTimingMiddleware`` times each request and its SQL queries, and
+viewsets using ``ServerTimingMixin`` mark their phases:
+
+- ``auth``: authentication, permission and throttle checks
+- ``db``: all SQL, with the query count
+- ``serialize``: the view's own work outside SQL (querysets, pagination,
+  serializers)
+- ``render``: turning the data into the response body
+- ``sql-slowest``: the slowest statement, without its parameters
+- ``total``: the whole request as seen by the middleware
+
+Timings overlap (``db`` includes queries run while authenticating), so
+they add up to more than ``total``. With ``SERVER_TIMING=off`` (the
+default) nothing is measured.
+
+In ``staff`` mode the user is only known once the mixin has authenticated
+the request, so queries are timed from then on and only for staff: other
+requests cost one ``RequestProfile`` and no query wrapper, and ``db``
+leaves out the authentication queries. Views without the mixin get no
+header in that mode.
+"""
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import QueryTimer, timing_queries
+
+
+SQL_DESCRIPTION_LENGTH = 120
+
+
+class SlowestQueryTimer(QueryTimer):
+    """``QueryTimer`` that also keeps the slowest statement"""
+
+    def __init__(self):
+        super().__init__()
+        self.slowest_sql = None
+        self.slowest_duration = 0.0
+
+    def add(self, sql, duration):
+        super().add(sql, duration)
+        if duration >= self.slowest_duration:
+            self.slowest_sql = sql
+            self.slowest_duration = duration
+
+
+class RequestProfile:
+    """Timestamps of one request's phases, filled in by the middleware and the mixin"""
+
+    def __init__(self):
+        self.queries = SlowestQueryTimer()
+        self.started = time.perf_counter()
+        self.user = None
+        self.auth = None
+        self.serialize = None
+        self.handler_started = None
+        self.handler_ended = None
+        self.rendered = None
+        self._db_at_handler_start = 0.0
+        self._timing = None
+
+    def start_queries(self):
+        if self._timing is None:
+            self._timing = timing_queries(self.queries)
+
+    def stop_queries(self):
+        if self._timing is not None:
+            self._timing.close()
+            self._timing = None
+
+    def start_handler(self):
+        self.handler_started = time.perf_counter()
+        self._db_at_handler_start = self.queries.duration
+
+    def end_handler(self):
+        self.handler_ended = time.perf_counter()
+        if self.handler_started is not None:
+            handler_db = self.queries.duration - self._db_at_handler_start
+            self.serialize = max(self.handler_ended - self.handler_started - handler_db, 0.0)
+
+    def end_render(self, response):
+        self.rendered = time.perf_counter()
+
+    def header(self):
+        metrics = []
+        if self.auth is not None:
+            metrics.append(timing('auth', self.auth))
+        metrics.append(timing('db', self.queries.duration, f'{self.queries.count} queries'))
+        if self.serialize is not None:
+            metrics.append(timing('serialize', self.serialize))
+        if self.rendered is not None and self.handler_ended is not None:
+            metrics.append(timing('render', self.rendered - self.handler_ended))
+        if self.queries.slowest_sql:
+            metrics.append(timing('sql-slowest', self.queries.slowest_duration, self.queries.slowest_sql))
+        metrics.append(timing('total', time.perf_counter() - self.started))
+        return ', '.join(metrics)
+
+
+def timing(name, seconds, description=None):
+    metric = f'{name};dur={seconds * 1000:.2f}'
+    if description:
+        metric += f';desc="{quote(description)}"'
+    return metric
+
+
+def quote(text):
+    # A single-line, latin-1 safe quoted-string
+    text = re.sub(r'\s+', ' ', text).strip()
+    if len(text) > SQL_DESCRIPTION_LENGTH:
+        text = text[:SQL_DESCRIPTION_LENGTH - 3] + '...'
+    text = text.encode('ascii', 'replace').decode('ascii')
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def get_profile(request):
+    """The profile of a Django or DRF request, if it is being profiled"""
+    return getattr(getattr(request, '_request', request), 'server_timing', None)
+
+
+class ServerTimingMiddleware:
+    """Goes right after ``MetricsMiddleware``, so ``total`` covers the rest of the stack"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if settings.SERVER_TIMING not in ('staff', 'all'):
+            return self.get_response(request)
+
+        profile = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop_queries()
+        return self.add_header(response, profile)
+
+    async def __acall__(self, request):
+        if settings.SERVER_TIMING not in ('staff', 'all'):
+            return await self.get_response(request)
+
+        profile = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.stop_queries()
+        return self.add_header(response, profile)
+
+    def start(self, request):
+        profile = request.server_timing = RequestProfile()
+        # In staff mode the mixin starts timing queries once the user is known
+        if settings.SERVER_TIMING == 'all':
+            profile.start_queries()
+        return profile
+
+    def add_header(self, response, profile):
+        if settings.SERVER_TIMING == 'staff' and not getattr(profile.user, 'is_staff', False):
+            return response
+        response['Server-Timing'] = profile.header()
+        return response
+
+
+class ServerTimingMixin:
+    """Marks the auth, view and render phases of a profiled DRF view"""
+
+    def initial(self, request, *args, **kwargs):
+        profile = get_profile(request)
+        if profile is None:
+            return super().initial(request, *args, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            super().initial(request, *args, **kwargs)
+            profile.user = request.user
+        finally:
+            profile.auth = time.perf_counter() - started
+
+        if settings.SERVER_TIMING == 'staff':
+            if not request.user.is_staff:
+                # Nothing more is measured for requests that get no header
+                request._request.server_timing = None
+                return
+            profile.start_queries()
+        profile.start_handler()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        profile = get_profile(request)
+        if profile is None:
+            return super().finalize_response(request, response, *args, **kwargs)
+
+        profile.end_handler()
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(profile.end_render)
+        return response
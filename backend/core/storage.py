@@ -0,0 +1,207 @@
+"""
+Content-addressed media storage.
+
+``ContentAddressedStorage`` ignores the name a file field asks for and
+stores the bytes under ``blobs/<aa>/<bb>/<sha256><ext>``, so identical
+uploads, whether a retried progress photo or the same picture used as a
+profile picture, end up as one file. Saving content that is already
+stored skips the write and only takes a reference on its ``Blob`` row.
+
+Deleting drops a reference and removes the file once the last one is gone,
+after the transaction commits. Rows release their image and derivatives
+through a ``post_delete`` receiver, and an image they no longer hold
+when saved, however it was replaced (API, admin, shell); see
+``connect_signals()``. Save rows with new images in a transaction, so a
+failed save rolls back the reference it took along with the row.
+
+Files stored before content addressing keep their original names and are
+deleted like with ``FileSystemStorage``.
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import Blob
+
+
+BLOB_PREFIX = 'blobs/'
+
+# Spelling variants that would otherwise split identical bytes into two blobs
+EXTENSION_ALIASES = {'.jpeg': '.jpg', '.jpe': '.jpg'}
+
+# Models whose ``image`` and ``derivatives`` hold references to blobs
+IMAGE_MODELS = ['health.ProgressPhoto', 'users.ProfilePicture']
+
+
+def blob_name(content_hash, requested_name):
+    extension = os.path.splitext(requested_name)[1].lower()
+    extension = EXTENSION_ALIASES.get(extension, extension)
+    return f'{BLOB_PREFIX}{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping one reference-counted file per distinct content"""
+
+    def get_available_name(self, name, max_length=None):
+        # _save() picks the real name; equal names mean equal bytes, never a clash
+        return name
+
+    def _save(self, name, content):
+        spooled_path, content_hash, size = self._spool(content)
+        name = blob_name(content_hash, name)
+        try:
+            with transaction.atomic():
+                blob, _ = Blob.objects.select_for_update().get_or_create(name=name, defaults={'size': size})
+                Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                if not self.exists(name):
+                    try:
+                        self._place(spooled_path or content.temporary_file_path(), name)
+                    except FileExistsError:
+                        # A concurrent save of the same bytes got there first
+                        pass
+                    else:
+                        spooled_path = None
+        finally:
+            if spooled_path is not None:
+                os.remove(spooled_path)
+        return name
+
+    def _spool(self, content):
+        """
+        Hash ``content`` in one streaming pass.
+
+        Files already on disk are only read, or not at all when the upload
+        handler hashed them while receiving (``content_hash``); anything else
+        is copied to a temporary file next to the blobs as it is hashed.
+        Returns the temporary file's path (``None`` for files on disk), the
+        hex digest and the size.
+        """
+        if hasattr(content, 'temporary_file_path'):
+            content_hash = getattr(content, 'content_hash', None)
+            if content_hash is not None:
+                return None, content_hash, content.size
+            digest = hashlib.sha256()
+            size = 0
+            for chunk in content.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+            return None, digest.hexdigest(), size
+
+        directory = self.path(f'{BLOB_PREFIX}tmp')
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=directory)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as spool:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    digest.update(chunk)
+                    spool.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path, digest.hexdigest(), size
+
+    def _place(self, source_path, name):
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        file_move_safe(source_path, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+    def delete(self, name):
+        if not name.startswith(BLOB_PREFIX):
+            return super().delete(name)
+
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+        transaction.on_commit(lambda: self._remove_unreferenced(name))
+
+    def _remove_unreferenced(self, name):
+        # The same bytes may have been uploaded again since the last reference went
+        if not Blob.objects.filter(name=name).exists():
+            super().delete(name)
+
+
+def release_derivatives(storage, derivatives):
+    """Drop the references held by a ``derivatives`` field value"""
+    for derivative in (derivatives or {}).values():
+        for key, value in derivative.items():
+            if key not in ('width', 'height') and value:
+                storage.delete(value)
+
+
+def release_image_files(sender, instance, **kwargs):
+    """Drop a deleted row's references to its image and derivatives"""
+    if not instance.image:
+        return
+    storage = instance.image.storage
+    storage.delete(instance.image.name)
+    release_derivatives(storage, instance.derivatives)
+
+
+def note_replaced_image(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Before saving a new or cleared image, note the one the row holds now"""
+    if raw or instance._state.adding or (update_fields is not None and 'image' not in update_fields):
+        return
+    previous = sender._base_manager.filter(pk=instance.pk).values_list('image', flat=True).first()
+    image = instance.image
+    # A new upload takes its own reference, even to the same bytes
+    if previous and (not image._committed or image.name != previous):
+        instance._replaced_image_name = previous
+
+
+def release_replaced_image(sender, instance, **kwargs):
+    """Drop a saved row's reference to the image it held before"""
+    previous = instance.__dict__.pop('_replaced_image_name', None)
+    if previous:
+        # Its derivatives stay on the row until the new image's are recorded
+        instance.image.storage.delete(previous)
+
+
+def connect_signals():
+    for label in IMAGE_MODELS:
+        model = apps.get_model(label)
+        pre_save.connect(note_replaced_image, sender=model, dispatch_uid=f'note_replaced_{label}')
+        post_save.connect(release_replaced_image, sender=model, dispatch_uid=f'release_replaced_{label}')
+        post_delete.connect(release_image_files, sender=model, dispatch_uid=f'release_files_{label}')
+
+
+def prune_orphaned_blobs(storage, min_age=3600):
+    """
+    Remove blob files without a ``Blob`` row, and stale temporary spools.
+
+    They are left behind when the transaction that stored them rolls back.
+    Files younger than ``min_age`` seconds may belong to saves in progress
+    and are kept. Returns the number of files removed.
+    """
+    root = storage.path(BLOB_PREFIX)
+    cutoff = time.time() - min_age
+    removed = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if os.path.getmtime(path) > cutoff:
+                continue
+            name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+            if name.startswith(f'{BLOB_PREFIX}tmp/') or not Blob.objects.filter(name=name).exists():
+                os.remove(path)
+                removed += 1
+    return removed
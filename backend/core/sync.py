@@ -0,0 +1,134 @@
+"""
+Delta sync of a user's data for offline and watch clients.
+
+Changed rows are found by ``updated_at`` and deleted rows through the
+``Tombstone`` log written on ``post_delete``, so an incremental sync only
+reads what changed since the client's cursor. Cursors older than the
+tombstone retention window fall back to a full resync.
+"""
+import json
+import weakref
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from health.models import WeightEntry, BloodPressureReading, ProgressPhoto
+from health.serializers import WeightEntrySerializer, BloodPressureReadingSerializer, ProgressPhotoSerializer
+from workouts.models import WorkoutLog, ExerciseLog
+from workouts.serializers import WorkoutLogSummarySerializer, ExerciseLogSerializer
+
+from .models import Tombstone
+
+
+# Rows committed just before a cursor was issued may carry an older
+# updated_at than rows already returned, so cursors overlap a little
+SYNC_CURSOR_OVERLAP = timedelta(seconds=5)
+
+# Collection name -> (model, lookup of the owning user, serializer)
+SYNC_COLLECTIONS = {
+    'workouts': (WorkoutLog, 'user', WorkoutLogSummarySerializer),
+    'exercise_logs': (ExerciseLog, 'workout__user', ExerciseLogSerializer),
+    'weight_entries': (WeightEntry, 'user', WeightEntrySerializer),
+    'blood_pressure': (BloodPressureReading, 'user', BloodPressureReadingSerializer),
+    'progress_photos': (ProgressPhoto, 'user', ProgressPhotoSerializer),
+}
+
+COLLECTION_NAMES = {model: name for name, (model, _, _) in SYNC_COLLECTIONS.items()}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp):
+    token = json.dumps({'t': timestamp.isoformat()}, separators=(',', ':'))
+    return urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    try:
+        timestamp = datetime.fromisoformat(json.loads(urlsafe_b64decode(encoded.encode('ascii')))['t'])
+    except Exception:
+        raise InvalidCursor(encoded)
+    if timezone.is_naive(timestamp):
+        raise InvalidCursor(encoded)
+    return timestamp
+
+
+def retention_horizon(now=None):
+    return (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def changes_since(user, since, context=None):
+    """
+    Collect the user's rows changed after ``since`` and the ids deleted since.
+
+    ``since`` of ``None``, or older than the retention window, returns every
+    row with ``full`` set so the client replaces its local copy.
+    """
+    now = timezone.now()
+    full = since is None or since < retention_horizon(now)
+
+    changed = {}
+    for name, (model, owner, serializer_class) in SYNC_COLLECTIONS.items():
+        queryset = model.objects.filter(**{owner: user})
+        if not full:
+            queryset = queryset.filter(updated_at__gt=since)
+        changed[name] = serializer_class(queryset.order_by('updated_at', 'pk'), many=True, context=context).data
+
+    deleted = {name: [] for name in SYNC_COLLECTIONS}
+    if not full:
+        tombstones = Tombstone.objects.filter(user=user, deleted_at__gt=since)
+        for name, object_id in tombstones.values_list('model', 'object_id'):
+            deleted[name].append(object_id)
+
+    return {
+        'cursor': encode_cursor(now - SYNC_CURSOR_OVERLAP),
+        'full': full,
+        'changed': changed,
+        'deleted': deleted,
+    }
+
+
+def prune_tombstones(now=None):
+    """Drop tombstones older than the retention window; returns the number deleted"""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=retention_horizon(now)).delete()
+    return deleted
+
+
+# Workout owners looked up during one delete() call, keyed by its origin
+_workout_owners = weakref.WeakKeyDictionary()
+
+
+def _owner_id(instance, origin):
+    if not isinstance(instance, ExerciseLog):
+        return instance.user_id
+    if isinstance(origin, WorkoutLog):
+        return origin.user_id
+
+    owners = _workout_owners.setdefault(origin, {})
+    if instance.workout_id not in owners:
+        owners[instance.workout_id] = WorkoutLog.objects.filter(
+            pk=instance.workout_id
+        ).values_list('user_id', flat=True).first()
+    return owners[instance.workout_id]
+
+
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Deleting the user cascades to its tombstones as well
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin_model is User:
+        return
+
+    user_id = _owner_id(instance, origin)
+    if user_id is not None:
+        Tombstone.objects.create(user_id=user_id, model=COLLECTION_NAMES[sender], object_id=instance.pk)
+
+
+def connect_signals():
+    for model in COLLECTION_NAMES:
+        post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'sync_tombstone_{model._meta.label_lower}')
@@ -0,0 +1,129 @@
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.contrib.auth.models import User
+from rest_framework.test import force_authenticate
+from rest_framework import status
+from datetime import datetime, timedelta, timezone
+from health.models import WeightEntry
+from health.views import WeightEntryViewSet
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+from workouts.views import WorkoutLogViewSet
+
+
+class AsyncReadViewTest(TestCase):
+    """Test list and retrieve served from async views with the async ORM"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.entries = WeightEntry.objects.bulk_create([
+            WeightEntry(user=self.user1, weight_kg=70 + i / 10, timestamp=start + timedelta(hours=i))
+            for i in range(30)
+        ])
+        self.other_entry = WeightEntry.objects.create(user=self.user2, weight_kg=90.0, timestamp=start)
+
+        with override_settings(ASYNC_READ_VIEWS=True):
+            self.list_view = WeightEntryViewSet.as_view({'get': 'list', 'post': 'create'}, basename='weightentry')
+            self.detail_view = WeightEntryViewSet.as_view({'get': 'retrieve'}, basename='weightentry')
+
+    async def get(self, view, path, user=None, data=None, view_kwargs=None, headers=None):
+        request = self.factory.get(path, data, headers=headers)
+        if user is not None:
+            force_authenticate(request, user=user)
+        return await view(request, **(view_kwargs or {}))
+
+    def test_views_are_async_only_when_enabled(self):
+        """Test that the setting picks the async view and leaves other viewsets sync"""
+        self.assertTrue(iscoroutinefunction(self.list_view))
+        with override_settings(ASYNC_READ_VIEWS=False):
+            self.assertFalse(iscoroutinefunction(WeightEntryViewSet.as_view({'get': 'list'})))
+
+    async def test_list_is_paginated_per_user(self):
+        """Test that the async list pages through the user's own entries only"""
+        response = await self.get(self.list_view, '/api/weight-entries/', self.user1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertNotIn(self.other_entry.id, [entry['id'] for entry in response.data['results']])
+
+        response = await self.get(self.list_view, '/api/weight-entries/', self.user1, data={'page': 2})
+        self.assertEqual(len(response.data['results']), 5)
+
+    async def test_keyset_list(self):
+        """Test that keyset pages are fetched with the async ORM too"""
+        response = await self.get(self.list_view, '/api/weight-entries/', self.user1, data={'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(response.data['results'][0]['id'], self.entries[-1].id)
+        self.assertIsNotNone(response.data['next'])
+
+    async def test_retrieve_own_and_other(self):
+        """Test that the async detail view returns own entries and 404 for others"""
+        entry = self.entries[0]
+        response = await self.get(
+            self.detail_view, f'/api/weight-entries/{entry.id}/', self.user1, view_kwargs={'pk': entry.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], entry.id)
+
+        response = await self.get(
+            self.detail_view, f'/api/weight-entries/{self.other_entry.id}/', self.user1,
+            view_kwargs={'pk': self.other_entry.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = await self.get(self.detail_view, '/api/weight-entries/abc/', self.user1, view_kwargs={'pk': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_unauthenticated_rejected(self):
+        """Test that authentication and permissions still apply"""
+        response = await self.get(self.list_view, '/api/weight-entries/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(SHARED_CACHE=True)
+    async def test_cache_and_conditional_get(self):
+        """Test that the response cache and ETag revalidation work on the async path"""
+        first = await self.get(self.list_view, '/api/weight-entries/', self.user1)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        second = await self.get(self.list_view, '/api/weight-entries/', self.user1)
+        self.assertEqual(second['X-Cache'], 'HIT')
+
+        response = await self.get(self.list_view, '/api/weight-entries/', self.user1, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_writes_take_the_sync_path(self):
+        """Test that other methods on an async view still run the sync actions"""
+        request = self.factory.post(
+            '/api/weight-entries/', {'weight_kg': 75.0, 'timestamp': '2024-03-01T08:00:00Z'},
+            content_type='application/json'
+        )
+        force_authenticate(request, user=self.user1)
+        response = await self.list_view(request)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(await WeightEntry.objects.filter(user=self.user1).acount(), 31)
+
+    async def test_nested_workout_list(self):
+        """Test that serializers reading prefetched rows and the catalog run off the event loop"""
+        bench = await Exercise.objects.acreate(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        workout = await WorkoutLog.objects.acreate(user=self.user1, date=datetime.now(timezone.utc))
+        await ExerciseLog.objects.acreate(workout=workout, exercise=bench, sets=3, reps=5, weight=80.0)
+
+        with override_settings(ASYNC_READ_VIEWS=True):
+            view = WorkoutLogViewSet.as_view({'get': 'list'}, basename='workoutlog')
+        response = await self.get(view, '/api/workouts/', self.user1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['exercise_logs'][0]['exercise_name'], 'Bench Press')
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@override_settings(SHARED_CACHE=True)
+class CachedJWTAuthenticationTest(TestCase):
+    """Test that JWT requests resolve the user from the cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('weightentry-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in queries if 'FROM "auth_user"' in query['sql']]
+
+    def test_user_loaded_once(self):
+        """Test that only the first request looks the user up"""
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_saving_user_invalidates(self):
+        """Test that a saved user is loaded again on the next request"""
+        self.user_queries()
+        self.user.first_name = 'Changed'
+        self.user.save()
+        self.assertEqual(len(self.user_queries()), 1)
+
+    def test_deactivated_user_rejected(self):
+        """Test that deactivating a cached user takes effect on the next request"""
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('weightentry-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_rejected(self):
+        """Test that a deleted user's token stops working"""
+        self.user_queries()
+        self.user.delete()
+        response = self.client.get(reverse('weightentry-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_rejected(self):
+        """Test that tokens still have to be valid"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        response = self.client.get(reverse('weightentry-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_cache_is_not_used(self):
+        """Test that every request loads the user when other workers could not see an invalidation"""
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 1)
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from itertools import chain, repeat
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+
+
+class BootCommandTest(TestCase):
+    """Test that the boot command only does the work a restart needs"""
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+        settings_override = override_settings(STATIC_ROOT=self.static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def boot(self, *args):
+        out = StringIO()
+        call_command('boot', *args, stdout=out)
+        return out.getvalue()
+
+    def test_restart_skips_migrate_and_collectstatic(self):
+        """Test that a second boot finds nothing to migrate or collect"""
+        first = self.boot()
+        self.assertIn('migrate', first)
+        self.assertIn('up to date', first)
+        self.assertIn('collected', first)
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, 'staticfiles.json')))
+
+        with mock.patch('core.management.commands.boot.call_command') as call:
+            second = self.boot()
+        call.assert_not_called()
+        self.assertIn('unchanged', second)
+        self.assertIn('Successfully booted', second)
+
+    def test_wiped_static_root_is_collected_again(self):
+        """Test that a missing manifest forces collectstatic despite a matching hash"""
+        self.boot()
+        os.remove(os.path.join(self.static_root, 'staticfiles.json'))
+        self.assertIn('collected', self.boot())
+
+    def test_waits_for_database_with_backoff(self):
+        """Test that failed connection attempts are retried with growing delays"""
+        failures = [OperationalError('starting up'), OperationalError('starting up')]
+        with mock.patch.object(connection, 'ensure_connection', side_effect=chain(failures, repeat(None))), \
+                mock.patch('core.management.commands.boot.time.sleep') as sleep:
+            output = self.boot('--skip-static')
+        self.assertIn('ready after 3 attempt(s)', output)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.1, 0.2])
+
+    def test_gives_up_on_unreachable_database(self):
+        """Test that the command fails once the timeout is spent"""
+        with mock.patch.object(connection, 'ensure_connection', side_effect=OperationalError('refused')), \
+                mock.patch('core.management.commands.boot.time.sleep'):
+            with self.assertRaises(CommandError):
+                self.boot('--skip-static', '--db-timeout', '0')
+
+    @mock.patch.dict(os.environ, {'DJANGO_SUPERUSER_USERNAME': 'admin', 'DJANGO_SUPERUSER_PASSWORD': 'secret123'})
+    def test_superuser_created_once(self):
+        """Test that the superuser is created on the first boot only"""
+        self.assertIn('created', self.boot('--skip-static', '--create-superuser'))
+        self.assertIn('exists', self.boot('--skip-static', '--create-superuser'))
+        self.assertTrue(User.objects.get(username='admin').is_superuser)
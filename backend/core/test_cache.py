@@ -0,0 +1,138 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timezone
+from health.models import WeightEntry
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+@override_settings(SHARED_CACHE=True)
+class ResponseCacheTest(TestCase):
+    """Test the per-user response cache and its invalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        self.now = datetime.now(timezone.utc)
+        self.bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        self.workout = WorkoutLog.objects.create(user=self.user1, date=self.now)
+        self.log = ExerciseLog.objects.create(workout=self.workout, exercise=self.bench, sets=3, reps=5, weight=80.0)
+        WeightEntry.objects.create(user=self.user1, weight_kg=80.0, timestamp=self.now)
+        WeightEntry.objects.create(user=self.user2, weight_kg=90.0, timestamp=self.now)
+
+    def test_repeated_reads_are_served_from_cache(self):
+        """Test that a repeated list is a cache hit without queries"""
+        url = reverse('weightentry-list')
+        first = self.client.get(url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        # Other query params are cached separately
+        self.assertEqual(self.client.get(url + '?page=1')['X-Cache'], 'MISS')
+
+    def test_cache_hit_honours_if_none_match(self):
+        """Test that a cached response still answers conditional requests with 304"""
+        url = reverse('workoutlog-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cache_is_per_user(self):
+        """Test that users never see each other's cached responses"""
+        url = reverse('weightentry-list')
+        self.client.get(url)
+
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['weight_kg'], 90.0)
+
+    def test_writes_invalidate_the_users_responses(self):
+        """Test that create, update and delete invalidate the user's cached reads"""
+        list_url = reverse('weightentry-list')
+        self.client.get(list_url)
+        self.client.post(list_url, {'weight_kg': 79.0, 'timestamp': self.now.isoformat()}, format='json')
+        response = self.client.get(list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+        # Exercise log writes show up in the cached workout lists
+        workout_url = reverse('workoutlog-detail', args=[self.workout.id])
+        self.client.get(workout_url)
+        self.client.patch(reverse('exerciselog-detail', args=[self.log.id]), {'weight': 85.0}, format='json')
+        response = self.client.get(workout_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['exercise_logs'][0]['weight'], 85.0)
+
+    def test_other_users_writes_keep_cache(self):
+        """Test that one user's writes do not invalidate another user's cache"""
+        url = reverse('weightentry-list')
+        self.client.get(url)
+
+        self.client.force_authenticate(user=self.user2)
+        self.client.post(url, {'weight_kg': 91.0, 'timestamp': self.now.isoformat()}, format='json')
+
+        self.client.force_authenticate(user=self.user1)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    def test_exercise_edits_invalidate_all_users(self):
+        """Test that renaming an exercise invalidates every cached workout"""
+        url = reverse('workoutlog-list')
+        self.client.get(url)
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.patch(reverse('exercise-detail', args=[self.bench.id]), {'name': 'Flat Bench'}, format='json')
+
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['exercise_logs'][0]['exercise_name'], 'Flat Bench')
+
+    def test_stats_endpoint(self):
+        """Test that hit and miss counters are exposed to staff only"""
+        url = reverse('weightentry-list')
+        self.client.get(url)
+        self.client.get(url)
+
+        stats_url = reverse('cache-stats-list')
+        self.assertEqual(self.client.get(stats_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_cache_is_not_used(self):
+        """Test that responses are not cached when other workers could not see the invalidation"""
+        url = reverse('weightentry-list')
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Cache', response)
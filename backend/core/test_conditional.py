@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timezone
+from health.models import WeightEntry
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+class ConditionalGetTest(TestCase):
+    """Test ETag and Last-Modified validators on list and detail endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        now = datetime.now(timezone.utc)
+        self.bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        self.workout = WorkoutLog.objects.create(user=self.user1, date=now)
+        self.log = ExerciseLog.objects.create(workout=self.workout, exercise=self.bench, sets=3, reps=5, weight=80.0)
+        self.entries = [
+            WeightEntry.objects.create(user=self.user1, weight_kg=80.0 + i, timestamp=now)
+            for i in range(3)
+        ]
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_list_is_not_modified(self):
+        """Test that a matching ETag is answered with 304 in one query"""
+        url = reverse('weightentry-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        # Without a cached response, only the validators are queried
+        cache.clear()
+        with self.assertNumQueries(1):
+            revalidated = self.revalidate(url, response['ETag'])
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+        self.assertEqual(revalidated.content, b'')
+
+    def test_writes_change_the_etag(self):
+        """Test that updates and deletions invalidate the list ETag"""
+        url = reverse('weightentry-list')
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(reverse('weightentry-detail', args=[self.entries[0].id]), {'notes': 'x'}, format='json')
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Deleting the newest row moves updated_at backwards; the count still changes
+        etag = response['ETag']
+        self.client.delete(reverse('weightentry-detail', args=[self.entries[0].id]))
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_nested_log_changes_invalidate_workouts(self):
+        """Test that editing or removing an exercise log changes the workout ETags"""
+        list_url = reverse('workoutlog-list')
+        detail_url = reverse('workoutlog-detail', args=[self.workout.id])
+        list_etag = self.client.get(list_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+        self.assertNotEqual(list_etag, detail_etag)
+
+        self.client.patch(reverse('exerciselog-detail', args=[self.log.id]), {'weight': 85.0}, format='json')
+        self.assertEqual(self.revalidate(list_url, list_etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.revalidate(detail_url, detail_etag).status_code, status.HTTP_200_OK)
+
+        list_etag = self.client.get(list_url)['ETag']
+        self.client.delete(reverse('exerciselog-detail', args=[self.log.id]))
+        self.assertEqual(self.revalidate(list_url, list_etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_is_per_user_and_query(self):
+        """Test that the same ETag does not match for another user or other query params"""
+        url = reverse('workoutlog-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url + '?page=1', etag).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.user2)
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_missing_detail_is_not_found(self):
+        """Test that validators do not mask 404s for other users' rows"""
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(reverse('workoutlog-detail', args=[self.workout.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', response)
+
+    def test_malformed_pk_is_not_found(self):
+        """Test that a non-numeric pk is a 404 on every conditional detail route"""
+        urls = ['/api/workouts/abc/', '/api/weight-entries/abc/', '/api/exercise-logs/abc/', '/api/progress-photos/abc/']
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND, url)
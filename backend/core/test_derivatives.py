@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from PIL import Image
+from core.derivatives import build_derivatives, render_derivatives
+from core.models import Blob
+from core.testing import image_upload
+from health.models import ProgressPhoto
+from users.models import ProfilePicture
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class ImageDerivativeTest(TestCase):
+    """Test the resized derivatives of uploaded photos"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def upload_photo(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('progressphoto-list'), {
+                'image': image,
+                'timestamp': '2024-01-01T00:00:00Z',
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return ProgressPhoto.objects.get(pk=response.data['id'])
+
+    def test_progress_photo_derivatives(self):
+        """Test that every size is rendered in WebP and JPEG with orientation applied"""
+        # Orientation 6 means the camera was rotated: the photo displays as portrait
+        photo = self.upload_photo(image_upload(3000, 2000, orientation=6))
+
+        self.assertEqual(list(photo.derivatives), ['thumb', 'small', 'medium', 'large'])
+        small = photo.derivatives['small']
+        self.assertEqual((small['width'], small['height']), (320, 480))
+        with photo.image.storage.open(small['webp']) as derivative:
+            self.assertEqual(Image.open(derivative).format, 'WEBP')
+        with photo.image.storage.open(small['jpeg']) as derivative:
+            self.assertEqual(Image.open(derivative).size, (320, 480))
+
+        response = self.client.get(reverse('progressphoto-detail', args=[photo.id]))
+        urls = response.data['image_urls']
+        self.assertEqual(urls['thumb']['width'], 107)
+        self.assertTrue(urls['thumb']['webp'].startswith(
+            f'http://testserver/api/media/progress-photos/{photo.id}/thumb.webp/?'
+        ))
+        self.assertIn('/thumb.jpeg/?', urls['thumb']['jpeg'])
+
+    def test_small_images_are_not_upscaled(self):
+        """Test that sizes larger than the original are skipped"""
+        photo = self.upload_photo(image_upload(400, 300))
+        self.assertEqual(list(photo.derivatives), ['thumb', 'small'])
+        self.assertEqual(photo.derivatives['small']['width'], 400)
+
+    def test_profile_picture_derivatives(self):
+        """Test that uploaded profile pictures get derivatives too"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('userprofile-upload-profile-picture'), {
+                'image': image_upload(800, 800),
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        picture = ProfilePicture.objects.get(user=self.user)
+        self.assertEqual(picture.derivatives['thumb']['width'], 160)
+        response = self.client.get(reverse('userprofile-profile-pictures'))
+        self.assertIn('medium', response.data['results'][0]['image_urls'])
+
+    def test_backfill_command(self):
+        """Test that the command renders derivatives of existing images"""
+        photo = ProgressPhoto.objects.create(user=self.user, image=image_upload(600, 400), timestamp='2024-01-01T00:00:00Z')
+        self.assertEqual(photo.derivatives, {})
+
+        out = StringIO()
+        call_command('generate_image_derivatives', '--missing', stdout=out)
+        self.assertIn('Successfully rendered derivatives of 1 images', out.getvalue())
+        photo.refresh_from_db()
+        self.assertIn('medium', photo.derivatives)
+
+    def test_image_replaced_while_rendering(self):
+        """Test that renditions of a replaced image are released instead of recorded"""
+        photo = ProgressPhoto.objects.create(user=self.user, image=image_upload(600, 400), timestamp='2024-01-01T00:00:00Z')
+        blobs = set(Blob.objects.values_list('name', flat=True))
+
+        def render_then_replace(field_file):
+            derivatives = render_derivatives(field_file)
+            ProgressPhoto.objects.filter(pk=photo.pk).update(image='progress_photos/replacement.jpg')
+            return derivatives
+
+        with mock.patch('core.derivatives.render_derivatives', side_effect=render_then_replace):
+            build_derivatives('health.ProgressPhoto', photo.pk)
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.derivatives, {})
+        self.assertEqual(set(Blob.objects.values_list('name', flat=True)), blobs)
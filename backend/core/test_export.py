@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from datetime import datetime, timedelta, timezone
+from health.models import WeightEntry, BloodPressureReading
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+class ExportTest(TestCase):
+    """Test the streaming CSV and NDJSON export actions"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        WeightEntry.objects.bulk_create([
+            WeightEntry(user=self.user1, weight_kg=80 + i / 10, timestamp=start + timedelta(days=i), notes='a, "b"')
+            for i in range(2500)
+        ])
+        WeightEntry.objects.create(user=self.user2, weight_kg=100, timestamp=start)
+        BloodPressureReading.objects.create(user=self.user1, systolic=120, diastolic=80, timestamp=start)
+
+        bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        self.workout = WorkoutLog.objects.create(user=self.user1, date=start)
+        ExerciseLog.objects.create(workout=self.workout, exercise=bench, sets=3, reps=10, weight=60.0)
+
+    def get_export(self, url_name, export_format):
+        response = self.client.get(reverse(url_name, kwargs={'export_format': export_format}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_weight_csv_export(self):
+        """Test that the CSV export contains every row of the current user only"""
+        response, body = self.get_export('weightentry-export', 'csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="weightentry.csv"', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(rows[0]['notes'], 'a, "b"')
+        self.assertEqual(rows[-1]['timestamp'], '2024-01-01T00:00:00+00:00')
+
+    def test_bp_ndjson_export(self):
+        """Test that the NDJSON export emits one object per line"""
+        response, body = self.get_export('bloodpressurereading-export', 'ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['systolic'], 120)
+        self.assertIsNone(rows[0]['pulse'])
+
+    def test_workout_and_exercise_log_exports(self):
+        """Test the workout exports, including related columns"""
+        _, body = self.get_export('workoutlog-export', 'ndjson')
+        self.assertEqual(json.loads(body)['id'], self.workout.id)
+
+        _, body = self.get_export('exerciselog-export', 'csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(rows[0]['exercise_name'], 'Bench Press')
+        self.assertEqual(rows[0]['workout'], str(self.workout.id))
+
+    def test_export_requires_authentication(self):
+        """Test that unauthenticated users cannot export"""
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('weightentry-export', kwargs={'export_format': 'csv'}))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_streams_under_asgi(self):
+        """Test that ASGI requests get the export as an async iterator, one chunk at a time"""
+        url = reverse('weightentry-export', kwargs={'export_format': 'ndjson'})
+        token = AccessToken.for_user(self.user1)
+        response = await AsyncClient().get(url, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+
+        chunks = [chunk async for chunk in response.streaming_content]
+        # 2500 rows in chunks of export_chunk_size
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2000, 500])
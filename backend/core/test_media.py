@@ -0,0 +1,142 @@
+import shutil
+import tempfile
+from unittest import mock
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.testing import image_upload
+from health.models import ProgressPhoto
+from users.models import ProfilePicture
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0, MEDIA_ACCEL_REDIRECT=True)
+class ProtectedMediaTest(TestCase):
+    """Test that uploaded images are only served to their owner, through nginx"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.other_user = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('progressphoto-list'), {
+                'image': image_upload(),
+                'timestamp': '2024-01-01T00:00:00Z',
+            }, format='multipart')
+        self.photo = ProgressPhoto.objects.get(pk=response.data['id'])
+        self.data = response.data
+
+    def test_signed_url_is_handed_to_nginx(self):
+        """Test that a signed link works without credentials and never reads the file"""
+        anonymous = APIClient()
+        with self.assertNumQueries(1):
+            response = anonymous.get(self.data['image'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.photo.image.name}')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.content, b'')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_derivative_urls_are_signed(self):
+        """Test that derivative links resolve to the stored renditions"""
+        urls = self.client.get(reverse('progressphoto-detail', args=[self.photo.id])).data['image_urls']
+        self.photo.refresh_from_db()
+        response = APIClient().get(urls['thumb']['webp'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['X-Accel-Redirect'], f"/protected-media/{self.photo.derivatives['thumb']['webp']}"
+        )
+        self.assertEqual(response['Content-Type'], 'image/webp')
+
+    def test_unsigned_url_requires_authentication(self):
+        """Test that the bare media path is refused without credentials and served to the owner"""
+        path = reverse('protected-media', args=['progress-photos', self.photo.id, 'original'])
+        response = APIClient().get(path)
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_other_users_cannot_fetch(self):
+        """Test that another user's credentials don't unlock the photo"""
+        client = APIClient()
+        client.force_authenticate(user=self.other_user)
+        response = client.get(reverse('protected-media', args=['progress-photos', self.photo.id, 'original']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_signature_is_rejected(self):
+        """Test that changing any signed part of the link invalidates it"""
+        forged = self.data['image'].replace(f'u={self.user.id}', f'u={self.other_user.id}')
+        response = APIClient().get(forged)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_expired_link_is_rejected(self):
+        """Test that links stop working after their expiry"""
+        with mock.patch('core.media.time.time', return_value=4102444800):
+            response = APIClient().get(self.data['image'])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_replaced_image_invalidates_old_links(self):
+        """Test that a link to a replaced image does not serve the new one"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('progressphoto-detail', args=[self.photo.id]), {
+                'image': image_upload(color='navy'),
+            }, format='multipart')
+        response = APIClient().get(self.data['image'])
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_profile_picture_urls(self):
+        """Test that profile pictures are linked through the protected endpoint as well"""
+        response = self.client.post(reverse('userprofile-upload-profile-picture'), {
+            'image': image_upload(color='teal'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse('userprofile-my-profile'))
+        url = response.data['current_profile_picture']['image']
+        picture = ProfilePicture.objects.get(user=self.user)
+        self.assertIn(f'/api/media/profile-pictures/{picture.id}/original/?', url)
+        response = APIClient().get(url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{picture.image.name}')
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=False)
+    def test_streams_without_nginx(self):
+        """Test that the file itself is sent when nginx is not in front"""
+        response = APIClient().get(self.data['image'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'\xff\xd8'))
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=False)
+    async def test_streams_under_asgi(self):
+        """Test that ASGI requests get the file as an async iterator rather than read into a list"""
+        response = await AsyncClient().get(self.data['image'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertTrue(content.startswith(b'\xff\xd8'))
+        self.assertEqual(len(content), int(response['Content-Length']))
@@ -0,0 +1,128 @@
+from django.core.cache import cache
+from io import BytesIO
+from django.core.handlers.asgi import ASGIRequest
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from prometheus_client import REGISTRY
+from datetime import datetime, timezone
+from health.models import WeightEntry
+from .metrics import body_size
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(TestCase):
+    """Test the per-route request metrics and the /metrics endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        WeightEntry.objects.create(user=self.user, weight_kg=80.0, timestamp=datetime.now(timezone.utc))
+
+    def test_request_counted_per_route(self):
+        """Test that latency, status and query metrics are labelled with the route name"""
+        labels = {'method': 'GET', 'route': 'weightentry-list'}
+        requests = sample('http_requests_total', status='200', **labels)
+        latencies = sample('http_request_duration_seconds_count', **labels)
+        queries = sample('http_request_db_queries_sum', route='weightentry-list')
+
+        response = self.client.get(reverse('weightentry-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(sample('http_requests_total', status='200', **labels), requests + 1)
+        self.assertEqual(sample('http_request_duration_seconds_count', **labels), latencies + 1)
+        # At least the validators, the count and the page
+        self.assertGreaterEqual(sample('http_request_db_queries_sum', route='weightentry-list'), queries + 3)
+        self.assertEqual(sample('http_requests_in_flight'), 0)
+
+    def test_detail_routes_share_a_label(self):
+        """Test that ids in the path do not create new label values"""
+        entry = WeightEntry.objects.get(user=self.user)
+        before = sample('http_requests_total', method='GET', route='weightentry-detail', status='200')
+        self.client.get(reverse('weightentry-detail', args=[entry.id]))
+        after = sample('http_requests_total', method='GET', route='weightentry-detail', status='200')
+        self.assertEqual(after, before + 1)
+
+    def test_unmatched_and_error_statuses(self):
+        """Test that unknown URLs and failed requests are counted by status"""
+        before = sample('http_requests_total', method='GET', route='unmatched', status='404')
+        self.client.get('/no-such-page/')
+        self.assertEqual(sample('http_requests_total', method='GET', route='unmatched', status='404'), before + 1)
+
+        self.client.force_authenticate(user=None)
+        before = sample('http_requests_total', method='GET', route='weightentry-list', status='401')
+        self.client.get(reverse('weightentry-list'))
+        self.assertEqual(sample('http_requests_total', method='GET', route='weightentry-list', status='401'), before + 1)
+
+    def test_upload_bytes(self):
+        """Test that request body sizes are added up per route"""
+        before = sample('http_request_body_bytes_total', method='POST', route='weightentry-list')
+        response = self.client.post(
+            reverse('weightentry-list'), {'weight_kg': 79.5, 'timestamp': '2024-01-01T08:00:00Z'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        after = sample('http_request_body_bytes_total', method='POST', route='weightentry-list')
+        self.assertGreater(after, before)
+        self.assertEqual(after - before, int(response.wsgi_request.META['CONTENT_LENGTH']))
+
+    def test_streaming_response_recorded_once_sent(self):
+        """Test that an export is recorded after its body, including the queries run while streaming"""
+        labels = {'method': 'GET', 'route': 'weightentry-export'}
+        requests = sample('http_requests_total', status='200', **labels)
+        queries = sample('http_request_db_queries_sum', route='weightentry-export')
+
+        response = self.client.get(reverse('weightentry-export', kwargs={'export_format': 'csv'}))
+        self.assertEqual(sample('http_requests_total', status='200', **labels), requests)
+
+        b''.join(response.streaming_content)
+        self.assertEqual(sample('http_requests_total', status='200', **labels), requests + 1)
+        # The rows are fetched while the body is sent
+        self.assertGreaterEqual(sample('http_request_db_queries_sum', route='weightentry-export'), queries + 1)
+
+    async def test_async_streaming_queries_counted(self):
+        """Test that under ASGI the queries of chunks fetched in the sync thread are counted"""
+        queries = sample('http_request_db_queries_sum', route='weightentry-export')
+        token = AccessToken.for_user(self.user)
+        response = await AsyncClient().get(
+            reverse('weightentry-export', kwargs={'export_format': 'ndjson'}),
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertTrue(response.is_async)
+        [chunk async for chunk in response.streaming_content]
+        self.assertGreaterEqual(sample('http_request_db_queries_sum', route='weightentry-export'), queries + 1)
+
+    def test_chunked_asgi_body_size(self):
+        """Test that ASGI bodies without a Content-Length are measured from the received body"""
+        scope = {'type': 'http', 'method': 'POST', 'path': '/api/weight-entries/bulk/', 'headers': []}
+        body = BytesIO(b'{"weight_kg": 80}\n' * 10)
+        request = ASGIRequest(scope, body)
+        self.assertEqual(body_size(request), 180)
+        self.assertEqual(request.read(), b'{"weight_kg": 80}\n' * 10)
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics serves the text format"""
+        self.client.get(reverse('weightentry-list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'http_request_duration_seconds_bucket{', response.content)
+        self.assertIn(b'route="weightentry-list"', response.content)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        """Test that a configured token is required"""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,133 @@
+import re
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient, force_authenticate
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from datetime import datetime, timezone
+from health.views import WeightEntryViewSet
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+from .profiling import RequestProfile, SlowestQueryTimer, quote
+
+
+PARAM = r';([\w-]+)=("(?:[^"\\]|\\.)*"|[^;,"]*)'
+METRIC = re.compile(r'([\w-]+)((?:' + PARAM + r')*)(?:,\s*|$)')
+
+
+def timings(response):
+    """Server-Timing metric names mapped to their parameters"""
+    return {
+        match.group(1): dict(re.findall(PARAM, match.group(2)))
+        for match in METRIC.finditer(response['Server-Timing'])
+    }
+
+
+class ServerTimingTest(TestCase):
+    """Test the opt-in Server-Timing breakdown on API responses"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.staff = User.objects.create_user(
+            username='staff',
+            email='staff@example.com',
+            password='password123',
+            is_staff=True
+        )
+        bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        for user in (self.user, self.staff):
+            workout = WorkoutLog.objects.create(user=user, date=datetime.now(timezone.utc))
+            ExerciseLog.objects.create(workout=workout, exercise=bench, sets=3, reps=5, weight=80.0)
+
+    @override_settings(SERVER_TIMING='off')
+    def test_off(self):
+        """Test that no header is added unless enabled"""
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(reverse('workoutlog-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING='staff')
+    def test_staff_only(self):
+        """Test that only staff users get the breakdown in staff mode"""
+        self.client.force_authenticate(user=self.user)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('workoutlog-list')))
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(reverse('workoutlog-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = timings(response)
+        self.assertEqual(list(metrics), ['auth', 'db', 'serialize', 'render', 'sql-slowest', 'total'])
+        self.assertRegex(metrics['db']['desc'], r'^"\d+ queries"$')
+        self.assertIn('SELECT', metrics['sql-slowest']['desc'])
+        for params in metrics.values():
+            self.assertGreaterEqual(float(params['dur']), 0)
+
+    @override_settings(SERVER_TIMING='staff')
+    def test_staff_mode_skips_other_users_queries(self):
+        """Test that in staff mode queries are only timed once a staff user is known"""
+        with mock.patch.object(SlowestQueryTimer, 'add') as add:
+            self.client.force_authenticate(user=self.user)
+            self.client.get(reverse('workoutlog-list'))
+            add.assert_not_called()
+
+            self.client.force_authenticate(user=self.staff)
+            self.client.get(reverse('workoutlog-list'))
+            add.assert_called()
+
+    @override_settings(SERVER_TIMING='staff')
+    def test_custom_action_with_jwt(self):
+        """Test that token-authenticated custom actions such as my_profile are profiled"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.staff)}')
+        response = self.client.get(reverse('userprofile-my-profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = timings(response)
+        self.assertIn('auth', metrics)
+        self.assertIn('serialize', metrics)
+        self.assertIn('user', metrics['sql-slowest']['desc'])
+
+    @override_settings(SERVER_TIMING='all')
+    def test_all_mode_counts_queries(self):
+        """Test that the reported query count matches the queries run"""
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('workoutlog-list'))
+        self.assertEqual(timings(response)['db']['desc'], f'"{len(queries)} queries"')
+
+    @override_settings(SERVER_TIMING='all')
+    def test_failed_authentication(self):
+        """Test that rejected requests still report what was measured"""
+        response = self.client.get(reverse('workoutlog-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('auth', timings(response))
+        self.assertNotIn('serialize', timings(response))
+
+    async def test_async_read_path(self):
+        """Test that the async list view marks its phases too"""
+        with override_settings(ASYNC_READ_VIEWS=True):
+            view = WeightEntryViewSet.as_view({'get': 'list'}, basename='weightentry')
+        request = AsyncRequestFactory().get('/api/weight-entries/')
+        request.server_timing = profile = RequestProfile()
+        force_authenticate(request, user=self.user)
+
+        response = await view(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(profile.auth)
+        self.assertIsNotNone(profile.serialize)
+        self.assertEqual(profile.user, self.user)
+
+    def test_description_quoting(self):
+        """Test that SQL is flattened, shortened and escaped for the header"""
+        self.assertEqual(quote('SELECT "a"\n  FROM  b'), 'SELECT \\"a\\" FROM b')
+        self.assertEqual(len(quote('SELECT ' + 'x' * 500)), 120)
+        self.assertEqual(quote('naïve'), 'na?ve')
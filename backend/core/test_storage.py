@@ -0,0 +1,176 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Blob
+from core.testing import image_upload, make_image
+from health.models import ProgressPhoto
+from users.models import ProfilePicture
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class ContentAddressedStorageTest(TestCase):
+    """Test that uploads are stored once per distinct content and reference counted"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def upload_photo(self, content, name='photo.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('progressphoto-list'), {
+                'image': SimpleUploadedFile(name, content, content_type='image/jpeg'),
+                'timestamp': '2024-01-01T00:00:00Z',
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return ProgressPhoto.objects.get(pk=response.data['id'])
+
+    def delete_photo(self, photo):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('progressphoto-detail', args=[photo.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_identical_uploads_share_one_blob(self):
+        """Test that retried uploads point at the same file with two references"""
+        first = self.upload_photo(make_image())
+        second = self.upload_photo(make_image(), name='retry.JPEG')
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertTrue(first.image.name.endswith('.jpg'))
+        self.assertEqual(Blob.objects.get(name=first.image.name).ref_count, 2)
+        # Identical images also render identical derivatives
+        self.assertEqual(first.derivatives, second.derivatives)
+        self.assertEqual(Blob.objects.get(name=first.derivatives['thumb']['webp']).ref_count, 2)
+
+    def test_progress_photo_and_profile_picture_share_bytes(self):
+        """Test that the same picture used in both places is stored once"""
+        photo = self.upload_photo(make_image())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('userprofile-upload-profile-picture'), {
+                'image': image_upload(name='me.jpg'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        picture = ProfilePicture.objects.get(user=self.user)
+        self.assertEqual(picture.image.name, photo.image.name)
+        self.assertEqual(Blob.objects.get(name=photo.image.name).ref_count, 2)
+
+    def test_file_removed_with_last_reference(self):
+        """Test that deleting keeps shared files and removes them with the last reference"""
+        first = self.upload_photo(make_image())
+        second = self.upload_photo(make_image())
+        name = first.image.name
+        thumb = first.derivatives['thumb']['jpeg']
+
+        self.delete_photo(first)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 1)
+
+        self.delete_photo(second)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(thumb))
+        self.assertFalse(Blob.objects.filter(name__in=[name, thumb]).exists())
+
+    def test_replacing_image_releases_previous_blobs(self):
+        """Test that a new image on update drops the old image and its derivatives"""
+        photo = self.upload_photo(make_image())
+        previous_image = photo.image.name
+        previous_thumb = photo.derivatives['thumb']['webp']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('progressphoto-detail', args=[photo.id]), {
+                'image': image_upload(name='new.jpg', color='purple'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        photo.refresh_from_db()
+        self.assertNotEqual(photo.image.name, previous_image)
+        self.assertFalse(default_storage.exists(previous_image))
+        self.assertFalse(default_storage.exists(previous_thumb))
+        self.assertTrue(default_storage.exists(photo.derivatives['thumb']['webp']))
+
+    def test_replacing_image_outside_the_api(self):
+        """Test that saving a row with another image, as the admin does, releases the old one"""
+        photo = self.upload_photo(make_image())
+        previous_image = photo.image.name
+
+        photo.image = image_upload(name='new.jpg', color='purple')
+        photo.save()
+        self.assertFalse(Blob.objects.filter(name=previous_image).exists())
+
+        # Saving the same bytes again takes a new reference and drops the old one
+        photo.image = image_upload(name='again.jpg', color='purple')
+        photo.save()
+        self.assertEqual(Blob.objects.get(name=photo.image.name).ref_count, 1)
+
+        # Saves that leave the image alone keep it
+        photo.notes = 'Edited'
+        photo.save()
+        ProgressPhoto.objects.get(pk=photo.pk).save()
+        self.assertEqual(Blob.objects.get(name=photo.image.name).ref_count, 1)
+
+    def test_failed_upload_keeps_no_reference(self):
+        """Test that the blob reference is rolled back with a photo that was not created"""
+        with mock.patch('health.views.schedule_derivatives', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.client.post(reverse('progressphoto-list'), {
+                'image': image_upload(),
+                'timestamp': '2024-01-01T00:00:00Z',
+            }, format='multipart')
+        self.assertFalse(ProgressPhoto.objects.exists())
+        self.assertFalse(Blob.objects.exists())
+
+    def test_saving_in_memory_content(self):
+        """Test that content not yet on disk is hashed while it is written and deduplicated"""
+        content = b'not really an image'
+        name = default_storage.save('notes/a.txt', ContentFile(content))
+        again = default_storage.save('other/b.txt', ContentFile(content))
+
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.txt')
+        self.assertEqual(again, name)
+        with default_storage.open(name) as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertEqual(Blob.objects.get(name=name).size, len(content))
+        # The spooled copy of the duplicate was discarded
+        self.assertEqual(os.listdir(default_storage.path('blobs/tmp')), [])
+
+    def test_prune_orphaned_blobs(self):
+        """Test that the command removes files no row references"""
+        # Rows of files saved by earlier tests were rolled back with them
+        shutil.rmtree(default_storage.path('blobs'), ignore_errors=True)
+        name = default_storage.save('a.txt', ContentFile(b'kept'))
+        orphan = default_storage.save('b.txt', ContentFile(b'rolled back'))
+        Blob.objects.filter(name=orphan).delete()
+
+        out = StringIO()
+        call_command('prune_blobs', '--min-age', '0', stdout=out)
+        self.assertIn('Successfully removed 1 orphaned blob files', out.getvalue())
+        self.assertTrue(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(orphan))
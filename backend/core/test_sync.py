@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+from core.models import Tombstone
+from core.sync import encode_cursor
+from health.models import WeightEntry
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+class SyncTest(TestCase):
+    """Test the delta sync endpoint and its tombstone log"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        self.now = datetime.now(timezone.utc)
+        self.bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        self.workout = WorkoutLog.objects.create(user=self.user1, date=self.now)
+        self.log = ExerciseLog.objects.create(workout=self.workout, exercise=self.bench, sets=3, reps=5, weight=80.0)
+        self.weight = WeightEntry.objects.create(user=self.user1, weight_kg=80.0, timestamp=self.now)
+        WeightEntry.objects.create(user=self.user2, weight_kg=90.0, timestamp=self.now)
+
+    def sync(self, since=None):
+        params = {'since': since} if since else {}
+        response = self.client.get(reverse('sync-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def ids(self, rows):
+        return [row['id'] for row in rows]
+
+    def test_full_sync(self):
+        """Test that a sync without cursor returns all of the user's rows"""
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual(self.ids(data['changed']['workouts']), [self.workout.id])
+        self.assertEqual(data['changed']['exercise_logs'][0]['exercise_name'], 'Bench Press')
+        self.assertEqual(self.ids(data['changed']['weight_entries']), [self.weight.id])
+        self.assertNotIn('exercise_logs', data['changed']['workouts'][0])
+
+    def test_incremental_sync_returns_changes_and_tombstones(self):
+        """Test that a cursor only returns rows changed and deleted after it"""
+        cursor = encode_cursor(datetime.now(timezone.utc))
+        data = self.sync(cursor)
+        self.assertFalse(data['full'])
+        self.assertEqual(data['changed']['weight_entries'], [])
+
+        self.client.patch(reverse('weightentry-detail', args=[self.weight.id]), {'weight_kg': 79.5}, format='json')
+        self.client.delete(reverse('workoutlog-detail', args=[self.workout.id]))
+
+        data = self.sync(cursor)
+        self.assertEqual(self.ids(data['changed']['weight_entries']), [self.weight.id])
+        self.assertEqual(data['changed']['workouts'], [])
+        self.assertEqual(data['deleted']['workouts'], [self.workout.id])
+        # Cascaded deletes are logged as well
+        self.assertEqual(data['deleted']['exercise_logs'], [self.log.id])
+
+        self.client.force_authenticate(user=self.user2)
+        self.assertEqual(self.sync(cursor)['deleted']['workouts'], [])
+
+    def test_nested_update_removals_are_tombstoned(self):
+        """Test that logs removed through a nested workout update leave tombstones"""
+        response = self.client.patch(reverse('workoutlog-detail', args=[self.workout.id]), {
+            'exercise_logs_data': [],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(Tombstone.objects.values_list('user_id', 'model', 'object_id')),
+            [(self.user1.id, 'exercise_logs', self.log.id)]
+        )
+
+    def test_expired_cursor_forces_full_sync(self):
+        """Test that cursors older than the retention window get a full resync"""
+        with self.settings(SYNC_TOMBSTONE_RETENTION_DAYS=30):
+            data = self.sync(encode_cursor(self.now - timedelta(days=31)))
+        self.assertTrue(data['full'])
+        self.assertEqual(self.ids(data['changed']['weight_entries']), [self.weight.id])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(reverse('sync-list'), {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_deletion_leaves_no_tombstones(self):
+        """Test that deleting a user does not log tombstones for its rows"""
+        self.user1.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_prune_command(self):
+        """Test that pruning only drops tombstones past the retention window"""
+        weight_id = self.weight.id
+        self.weight.delete()
+        old = self.now - timedelta(days=200)
+        with mock.patch('django.utils.timezone.now', return_value=old):
+            WeightEntry.objects.filter(user=self.user2).delete()
+
+        out = StringIO()
+        call_command('prune_tombstones', stdout=out)
+        self.assertIn('Successfully pruned 1 tombstones', out.getvalue())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [weight_id])
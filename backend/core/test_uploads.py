@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+from io import BytesIO
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from PIL import Image, PngImagePlugin
+from core.testing import GPS_INFO, ORIENTATION, make_exif, make_image
+from core.uploads import JPEGMetadataStripper, PNGMetadataStripper
+from health.models import ProgressPhoto
+from users.models import ProfilePicture
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class BoundedUploadTest(TestCase):
+    """Test that photo uploads are streamed, bounded and stripped of metadata"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, content, name='photo.jpg'):
+        return self.client.post(reverse('progressphoto-list'), {
+            'image': SimpleUploadedFile(name, content, content_type='image/jpeg'),
+            'timestamp': '2024-01-01T00:00:00Z',
+        }, format='multipart')
+
+    def test_jpeg_metadata_is_stripped(self):
+        """Test that only the orientation survives from the EXIF data"""
+        response = self.upload(make_image(orientation=6, comment=b'secret'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        photo = ProgressPhoto.objects.get(pk=response.data['id'])
+        with photo.image.open('rb'):
+            stored = photo.image.read()
+        image = Image.open(BytesIO(stored))
+        self.assertEqual(image.size, (300, 200))
+        exif = image.getexif()
+        self.assertEqual(exif.get(ORIENTATION), 6)
+        self.assertNotIn(0x010F, exif)
+        self.assertEqual(exif.get_ifd(GPS_INFO), {})
+        self.assertNotIn(b'secret', stored)
+        image.load()
+
+    def test_png_is_accepted(self):
+        """Test that non-JPEG images are stored unchanged"""
+        content = make_image(image_format='PNG')
+        response = self.upload(content, name='photo.png')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with ProgressPhoto.objects.get().image.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_png_metadata_is_stripped(self):
+        """Test that PNG text chunks are dropped and only the orientation survives from eXIf"""
+        text = PngImagePlugin.PngInfo()
+        text.add_text('Comment', 'secret')
+        response = self.upload(
+            make_image(image_format='PNG', exif=make_exif(orientation=6), pnginfo=text), name='photo.png'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with ProgressPhoto.objects.get().image.open('rb') as stored:
+            content = stored.read()
+        image = Image.open(BytesIO(content))
+        exif = image.getexif()
+        self.assertEqual(exif.get(ORIENTATION), 6)
+        self.assertNotIn(0x010F, exif)
+        self.assertEqual(exif.get_ifd(GPS_INFO), {})
+        self.assertNotIn(b'secret', content)
+        image.load()
+
+        # Chunk boundaries do not matter here either
+        original = make_image(image_format='PNG', exif=make_exif(orientation=6), pnginfo=text) + b'trailing'
+        stripper = PNGMetadataStripper()
+        bytewise = b''.join(stripper.feed(original[i:i + 1]) for i in range(len(original)))
+        self.assertEqual(bytewise, content)
+
+    def test_webp_metadata_is_blanked(self):
+        """Test that WebP EXIF and XMP chunks are blanked without changing the file size"""
+        original = make_image(image_format='WEBP', exif=make_exif(orientation=6), xmp=b'<x:xmpmeta>secret</x:xmpmeta>')
+        self.assertIn(b'Camera maker', original)
+        response = self.upload(original, name='photo.webp')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with ProgressPhoto.objects.get().image.open('rb') as stored:
+            content = stored.read()
+        self.assertEqual(len(content), len(original))
+        self.assertNotIn(b'Camera maker', content)
+        self.assertNotIn(b'secret', content)
+        image = Image.open(BytesIO(content))
+        self.assertEqual(dict(image.getexif()), {})
+        self.assertNotIn('xmp', image.info)
+        self.assertEqual(image.size, (300, 200))
+        image.load()
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_upload_is_rejected(self):
+        """Test that files over the size limit are rejected"""
+        response = self.upload(make_image(1000, 1000) + b'\0' * 4096)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ProgressPhoto.objects.exists())
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100 * 100)
+    def test_too_many_pixels_are_rejected(self):
+        """Test that the header probe rejects images with too many pixels"""
+        response = self.upload(make_image(200, 200))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('too large', str(response.data))
+
+    def test_non_images_are_rejected(self):
+        """Test that files that are not images are rejected on every upload path"""
+        response = self.upload(b'not an image at all', name='photo.jpg')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('userprofile-upload-profile-picture'), {
+            'image': SimpleUploadedFile('avatar.jpg', b'<html></html>', content_type='image/jpeg'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ProfilePicture.objects.exists())
+
+    def test_stripper_handles_any_chunking(self):
+        """Test that the stripped output does not depend on chunk boundaries"""
+        content = make_image(orientation=3, comment=b'secret') + b'trailing data'
+
+        whole = JPEGMetadataStripper().feed(content)
+        stripper = JPEGMetadataStripper()
+        bytewise = b''.join(stripper.feed(content[i:i + 1]) for i in range(len(content)))
+        self.assertEqual(bytewise, whole)
+        self.assertTrue(whole.endswith(b'\xff\xd9'))
+        self.assertEqual(Image.open(BytesIO(whole)).getexif().get(ORIENTATION), 3)
@@ -0,0 +1,38 @@
+"""
+Images built in memory for the upload, storage, derivative and media tests.
+"""
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+
+GPS_INFO = 0x8825
+ORIENTATION = 0x0112
+
+
+def make_exif(orientation=None):
+    """EXIF data naming a camera maker and a GPS position, with an optional orientation"""
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera maker'
+    if orientation:
+        exif[ORIENTATION] = orientation
+    exif.get_ifd(GPS_INFO)[2] = (59.0, 20.0, 0.0)
+    return exif
+
+
+def make_image(width=300, height=200, image_format='JPEG', color='blue', orientation=None, **options):
+    """
+    The bytes of a plain image. An ``orientation`` comes with the rest of
+    ``make_exif()``; other ``options`` are passed to ``Image.save()``.
+    """
+    if orientation:
+        options.setdefault('exif', make_exif(orientation))
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def image_upload(*args, name='photo.jpg', content_type='image/jpeg', **kwargs):
+    """``make_image()`` as an uploaded file"""
+    return SimpleUploadedFile(name, make_image(*args, **kwargs), content_type=content_type)
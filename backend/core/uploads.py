@@ -0,0 +1,422 @@
+"""
+Bounded, disk-streamed image uploads.
+
+``BoundedImageUploadHandler`` writes every uploaded file straight to a
+temporary file instead of memory, and in the same pass:
+
+* rejects bodies over ``IMAGE_UPLOAD_MAX_SIZE`` before reading them when the
+  Content-Length says so, and as soon as a file grows past it otherwise,
+* probes the image header from the first bytes and rejects unsupported
+  formats and images over ``IMAGE_UPLOAD_MAX_PIXELS`` (decompression bombs)
+  before the rest of the body is read,
+* strips metadata from JPEGs and PNGs, keeping only the EXIF orientation
+  and the ICC colour profile, and blanks the EXIF and XMP chunks of WebPs
+  (GIFs are stored as uploaded),
+* hashes the bytes it writes, for ``ContentAddressedStorage``.
+
+Files that passed the probe carry an ``image_probe`` attribute, which
+``ProbedImageField`` trusts instead of opening the image a second time, and
+a ``content_hash`` with the SHA-256 hex digest of the stored bytes.
+"""
+import hashlib
+import struct
+import zlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image
+from rest_framework import serializers
+
+
+ALLOWED_IMAGE_FORMATS = {'JPEG', 'MPO', 'PNG', 'WEBP', 'GIF'}
+
+# JPEG headers end within a few APPn segments of at most 64KB each
+PROBE_LIMIT = 1024 * 1024
+
+# Room for the multipart boundaries and form fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+EXIF_ORIENTATION = 0x0112
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class UploadRejected(MultiPartParserError):
+    pass
+
+
+class ImageProbe:
+    """Format and size of an uploaded image, read from its header"""
+
+    def __init__(self, image_format, width, height):
+        self.format = image_format
+        self.width = width
+        self.height = height
+
+    @property
+    def content_type(self):
+        return Image.MIME.get(self.format)
+
+
+def probe_image(head):
+    """Identify ``head`` without decoding pixels; ``None`` if the header is incomplete"""
+    try:
+        with Image.open(BytesIO(head)) as image:
+            return ImageProbe(image.format, image.width, image.height)
+    except Image.DecompressionBombError:
+        raise UploadRejected('Image dimensions are too large')
+    except Exception:
+        return None
+
+
+def orientation_exif(payload):
+    """``Exif``-prefixed EXIF data holding only the orientation of ``payload``, if it has one"""
+    try:
+        exif = Image.Exif()
+        exif.load(payload)
+        orientation = exif.get(EXIF_ORIENTATION)
+    except Exception:
+        return None
+    if not orientation or orientation == 1:
+        return None
+    minimal = Image.Exif()
+    minimal[EXIF_ORIENTATION] = orientation
+    return minimal.tobytes()
+
+
+def metadata_stripper(head):
+    """Streaming metadata filter for the image starting with ``head``, if its format has one"""
+    if head.startswith(b'\xff\xd8'):
+        return JPEGMetadataStripper()
+    if head.startswith(PNG_SIGNATURE):
+        return PNGMetadataStripper()
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return WebPMetadataStripper()
+    return None
+
+
+class JPEGMetadataStripper:
+    """
+    Streaming filter dropping JPEG metadata segments.
+
+    APP1 EXIF is rewritten to hold only the orientation, APP0 (JFIF), ICC
+    profiles in APP2 and APP14 (Adobe colour transform) are kept, and every
+    other APPn segment and comment is skipped. Everything from the first
+    scan on is copied, up to the end-of-image marker, which also drops
+    trailing data such as MPO secondary images.
+    """
+    KEEP_APP = {0xE0, 0xEE}
+
+    def __init__(self):
+        self.buffer = b''
+        self.state = 'soi'
+        self.skip = 0
+        self.copy = 0
+        self.previous_ff = False
+
+    def feed(self, data):
+        output = []
+        self.buffer += data
+        while self.buffer:
+            if self.skip:
+                taken = min(self.skip, len(self.buffer))
+                self.buffer = self.buffer[taken:]
+                self.skip -= taken
+            elif self.copy:
+                taken = min(self.copy, len(self.buffer))
+                output.append(self.buffer[:taken])
+                self.buffer = self.buffer[taken:]
+                self.copy -= taken
+            elif self.state == 'scan':
+                output.append(self._scan(self.buffer))
+                self.buffer = b''
+            elif self.state == 'done':
+                self.buffer = b''
+            elif self.state == 'soi':
+                if len(self.buffer) < 2:
+                    break
+                if self.buffer[:2] != b'\xff\xd8':
+                    raise UploadRejected('Invalid JPEG file')
+                output.append(self.buffer[:2])
+                self.buffer = self.buffer[2:]
+                self.state = 'marker'
+            elif not self._segment(output):
+                break
+        return b''.join(output)
+
+    def _segment(self, output):
+        """Handle the segment at the start of the buffer; False if more data is needed"""
+        # Markers may be preceded by any number of 0xFF fill bytes
+        stripped = self.buffer.lstrip(b'\xff')
+        if len(stripped) != len(self.buffer):
+            self.buffer = b'\xff' + stripped
+        if len(self.buffer) < 4:
+            return False
+        if self.buffer[0] != 0xFF:
+            raise UploadRejected('Invalid JPEG file')
+
+        marker = self.buffer[1]
+        length = struct.unpack('>H', self.buffer[2:4])[0]
+        if length < 2:
+            raise UploadRejected('Invalid JPEG file')
+
+        if marker == 0xDA:
+            output.append(self.buffer[:4])
+            self.buffer = self.buffer[4:]
+            self.copy = length - 2
+            self.state = 'scan'
+        elif marker == 0xE1:
+            # EXIF segments are small enough to rewrite as a whole
+            if len(self.buffer) < length + 2:
+                return False
+            segment = self._rewrite_exif(self.buffer[4:length + 2])
+            if segment:
+                output.append(b'\xff\xe1' + struct.pack('>H', len(segment) + 2) + segment)
+            self.buffer = self.buffer[length + 2:]
+        elif marker == 0xE2:
+            if len(self.buffer) < 16:
+                return False
+            if self.buffer[4:16] == b'ICC_PROFILE\x00':
+                output.append(self.buffer[:4])
+                self.copy = length - 2
+            else:
+                self.skip = length - 2
+            self.buffer = self.buffer[4:]
+        elif marker == 0xFE or (0xE0 <= marker <= 0xEF and marker not in self.KEEP_APP):
+            self.buffer = self.buffer[4:]
+            self.skip = length - 2
+        else:
+            output.append(self.buffer[:4])
+            self.buffer = self.buffer[4:]
+            self.copy = length - 2
+        return True
+
+    def _rewrite_exif(self, payload):
+        # APP1 also holds XMP, which is dropped along with everything else
+        if not payload.startswith(b'Exif\x00\x00'):
+            return None
+        return orientation_exif(payload)
+
+    def _scan(self, data):
+        # 0xFF bytes inside entropy-coded data are stuffed, so the first
+        # FF D9 is the end of the primary image
+        if self.previous_ff and data.startswith(b'\xd9'):
+            self.state = 'done'
+            return data[:1]
+        index = data.find(b'\xff\xd9')
+        if index != -1:
+            self.state = 'done'
+            return data[:index + 2]
+        self.previous_ff = data.endswith(b'\xff')
+        return data
+
+
+class PNGMetadataStripper:
+    """
+    Streaming filter dropping PNG metadata chunks.
+
+    Text chunks (tEXt, zTXt, iTXt) and tIME are skipped and eXIf is
+    rewritten to hold only the orientation; iCCP and every chunk needed to
+    decode the image are copied. Trailing data after IEND is dropped.
+    """
+    DROP = {b'tEXt', b'zTXt', b'iTXt', b'tIME'}
+
+    def __init__(self):
+        self.buffer = b''
+        self.state = 'signature'
+        self.skip = 0
+        self.copy = 0
+
+    def feed(self, data):
+        output = []
+        self.buffer += data
+        while self.buffer:
+            if self.skip:
+                taken = min(self.skip, len(self.buffer))
+                self.buffer = self.buffer[taken:]
+                self.skip -= taken
+            elif self.copy:
+                taken = min(self.copy, len(self.buffer))
+                output.append(self.buffer[:taken])
+                self.buffer = self.buffer[taken:]
+                self.copy -= taken
+            elif self.state == 'done':
+                self.buffer = b''
+            elif self.state == 'signature':
+                if len(self.buffer) < len(PNG_SIGNATURE):
+                    break
+                if not self.buffer.startswith(PNG_SIGNATURE):
+                    raise UploadRejected('Invalid PNG file')
+                output.append(PNG_SIGNATURE)
+                self.buffer = self.buffer[len(PNG_SIGNATURE):]
+                self.state = 'chunk'
+            elif not self._chunk(output):
+                break
+        return b''.join(output)
+
+    def _chunk(self, output):
+        """Handle the chunk at the start of the buffer; False if more data is needed"""
+        if len(self.buffer) < 8:
+            return False
+        length, chunk_type = struct.unpack('>I4s', self.buffer[:8])
+        # Length and type, the data, then the CRC
+        size = length + 12
+
+        if chunk_type == b'eXIf':
+            if len(self.buffer) < size:
+                return False
+            exif = orientation_exif(self.buffer[8:8 + length])
+            if exif:
+                # PNG stores the TIFF data without the Exif prefix
+                exif = exif[6:]
+                output.append(
+                    struct.pack('>I', len(exif)) + b'eXIf' + exif
+                    + struct.pack('>I', zlib.crc32(b'eXIf' + exif))
+                )
+            self.buffer = self.buffer[size:]
+        elif chunk_type in self.DROP:
+            self.skip = size
+        else:
+            self.copy = size
+            if chunk_type == b'IEND':
+                self.state = 'done'
+        return True
+
+
+class WebPMetadataStripper:
+    """
+    Streaming filter blanking WebP metadata chunks.
+
+    EXIF and XMP come after the image data, by which time the RIFF header
+    with the file size has been written, so instead of being dropped they
+    become zero-filled ``JUNK`` chunks of the same size, which decoders
+    skip. Their flags are cleared in the VP8X header.
+    """
+    METADATA = {b'EXIF', b'XMP '}
+    # VP8X flag bits of the EXIF and XMP chunks
+    METADATA_FLAGS = 0x08 | 0x04
+
+    def __init__(self):
+        self.buffer = b''
+        self.state = 'header'
+        self.blank = 0
+        self.copy = 0
+
+    def feed(self, data):
+        output = []
+        self.buffer += data
+        while self.buffer:
+            if self.blank:
+                taken = min(self.blank, len(self.buffer))
+                output.append(bytes(taken))
+                self.buffer = self.buffer[taken:]
+                self.blank -= taken
+            elif self.copy:
+                taken = min(self.copy, len(self.buffer))
+                output.append(self.buffer[:taken])
+                self.buffer = self.buffer[taken:]
+                self.copy -= taken
+            elif self.state == 'header':
+                if len(self.buffer) < 12:
+                    break
+                if self.buffer[:4] != b'RIFF' or self.buffer[8:12] != b'WEBP':
+                    raise UploadRejected('Invalid WebP file')
+                output.append(self.buffer[:12])
+                self.buffer = self.buffer[12:]
+                self.state = 'chunk'
+            elif not self._chunk(output):
+                break
+        return b''.join(output)
+
+    def _chunk(self, output):
+        """Handle the chunk at the start of the buffer; False if more data is needed"""
+        if len(self.buffer) < 8:
+            return False
+        fourcc, length = struct.unpack('<4sI', self.buffer[:8])
+        # Chunk data is padded to an even size
+        padded = length + (length & 1)
+
+        if fourcc == b'VP8X':
+            if len(self.buffer) < 8 + padded:
+                return False
+            flags = self.buffer[8] & ~self.METADATA_FLAGS
+            output.append(self.buffer[:8] + bytes([flags]) + self.buffer[9:8 + padded])
+            self.buffer = self.buffer[8 + padded:]
+        elif fourcc in self.METADATA:
+            output.append(b'JUNK' + self.buffer[4:8])
+            self.buffer = self.buffer[8:]
+            self.blank = padded
+        else:
+            output.append(self.buffer[:8])
+            self.buffer = self.buffer[8:]
+            self.copy = padded
+        return True
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Streams uploads to disk with early size, format and dimension checks"""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > settings.IMAGE_UPLOAD_MAX_SIZE + MULTIPART_OVERHEAD:
+            raise UploadRejected(self.too_large_message())
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.written = 0
+        self.head = b''
+        self.probe = None
+        self.stripper = None
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise UploadRejected(self.too_large_message())
+
+        if self.probe is None:
+            self.head += raw_data
+            if self.stripper is None and not self.written:
+                self.stripper = metadata_stripper(self.head)
+            self.probe = probe_image(self.head)
+            if self.probe is not None:
+                self.check_probe()
+                self.head = b''
+            elif len(self.head) > PROBE_LIMIT:
+                raise UploadRejected('Uploaded file is not a supported image')
+
+        if self.stripper is not None:
+            raw_data = self.stripper.feed(raw_data)
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        self.written += len(raw_data)
+
+    def file_complete(self, file_size):
+        if self.probe is None:
+            raise UploadRejected('Uploaded file is not a supported image')
+        self.file.seek(0)
+        self.file.size = self.written
+        self.file.image_probe = self.probe
+        self.file.content_hash = self.digest.hexdigest()
+        self.file.content_type = self.probe.content_type or self.file.content_type
+        return self.file
+
+    def check_probe(self):
+        if self.probe.format not in ALLOWED_IMAGE_FORMATS:
+            raise UploadRejected('Uploaded file is not a supported image')
+        if self.probe.width * self.probe.height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            raise UploadRejected('Image dimensions are too large')
+
+    def too_large_message(self):
+        return f'Uploaded file exceeds {settings.IMAGE_UPLOAD_MAX_SIZE // (1024 * 1024)}MB'
+
+
+class ProbedImageField(serializers.ImageField):
+    """Image field trusting the upload handler's header probe instead of reopening the file"""
+
+    def to_internal_value(self, data):
+        if getattr(data, 'image_probe', None) is None:
+            return super().to_internal_value(data)
+        return serializers.FileField.to_internal_value(self, data)
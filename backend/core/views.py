@@ -0,0 +1,36 @@
+from rest_framework import viewsets, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .cache import cache_stats
+from .profiling import ServerTimingMixin
+from .sync import InvalidCursor, changes_since, decode_cursor
+
+
+class SyncViewSet(ServerTimingMixin, viewsets.ViewSet):
+    """
+    Delta sync of the current user's workouts, exercise logs and health data.
+
+    ``GET /api/sync/`` returns everything along with a ``cursor``; passing it
+    back as ``?since=<cursor>`` returns only the rows changed and the ids
+    deleted since then.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def list(self, request):
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_cursor(since)
+            except InvalidCursor:
+                raise ValidationError({'since': ['Invalid cursor']})
+        
+        return Response(changes_since(request.user, since or None, context={'request': request}))
+
+
+class ResponseCacheStatsViewSet(ServerTimingMixin, viewsets.ViewSet):
+    """Hit and miss counters of the per-user response cache, for staff"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def list(self, request):
+        return Response(cache_stats())
@@ -0,0 +1,43 @@
+"""
+Gunicorn settings shared by the Docker image and the compose files.
+
+``SERVER_MODE=wsgi`` (the default) runs sync workers, each serving one
+connection at a time, so a client trickling its request in holds a whole
+worker. ``SERVER_MODE=asgi`` runs uvicorn workers, which multiplex
+connections on an event loop; Django then answers the list and retrieve
+endpoints from async views (see ``core.async_views``).
+
+Workers write their Prometheus metrics to ``PROMETHEUS_MULTIPROC_DIR`` so
+``/metrics`` can sum them up (see ``core.metrics``).
+"""
+import glob
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+if server_mode == 'asgi':
+    wsgi_app = 'workout_backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'workout_backend.wsgi:application'
+
+# Read by prometheus_client when the workers import it
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/fit-forty-metrics')
+
+
+def on_starting(server):
+    # Counters left by a previous master would be added to the new ones
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    # Drop the dead worker's in-flight gauge; its counters are kept
+    multiprocess.mark_process_dead(worker.pid)
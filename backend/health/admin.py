@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WeightEntry, BloodPressureReading, ProgressPhoto
+from .models import WeightEntry, BloodPressureReading, ProgressPhoto, HealthRollup
 
 
 @admin.register(WeightEntry)
@@ -26,4 +26,11 @@ class ProgressPhotoAdmin(admin.ModelAdmin):
     def image_preview(self, obj):
         return obj.image.url if obj.image else 'No Image'
     
-    image_preview.short_description = 'Image Preview'
\ No newline at end of file
+    image_preview.short_description = 'Image Preview'
+
+
+@admin.register(HealthRollup)
+class HealthRollupAdmin(admin.ModelAdmin):
+    list_display = ('user', 'metric', 'period', 'period_start', 'count', 'mean_value')
+    list_filter = ('metric', 'period', 'user')
+    search_fields = ('user__username',)
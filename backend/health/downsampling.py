@@ -0,0 +1,106 @@
+"""
+Downsampling of time series for charting.
+
+Both helpers take points sorted by time, where ``t`` is a POSIX timestamp in
+seconds, and return compact column arrays rather than one dict per point.
+"""
+
+
+def lttb(ts, ys, threshold):
+    """
+    Return the indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves peaks and the visual shape.
+    """
+    n = len(ts)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    kept = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_t = sum(ts[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        bucket_start = int(i * every) + 1
+        bucket_end = int((i + 1) * every) + 1
+        best_area = -1.0
+        best = bucket_start
+        for j in range(bucket_start, bucket_end):
+            area = abs(
+                (ts[a] - avg_t) * (ys[j] - ys[a])
+                - (ts[a] - ts[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best_area = area
+                best = j
+
+        kept.append(best)
+        a = best
+
+    kept.append(n - 1)
+    return kept
+
+
+def bucket_aggregate(rows, columns, start, end, bucket_count):
+    """
+    Aggregate ``(t, value, ...)`` rows into fixed-width time buckets.
+
+    ``rows`` is any iterable sorted by ``t`` and is consumed in a single pass,
+    so it can be a streaming database cursor. Empty buckets are omitted.
+    Returns ``t`` (bucket start), ``n`` (rows per bucket) and a
+    ``{'min', 'avg', 'max'}`` column triple per value column.
+    """
+    width = max((end - start) / bucket_count, 1e-9)
+    result = {'t': [], 'n': []}
+    for column in columns:
+        result[column] = {'min': [], 'avg': [], 'max': []}
+
+    current = None
+    count = 0
+    mins = maxs = sums = counts = None
+
+    def flush():
+        result['t'].append(start + current * width)
+        result['n'].append(count)
+        for k, column in enumerate(columns):
+            result[column]['min'].append(mins[k])
+            result[column]['avg'].append(sums[k] / counts[k] if counts[k] else None)
+            result[column]['max'].append(maxs[k])
+
+    for t, *values in rows:
+        bucket = min(int((t - start) / width), bucket_count - 1)
+        if bucket != current:
+            if current is not None:
+                flush()
+            current = bucket
+            count = 0
+            mins = [None] * len(columns)
+            maxs = [None] * len(columns)
+            sums = [0.0] * len(columns)
+            counts = [0] * len(columns)
+
+        count += 1
+        for k, value in enumerate(values):
+            # Optional columns such as pulse may be missing on some rows
+            if value is None:
+                continue
+            if mins[k] is None or value < mins[k]:
+                mins[k] = value
+            if maxs[k] is None or value > maxs[k]:
+                maxs[k] = value
+            sums[k] += value
+            counts[k] += 1
+
+    if current is not None:
+        flush()
+
+    return result
@@ -0,0 +1,75 @@
+"""
+Bulk ingest of health readings from a stream of parsed records.
+
+Records are validated with the regular model serializer in chunks and each
+valid chunk is written with one ``bulk_create`` in its own transaction, so
+a bad row only costs its own entry in the error report.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .rollups import ROLLUP_METRICS, period_starts, refresh_buckets
+
+
+INGEST_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+def ingest(records, serializer_class, user):
+    """
+    Validate and insert ``(row_number, record, error)`` tuples for ``user``.
+
+    Returns a summary with the number of created and failed rows and up to
+    ``MAX_REPORTED_ERRORS`` per-row errors.
+    """
+    model = serializer_class.Meta.model
+    max_rows = settings.HEALTH_INGEST_MAX_ROWS
+    records = iter(records)
+
+    created = 0
+    failed = 0
+    errors = []
+    touched_weeks = {}
+    read = 0
+
+    while read < max_rows:
+        chunk = list(islice(records, min(INGEST_CHUNK_SIZE, max_rows - read)))
+        if not chunk:
+            break
+        read += len(chunk)
+
+        instances = []
+        for row_number, record, error in chunk:
+            if error is None:
+                serializer = serializer_class(data=record)
+                if serializer.is_valid():
+                    instances.append(model(user=user, **serializer.validated_data))
+                    continue
+                error = serializer.errors
+
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': row_number, 'errors': error})
+
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+        created += len(instances)
+
+        for instance in instances:
+            touched_weeks.setdefault(period_starts(instance.timestamp)['week'], instance.timestamp)
+
+    # Anything left unread means the body exceeded the row limit
+    truncated = next(records, None) is not None
+
+    if model in ROLLUP_METRICS and touched_weeks:
+        refresh_buckets(model, user.id, touched_weeks.values())
+
+    return {
+        'created': created,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+        'truncated': truncated,
+    }
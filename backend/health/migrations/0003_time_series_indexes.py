@@ -0,0 +1,27 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0002_progressphoto_body_part_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bloodpressurereading',
+            index=models.Index(fields=['user', '-timestamp'], name='bpreading_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progressphoto',
+            index=models.Index(fields=['user', '-timestamp'], name='progressphoto_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weightentry',
+            index=models.Index(fields=['user', '-timestamp'], name='weightentry_user_ts_idx'),
+        ),
+    ]
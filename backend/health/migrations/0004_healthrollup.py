@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0003_time_series_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HealthRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('weight_kg', 'Weight (kg)'), ('systolic', 'Systolic'), ('diastolic', 'Diastolic'), ('pulse', 'Pulse')], max_length=20)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('period_start', models.DateField(help_text='First day of the day or week (Monday)')),
+                ('count', models.PositiveIntegerField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('mean_value', models.FloatField()),
+                ('last_value', models.FloatField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='health_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='healthrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'metric', 'period', 'period_start'), name='unique_health_rollup'),
+        ),
+    ]
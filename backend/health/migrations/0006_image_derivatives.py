@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0005_sync_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progressphoto',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized renditions by size name'),
+        ),
+    ]
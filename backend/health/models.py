@@ -16,6 +16,10 @@ class WeightEntry(models.Model):
     class Meta:
         ordering = ['-timestamp']
         verbose_name_plural = "Weight Entries"
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='weightentry_user_ts_idx'),
+            models.Index(fields=['user', 'updated_at'], name='weightentry_user_upd_idx'),
+        ]
 
 
 class BloodPressureReading(models.Model):
@@ -33,6 +37,10 @@ class BloodPressureReading(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='bpreading_user_ts_idx'),
+            models.Index(fields=['user', 'updated_at'], name='bpreading_user_upd_idx'),
+        ]
 
 
 class ProgressPhoto(models.Model):
@@ -50,6 +58,7 @@ class ProgressPhoto(models.Model):
     timestamp = models.DateTimeField()
     notes = models.TextField(blank=True)
     body_part_tags = models.JSONField(default=list, help_text="List of body part tags")
+    derivatives = models.JSONField(default=dict, blank=True, help_text="Resized renditions by size name")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -57,4 +66,44 @@ class ProgressPhoto(models.Model):
         return f"{self.user.username}'s Photo on {self.timestamp.strftime('%Y-%m-%d')}"
     
     class Meta:
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='progressphoto_user_ts_idx'),
+            models.Index(fields=['user', 'updated_at'], name='progressphoto_user_upd_idx'),
+        ]
+
+class HealthRollup(models.Model):
+    """Per-user daily and weekly summary of one health metric"""
+    METRIC_CHOICES = [
+        ('weight_kg', 'Weight (kg)'),
+        ('systolic', 'Systolic'),
+        ('diastolic', 'Diastolic'),
+        ('pulse', 'Pulse'),
+    ]
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='health_rollups')
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text="First day of the day or week (Monday)")
+    count = models.PositiveIntegerField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    mean_value = models.FloatField()
+    last_value = models.FloatField()
+    last_timestamp = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.metric} {self.period} of {self.period_start}"
+    
+    class Meta:
+        ordering = ['period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'metric', 'period', 'period_start'], name='unique_health_rollup'
+            ),
+        ]
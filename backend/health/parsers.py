@@ -0,0 +1,94 @@
+import csv
+import json
+
+from rest_framework.parsers import BaseParser
+
+
+class StreamingRecordParser(BaseParser):
+    """
+    Base class for parsers that hand the view a lazy iterator of
+    ``(row_number, record, error)`` tuples instead of a parsed body.
+
+    Nothing is read from the request until the view iterates, so request
+    bodies of any size are consumed line by line. Each line is decoded on
+    its own and ``iter_records`` gets ``None`` for lines that are not valid
+    text, to report as row errors.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        if stream is None:
+            return iter(())
+        return self.iter_records(self.decode_lines(stream, encoding), encoding)
+
+    def decode_lines(self, stream, encoding):
+        for line in stream:
+            try:
+                yield line.decode(encoding)
+            except UnicodeDecodeError:
+                yield None
+
+    def iter_records(self, lines, encoding):
+        raise NotImplementedError('.iter_records() must be overridden.')
+
+
+def decode_error(encoding):
+    return {'non_field_errors': [f'Invalid {encoding} text']}
+
+
+class NDJSONStreamParser(StreamingRecordParser):
+    """One JSON object per line"""
+    media_type = 'application/x-ndjson'
+
+    def iter_records(self, lines, encoding):
+        for row_number, line in enumerate(lines, start=1):
+            if line is None:
+                yield row_number, None, decode_error(encoding)
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield row_number, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, {'non_field_errors': ['Expected a JSON object']}
+                continue
+            yield row_number, record, None
+
+
+class CSVStreamParser(StreamingRecordParser):
+    """CSV with a header row naming the fields; empty cells are treated as omitted"""
+    media_type = 'text/csv'
+
+    def iter_records(self, lines, encoding):
+        undecodable = []
+
+        def text_lines():
+            # The reader skips the blank line standing in for an undecodable one
+            for line_number, line in enumerate(lines, start=1):
+                if line is None:
+                    undecodable.append(line_number)
+                    line = '\n'
+                yield line
+
+        def decode_errors():
+            while undecodable:
+                yield undecodable.pop(0), None, decode_error(encoding)
+
+        reader = csv.DictReader(text_lines())
+        try:
+            for record in reader:
+                yield from decode_errors()
+                # line_num is the last physical line read, counting the header
+                yield reader.line_num, {
+                    key: value for key, value in record.items()
+                    if key is not None and value not in ('', None)
+                }, None
+        except csv.Error as exc:
+            yield from decode_errors()
+            yield reader.line_num, None, {'non_field_errors': [f'Invalid CSV: {exc}']}
+        yield from decode_errors()
@@ -0,0 +1,200 @@
+"""
+Daily and weekly rollups of weight and blood pressure readings.
+
+Creating a reading folds it into its day and week rows in place. Updates and
+deletes cannot be folded out of a min/max, so they recompute the affected
+weeks (and the days inside them) from the raw readings instead. ``rebuild``
+recomputes everything in one streaming pass.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import WeightEntry, BloodPressureReading, HealthRollup
+
+
+ROLLUP_METRICS = {
+    WeightEntry: ['weight_kg'],
+    BloodPressureReading: ['systolic', 'diastolic', 'pulse'],
+}
+
+
+def period_starts(timestamp):
+    """Return the first day of the day and week (Monday) containing ``timestamp``"""
+    day = timezone.localtime(timestamp).date()
+    return {'day': day, 'week': day - timedelta(days=day.weekday())}
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class _Accumulator:
+    """Running statistics of one rollup bucket"""
+
+    def __init__(self):
+        self.count = 0
+        self.min_value = None
+        self.max_value = None
+        self.total = 0.0
+        self.last_value = None
+        self.last_timestamp = None
+
+    def add(self, value, timestamp):
+        self.count += 1
+        self.total += value
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if self.max_value is None or value > self.max_value:
+            self.max_value = value
+        if self.last_timestamp is None or timestamp >= self.last_timestamp:
+            self.last_value = value
+            self.last_timestamp = timestamp
+
+    def to_rollup(self, user_id, metric, period, period_start):
+        return HealthRollup(
+            user_id=user_id,
+            metric=metric,
+            period=period,
+            period_start=period_start,
+            count=self.count,
+            min_value=self.min_value,
+            max_value=self.max_value,
+            mean_value=self.total / self.count,
+            last_value=self.last_value,
+            last_timestamp=self.last_timestamp,
+        )
+
+
+def _accumulate(user_id, metrics, rows):
+    """Build unsaved rollups from ``(timestamp, *values)`` rows of one user"""
+    buckets = {}
+    for timestamp, *values in rows:
+        for period, period_start in period_starts(timestamp).items():
+            for metric, value in zip(metrics, values):
+                if value is None:
+                    continue
+                key = (metric, period, period_start)
+                if key not in buckets:
+                    buckets[key] = _Accumulator()
+                buckets[key].add(value, timestamp)
+
+    return [
+        accumulator.to_rollup(user_id, metric, period, period_start)
+        for (metric, period, period_start), accumulator in buckets.items()
+    ]
+
+
+def add_reading(reading):
+    """Fold a newly created reading into its day and week rollups"""
+    metrics = ROLLUP_METRICS[type(reading)]
+    values = {metric: getattr(reading, metric) for metric in metrics}
+    values = {metric: value for metric, value in values.items() if value is not None}
+    starts = period_starts(reading.timestamp)
+
+    try:
+        with transaction.atomic():
+            existing = {
+                (rollup.metric, rollup.period): rollup
+                for rollup in HealthRollup.objects.select_for_update().filter(
+                    Q(period='day', period_start=starts['day']) | Q(period='week', period_start=starts['week']),
+                    user_id=reading.user_id,
+                    metric__in=values,
+                )
+            }
+
+            to_create = []
+            to_update = []
+            now = timezone.now()
+            for metric, value in values.items():
+                for period, period_start in starts.items():
+                    rollup = existing.get((metric, period))
+                    if rollup is None:
+                        accumulator = _Accumulator()
+                        accumulator.add(value, reading.timestamp)
+                        to_create.append(accumulator.to_rollup(reading.user_id, metric, period, period_start))
+                        continue
+
+                    rollup.mean_value += (value - rollup.mean_value) / (rollup.count + 1)
+                    rollup.count += 1
+                    rollup.min_value = min(rollup.min_value, value)
+                    rollup.max_value = max(rollup.max_value, value)
+                    if reading.timestamp >= rollup.last_timestamp:
+                        rollup.last_value = value
+                        rollup.last_timestamp = reading.timestamp
+                    rollup.updated_at = now
+                    to_update.append(rollup)
+
+            if to_update:
+                HealthRollup.objects.bulk_update(to_update, [
+                    'count', 'min_value', 'max_value', 'mean_value', 'last_value', 'last_timestamp', 'updated_at'
+                ])
+            if to_create:
+                HealthRollup.objects.bulk_create(to_create)
+    except IntegrityError:
+        # A concurrent write created the same bucket first; recompute it instead
+        refresh_buckets(type(reading), reading.user_id, [reading.timestamp])
+
+
+def refresh_buckets(model, user_id, timestamps):
+    """Recompute the weeks containing ``timestamps``, and their days, from raw readings"""
+    metrics = ROLLUP_METRICS[model]
+    weeks = {period_starts(timestamp)['week'] for timestamp in timestamps if timestamp}
+
+    with transaction.atomic():
+        for week in weeks:
+            next_week = week + timedelta(days=7)
+            rows = model.objects.filter(
+                user_id=user_id,
+                timestamp__gte=_start_of(week),
+                timestamp__lt=_start_of(next_week),
+            ).order_by('timestamp', 'id').values_list('timestamp', *metrics)
+
+            HealthRollup.objects.filter(
+                Q(period='week', period_start=week)
+                | Q(period='day', period_start__gte=week, period_start__lt=next_week),
+                user_id=user_id,
+                metric__in=metrics,
+            ).delete()
+            HealthRollup.objects.bulk_create(_accumulate(user_id, metrics, rows))
+
+
+def rebuild(user=None):
+    """Recompute all rollups, optionally for a single user; returns the rows written"""
+    written = 0
+    with transaction.atomic():
+        rollups = HealthRollup.objects.all()
+        if user is not None:
+            rollups = rollups.filter(user=user)
+        rollups.delete()
+
+        for model, metrics in ROLLUP_METRICS.items():
+            readings = model.objects.all()
+            if user is not None:
+                readings = readings.filter(user=user)
+            rows = readings.order_by('user_id', 'timestamp', 'id').values_list(
+                'user_id', 'timestamp', *metrics
+            ).iterator(chunk_size=2000)
+
+            # Rows arrive grouped by user, so only one user's buckets are held at a time
+            current_user = None
+            user_rows = []
+            for user_id, *row in rows:
+                if user_id != current_user:
+                    written += _write(current_user, metrics, user_rows)
+                    current_user = user_id
+                    user_rows = []
+                user_rows.append(row)
+            written += _write(current_user, metrics, user_rows)
+
+    return written
+
+
+def _write(user_id, metrics, rows):
+    if not rows:
+        return 0
+    rollups = _accumulate(user_id, metrics, rows)
+    HealthRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
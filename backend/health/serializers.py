@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import WeightEntry, BloodPressureReading, ProgressPhoto
+from core.media import ProtectedImageField, derivative_urls, protected_media_url
+from .models import WeightEntry, BloodPressureReading, ProgressPhoto, HealthRollup
 
 
 class WeightEntrySerializer(serializers.ModelSerializer):
@@ -17,20 +18,49 @@ class BloodPressureReadingSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
 
 
+class SeriesQuerySerializer(serializers.Serializer):
+    """Query parameters of the downsampled ``series`` actions"""
+    METHOD_CHOICES = [('buckets', 'Bucketed min/avg/max'), ('lttb', 'Largest-Triangle-Three-Buckets')]
+    
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    points = serializers.IntegerField(min_value=3, max_value=2000, default=500)
+    method = serializers.ChoiceField(choices=METHOD_CHOICES, default='buckets')
+    
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError("start must be before end")
+        return data
+
+
+class RollupQuerySerializer(serializers.Serializer):
+    """Query parameters of the ``rollups`` actions"""
+    period = serializers.ChoiceField(choices=HealthRollup.PERIOD_CHOICES, default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+
 class ProgressPhotoSerializer(serializers.ModelSerializer):
+    image = ProtectedImageField()
     image_url = serializers.SerializerMethodField()
+    image_urls = serializers.SerializerMethodField()
     
     class Meta:
         model = ProgressPhoto
-        fields = ['id', 'user', 'image', 'image_url', 'timestamp', 'notes', 'body_part_tags', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'image', 'image_url', 'image_urls', 'timestamp', 'notes', 'body_part_tags',
+                  'created_at', 'updated_at']
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
     
     def get_image_url(self, obj):
         request = self.context.get('request')
         if obj.image and request:
-            return request.build_absolute_uri(obj.image.url)
+            return protected_media_url(obj, obj.image.name, request=request)
         return None
     
+    def get_image_urls(self, obj):
+        # Empty until the derivatives have been rendered
+        return derivative_urls(obj.image, obj.derivatives, self.context.get('request'))
+    
     def validate_body_part_tags(self, value):
         """Validate that body_part_tags contains valid choices"""
         valid_choices = [choice[0] for choice in ProgressPhoto.BODY_PART_CHOICES]
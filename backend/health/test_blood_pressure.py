@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -41,6 +42,7 @@ class BloodPressureReadingAPITest(TestCase):
     """Test the BloodPressureReading API endpoints"""
     
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         
         # Clear all existing BP readings to ensure a clean test environment
@@ -0,0 +1,129 @@
+import json
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import date, datetime, timedelta, timezone
+from health.models import WeightEntry, BloodPressureReading, HealthRollup
+
+
+class BulkIngestTest(TestCase):
+    """Test the NDJSON and CSV bulk ingest endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.weight_url = reverse('weightentry-bulk')
+        self.bp_url = reverse('bloodpressurereading-bulk')
+        self.start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def ndjson(self, records):
+        return '\n'.join(
+            record if isinstance(record, str) else json.dumps(record)
+            for record in records
+        ).encode('utf-8')
+
+    def test_ndjson_weight_ingest(self):
+        """Test that thousands of NDJSON rows are inserted for the current user"""
+        body = self.ndjson(
+            {'weight_kg': 80 + i % 5, 'timestamp': (self.start + timedelta(hours=i)).isoformat()}
+            for i in range(1200)
+        )
+        response = self.client.post(self.weight_url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 1200)
+        self.assertEqual(response.data['failed'], 0)
+        self.assertEqual(WeightEntry.objects.filter(user=self.user).count(), 1200)
+        # Rollups of the touched weeks are brought up to date
+        self.assertEqual(
+            HealthRollup.objects.get(metric='weight_kg', period='day', period_start=date(2024, 1, 1)).count, 24
+        )
+
+    def test_ndjson_reports_row_errors(self):
+        """Test that invalid rows are reported by line while valid rows are kept"""
+        body = self.ndjson([
+            {'weight_kg': 80, 'timestamp': self.start.isoformat()},
+            '{not json',
+            {'weight_kg': 'heavy', 'timestamp': self.start.isoformat()},
+            '',
+            {'weight_kg': 81, 'timestamp': self.start.isoformat(), 'user': 999},
+        ])
+        response = self.client.post(self.weight_url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertIn('weight_kg', response.data['errors'][1]['errors'])
+        # Read-only fields such as user cannot be injected
+        self.assertEqual(WeightEntry.objects.filter(user=self.user).count(), 2)
+
+    def test_csv_bp_ingest(self):
+        """Test CSV ingest with optional empty cells"""
+        body = (
+            'systolic,diastolic,pulse,timestamp\n'
+            f'120,80,65,{self.start.isoformat()}\n'
+            f'125,82,,{self.start.isoformat()}\n'
+            f'abc,82,,{self.start.isoformat()}\n'
+        ).encode('utf-8')
+        response = self.client.post(self.bp_url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'][0]['row'], 4)
+        self.assertEqual(
+            sorted(BloodPressureReading.objects.values_list('pulse', flat=True), key=str), [65, None]
+        )
+
+    def test_invalid_utf8_rows(self):
+        """Test that lines that are not UTF-8 are reported as row errors in both formats"""
+        timestamp = self.start.isoformat().encode()
+        body = (
+            b'{"weight_kg": 80, "timestamp": "' + timestamp + b'"}\n'
+            b'{"weight_kg": 81, "notes": "caf\xe9"}\n'
+            b'{"weight_kg": 82, "timestamp": "' + timestamp + b'"}\n'
+        )
+        response = self.client.post(self.weight_url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'], [{'row': 2, 'errors': {'non_field_errors': ['Invalid utf-8 text']}}])
+
+        body = (
+            b'systolic,diastolic,timestamp\n'
+            b'120,80,' + timestamp + b'\n'
+            b'\xff\xfe,80,' + timestamp + b'\n'
+            b'125,82,' + timestamp + b'\n'
+            b'130,\xc3(,' + timestamp + b'\n'
+        )
+        response = self.client.post(self.bp_url, body, content_type='text/csv')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [3, 5])
+        self.assertEqual(BloodPressureReading.objects.filter(user=self.user).count(), 2)
+
+    @override_settings(HEALTH_INGEST_MAX_ROWS=3)
+    def test_row_limit(self):
+        """Test that rows beyond the configured limit are not read"""
+        body = self.ndjson({'weight_kg': 80, 'timestamp': self.start.isoformat()} for _ in range(5))
+        response = self.client.post(self.weight_url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.data['created'], 3)
+        self.assertTrue(response.data['truncated'])
+
+    def test_unsupported_media_type(self):
+        """Test that only NDJSON and CSV bodies are accepted"""
+        response = self.client.post(self.weight_url, {'weight_kg': 80}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_empty_body(self):
+        """Test that an empty body creates nothing"""
+        response = self.client.post(self.weight_url, b'', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['created'], 0)
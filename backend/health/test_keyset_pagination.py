@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timedelta, timezone
+from health.models import WeightEntry
+
+
+class KeysetPaginationTest(TestCase):
+    """Test the opt-in keyset pagination mode on time-ordered endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        # 60 entries, with pairs sharing a timestamp to exercise the id tie-breaker
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        WeightEntry.objects.bulk_create([
+            WeightEntry(user=self.user, weight_kg=70 + i / 10, timestamp=start + timedelta(hours=i // 2))
+            for i in range(60)
+        ])
+        self.expected_ids = list(
+            WeightEntry.objects.filter(user=self.user).order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        self.list_url = reverse('weightentry-list')
+
+    def walk(self, url):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_page_number_mode_is_default(self):
+        """Test that plain requests keep the page-number response"""
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 60)
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_cursor_mode_walks_all_rows_in_order(self):
+        """Test that following next cursors yields every row exactly once in Meta.ordering"""
+        ids, pages = self.walk(self.list_url + '?pagination=cursor')
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(pages, 3)
+
+    def test_previous_cursor_returns_preceding_page(self):
+        """Test that the previous cursor returns the page before the current one"""
+        first = self.client.get(self.list_url + '?pagination=cursor')
+        second = self.client.get(first.data['next'])
+        self.assertIsNone(first.data['previous'])
+
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [row['id'] for row in back.data['results']],
+            [row['id'] for row in first.data['results']]
+        )
+
+    def test_deep_page_costs_same_as_first_page(self):
+        """Test that a deep cursor page issues a single query without COUNT or OFFSET"""
+        first = self.client.get(self.list_url + '?pagination=cursor')
+        deep_url = self.client.get(first.data['next']).data['next']
+
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(deep_url)
+        self.assertEqual(len(response.data['results']), 10)
+        sql = context.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(self.list_url + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import date, datetime, timezone
+from io import StringIO
+from health.models import WeightEntry, BloodPressureReading, HealthRollup
+
+
+class HealthRollupTest(TestCase):
+    """Test that rollups follow writes made through the API"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.weight_url = reverse('weightentry-list')
+        self.bp_url = reverse('bloodpressurereading-list')
+
+    def post_weight(self, weight_kg, timestamp):
+        response = self.client.post(self.weight_url, {
+            'weight_kg': weight_kg,
+            'timestamp': timestamp.isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def rollup(self, metric, period, period_start):
+        return HealthRollup.objects.get(user=self.user, metric=metric, period=period, period_start=period_start)
+
+    def test_create_updates_day_and_week(self):
+        """Test that created readings are folded into their day and week rollups"""
+        # 2024-01-03 is a Wednesday, so its week starts on Monday 2024-01-01
+        self.post_weight(80.0, datetime(2024, 1, 3, 8, tzinfo=timezone.utc))
+        self.post_weight(82.0, datetime(2024, 1, 3, 20, tzinfo=timezone.utc))
+        self.post_weight(78.0, datetime(2024, 1, 5, 8, tzinfo=timezone.utc))
+
+        day = self.rollup('weight_kg', 'day', date(2024, 1, 3))
+        self.assertEqual(day.count, 2)
+        self.assertEqual((day.min_value, day.max_value, day.mean_value), (80.0, 82.0, 81.0))
+        self.assertEqual(day.last_value, 82.0)
+
+        week = self.rollup('weight_kg', 'week', date(2024, 1, 1))
+        self.assertEqual(week.count, 3)
+        self.assertEqual((week.min_value, week.max_value, week.mean_value), (78.0, 82.0, 80.0))
+        self.assertEqual(week.last_value, 78.0)
+
+    def test_update_and_delete_recompute(self):
+        """Test that updates and deletes recompute the affected buckets"""
+        first = self.post_weight(80.0, datetime(2024, 1, 3, 8, tzinfo=timezone.utc))
+        second = self.post_weight(90.0, datetime(2024, 1, 3, 9, tzinfo=timezone.utc))
+
+        # Move the second reading into the next week
+        response = self.client.patch(
+            reverse('weightentry-detail', args=[second]),
+            {'timestamp': datetime(2024, 1, 9, 9, tzinfo=timezone.utc).isoformat()},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.rollup('weight_kg', 'week', date(2024, 1, 1)).max_value, 80.0)
+        self.assertEqual(self.rollup('weight_kg', 'week', date(2024, 1, 8)).count, 1)
+
+        self.client.delete(reverse('weightentry-detail', args=[first]))
+        self.assertFalse(HealthRollup.objects.filter(period_start=date(2024, 1, 1)).exists())
+
+    def test_bp_rollups_skip_missing_pulse(self):
+        """Test that blood pressure rollups cover each metric separately"""
+        timestamp = datetime(2024, 1, 3, 8, tzinfo=timezone.utc)
+        self.client.post(self.bp_url, {'systolic': 120, 'diastolic': 80, 'timestamp': timestamp.isoformat()}, format='json')
+        self.client.post(self.bp_url, {'systolic': 130, 'diastolic': 85, 'pulse': 70, 'timestamp': timestamp.isoformat()}, format='json')
+
+        self.assertEqual(self.rollup('systolic', 'day', date(2024, 1, 3)).mean_value, 125.0)
+        self.assertEqual(self.rollup('pulse', 'day', date(2024, 1, 3)).count, 1)
+
+    def test_rollups_action(self):
+        """Test that the rollups action returns column arrays per metric"""
+        self.post_weight(80.0, datetime(2024, 1, 3, 8, tzinfo=timezone.utc))
+        self.post_weight(81.0, datetime(2024, 1, 4, 8, tzinfo=timezone.utc))
+
+        response = self.client.get(reverse('weightentry-rollups'), {'period': 'day'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['weight_kg']['start'], [date(2024, 1, 3), date(2024, 1, 4)])
+        self.assertEqual(response.data['weight_kg']['mean'], [80.0, 81.0])
+
+        response = self.client.get(reverse('bloodpressurereading-rollups'), {'period': 'week'})
+        self.assertEqual(response.data['systolic']['count'], [])
+
+    def test_rebuild_command_matches_incremental(self):
+        """Test that a rebuild reproduces the incrementally maintained rollups"""
+        for hour, weight in enumerate([80.0, 79.5, 81.0, 80.5]):
+            self.post_weight(weight, datetime(2024, 1, 3 + hour, 8, tzinfo=timezone.utc))
+        BloodPressureReading.objects.create(
+            user=self.user, systolic=120, diastolic=80, timestamp=datetime(2024, 1, 3, tzinfo=timezone.utc)
+        )
+
+        fields = ('metric', 'period', 'period_start', 'count', 'min_value', 'max_value', 'mean_value', 'last_value')
+        incremental = sorted(HealthRollup.objects.values_list(*fields))
+
+        out = StringIO()
+        call_command('rebuild_health_rollups', stdout=out)
+        self.assertIn('Successfully rebuilt', out.getvalue())
+
+        rebuilt = sorted(HealthRollup.objects.filter(metric='weight_kg').values_list(*fields))
+        self.assertEqual(rebuilt, incremental)
+        self.assertTrue(HealthRollup.objects.filter(metric='systolic').exists())
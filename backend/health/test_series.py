@@ -0,0 +1,123 @@
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timedelta, timezone
+from health.downsampling import bucket_aggregate, lttb
+from health.models import WeightEntry, BloodPressureReading
+
+
+class DownsamplingTest(SimpleTestCase):
+    """Test the downsampling helpers"""
+
+    def test_lttb_keeps_endpoints_and_peak(self):
+        """Test that LTTB keeps the first, last and most prominent points"""
+        ts = list(range(100))
+        ys = [0.0] * 100
+        ys[50] = 10.0
+
+        kept = lttb(ts, ys, 10)
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], 99)
+        self.assertIn(50, kept)
+        self.assertEqual(kept, sorted(kept))
+
+    def test_lttb_returns_everything_below_threshold(self):
+        """Test that short series are returned unchanged"""
+        self.assertEqual(lttb([1, 2, 3], [1, 2, 3], 10), [0, 1, 2])
+
+    def test_bucket_aggregate(self):
+        """Test min/avg/max per bucket, skipping empty buckets and missing values"""
+        rows = [(0, 1.0, None), (1, 3.0, 60), (9, 5.0, 70)]
+        result = bucket_aggregate(rows, ['a', 'b'], 0, 10, 5)
+
+        self.assertEqual(result['t'], [0, 8])
+        self.assertEqual(result['n'], [2, 1])
+        self.assertEqual(result['a'], {'min': [1.0, 5.0], 'avg': [2.0, 5.0], 'max': [3.0, 5.0]})
+        self.assertEqual(result['b'], {'min': [60, 70], 'avg': [60, 70], 'max': [60, 70]})
+
+
+class SeriesAPITest(TestCase):
+    """Test the series actions on weight entries and blood pressure readings"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        self.start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        WeightEntry.objects.bulk_create([
+            WeightEntry(user=self.user1, weight_kg=80 + (i % 7), timestamp=self.start + timedelta(days=i))
+            for i in range(365)
+        ])
+        WeightEntry.objects.create(user=self.user2, weight_kg=200, timestamp=self.start)
+        BloodPressureReading.objects.bulk_create([
+            BloodPressureReading(
+                user=self.user1, systolic=120 + i % 10, diastolic=80, timestamp=self.start + timedelta(hours=i)
+            )
+            for i in range(100)
+        ])
+
+        self.weight_url = reverse('weightentry-series')
+        self.bp_url = reverse('bloodpressurereading-series')
+
+    def test_weight_series_buckets(self):
+        """Test that a year of entries is reduced to the requested number of buckets"""
+        response = self.client.get(self.weight_url, {'points': 12})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['method'], 'buckets')
+        self.assertEqual(response.data['total'], 365)
+        self.assertEqual(len(response.data['t']), 12)
+        self.assertEqual(sum(response.data['n']), 365)
+        self.assertEqual(min(response.data['weight_kg']['min']), 80)
+        self.assertEqual(max(response.data['weight_kg']['max']), 86)
+
+    def test_weight_series_lttb(self):
+        """Test that LTTB returns plain value columns with the requested length"""
+        response = self.client.get(self.weight_url, {'points': 50, 'method': 'lttb'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['t']), 50)
+        self.assertEqual(len(response.data['weight_kg']), 50)
+        self.assertEqual(response.data['t'][0], int(self.start.timestamp() * 1000))
+
+    def test_series_date_range(self):
+        """Test that start and end restrict the series"""
+        response = self.client.get(self.weight_url, {
+            'start': (self.start + timedelta(days=10)).isoformat(),
+            'end': (self.start + timedelta(days=19)).isoformat(),
+            'method': 'lttb',
+        })
+        self.assertEqual(response.data['total'], 10)
+
+    def test_bp_series_columns(self):
+        """Test that blood pressure series include every reading column"""
+        response = self.client.get(self.bp_url, {'points': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for field in ('systolic', 'diastolic', 'pulse'):
+            self.assertEqual(len(response.data[field]['avg']), 10)
+        self.assertEqual(response.data['pulse']['avg'][0], None)
+
+    def test_series_empty(self):
+        """Test that a user without readings gets empty columns"""
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(self.bp_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['t'], [])
+
+    def test_series_invalid_params(self):
+        """Test that invalid parameters are rejected"""
+        response = self.client.get(self.weight_url, {'points': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -42,6 +43,7 @@ class WeightEntryAPITest(TestCase):
     """Test the WeightEntry API endpoints"""
     
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         
         # Clear all existing weight entries to ensure a clean test environment
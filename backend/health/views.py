@@ -1,6 +1,25 @@
-from rest_framework import viewsets, permissions, parsers
-from .models import WeightEntry, BloodPressureReading, ProgressPhoto
-from .serializers import WeightEntrySerializer, BloodPressureReadingSerializer, ProgressPhotoSerializer
+from django.db import transaction
+from django.db.models import Max, Min
+from rest_framework import viewsets, permissions, parsers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from core.async_views import AsyncReadMixin
+from core.cache import ResponseCacheMixin, invalidate_user_cache
+from core.conditional import ConditionalGetMixin
+from core.derivatives import schedule_derivatives
+from core.export import ExportMixin
+from core.media import url_expiry
+from core.pagination import TimeSeriesPagination
+from core.profiling import ServerTimingMixin
+from .downsampling import bucket_aggregate, lttb
+from .ingest import ingest
+from .models import WeightEntry, BloodPressureReading, ProgressPhoto, HealthRollup
+from .parsers import NDJSONStreamParser, CSVStreamParser
+from .rollups import add_reading, refresh_buckets
+from .serializers import (
+    WeightEntrySerializer, BloodPressureReadingSerializer, ProgressPhotoSerializer, SeriesQuerySerializer,
+    RollupQuerySerializer
+)
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -12,48 +31,214 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         
-        # Write permissions are only allowed to the owner
-        return obj.user == request.user
+        # Write permissions are only allowed to the owner; comparing ids
+        # doesn't load the owner's row
+        return obj.user_id == request.user.id
 
 
-class WeightEntryViewSet(viewsets.ModelViewSet):
+class SeriesMixin:
+    """
+    Adds a ``series`` action returning the readings between ``start`` and
+    ``end`` downsampled to about ``points`` points, as column arrays with
+    ``t`` in epoch milliseconds, and a ``rollups`` action serving the
+    precomputed daily or weekly summaries of the same fields.
+    """
+    series_fields = []
+    
+    @action(detail=False, methods=['get'])
+    def rollups(self, request):
+        params = RollupQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        queryset = HealthRollup.objects.filter(
+            user=request.user,
+            metric__in=self.series_fields,
+            period=params.validated_data['period'],
+        )
+        if params.validated_data.get('start'):
+            queryset = queryset.filter(period_start__gte=params.validated_data['start'])
+        if params.validated_data.get('end'):
+            queryset = queryset.filter(period_start__lte=params.validated_data['end'])
+        
+        columns = ['start', 'count', 'min', 'max', 'mean', 'last']
+        data = {'period': params.validated_data['period']}
+        data.update({field: {column: [] for column in columns} for field in self.series_fields})
+        rows = queryset.order_by('period_start').values_list(
+            'metric', 'period_start', 'count', 'min_value', 'max_value', 'mean_value', 'last_value'
+        )
+        for metric, *values in rows:
+            for column, value in zip(columns, values):
+                data[metric][column].append(value)
+        
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        params = SeriesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start = params.validated_data.get('start')
+        end = params.validated_data.get('end')
+        points = params.validated_data['points']
+        
+        queryset = self.get_queryset()
+        if start:
+            queryset = queryset.filter(timestamp__gte=start)
+        if end:
+            queryset = queryset.filter(timestamp__lte=end)
+        rows = queryset.order_by('timestamp').values_list('timestamp', *self.series_fields)
+        
+        if params.validated_data['method'] == 'lttb':
+            data = self._lttb_series(rows, points)
+        else:
+            data = self._bucket_series(queryset, rows, start, end, points)
+        
+        return Response(data)
+    
+    def _lttb_series(self, rows, points):
+        columns = list(zip(*rows)) or [[] for _ in range(len(self.series_fields) + 1)]
+        ts = [timestamp.timestamp() for timestamp in columns[0]]
+        # The first series field drives which points are kept
+        kept = lttb(ts, columns[1], points)
+        
+        data = {'method': 'lttb', 'total': len(ts), 't': [int(ts[i] * 1000) for i in kept]}
+        for k, field in enumerate(self.series_fields, start=1):
+            data[field] = [columns[k][i] for i in kept]
+        return data
+    
+    def _bucket_series(self, queryset, rows, start, end, points):
+        if start is None or end is None:
+            bounds = queryset.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+            start = start or bounds['first']
+            end = end or bounds['last']
+        
+        data = {'method': 'buckets', 'total': 0, 't': [], 'n': []}
+        data.update({field: {'min': [], 'avg': [], 'max': []} for field in self.series_fields})
+        if start is None or end is None:
+            return data
+        
+        start_ts = start.timestamp()
+        data.update(bucket_aggregate(
+            ((timestamp.timestamp(), *values) for timestamp, *values in rows.iterator(chunk_size=2000)),
+            self.series_fields, start_ts, end.timestamp(), points
+        ))
+        data['t'] = [int(t * 1000) for t in data['t']]
+        data['total'] = sum(data['n'])
+        return data
+
+
+class BulkIngestMixin:
+    """
+    Adds a ``bulk`` action accepting an NDJSON (``application/x-ndjson``) or
+    CSV (``text/csv``) body of readings, parsed as a stream and inserted in
+    batches, with per-row errors in the response.
+    """
+    
+    @action(detail=False, methods=['post'], parser_classes=[NDJSONStreamParser, CSVStreamParser])
+    def bulk(self, request):
+        summary = ingest(request.data, self.get_serializer_class(), request.user)
+        if summary['created']:
+            invalidate_user_cache(request.user.id)
+        response_status = status.HTTP_201_CREATED if summary['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(summary, status=response_status)
+
+
+class WeightEntryViewSet(ServerTimingMixin, SeriesMixin, BulkIngestMixin, ResponseCacheMixin, ConditionalGetMixin, ExportMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = WeightEntry.objects.all()
     serializer_class = WeightEntrySerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    pagination_class = TimeSeriesPagination
+    series_fields = ['weight_kg']
+    export_fields = ['id', 'weight_kg', 'timestamp', 'notes', 'created_at', 'updated_at']
     
     def get_queryset(self):
         # Users can only see their own weight entries
         return WeightEntry.objects.filter(user=self.request.user)
     
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        add_reading(serializer.instance)
+        self.invalidate_user_cache()
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_timestamp = serializer.instance.timestamp
+        serializer.save()
+        refresh_buckets(
+            WeightEntry, serializer.instance.user_id, [previous_timestamp, serializer.instance.timestamp]
+        )
+        self.invalidate_user_cache()
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        refresh_buckets(WeightEntry, instance.user_id, [instance.timestamp])
+        self.invalidate_user_cache()
 
 
-class BloodPressureReadingViewSet(viewsets.ModelViewSet):
+class BloodPressureReadingViewSet(ServerTimingMixin, SeriesMixin, BulkIngestMixin, ResponseCacheMixin, ConditionalGetMixin, ExportMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = BloodPressureReading.objects.all()
     serializer_class = BloodPressureReadingSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    pagination_class = TimeSeriesPagination
+    series_fields = ['systolic', 'diastolic', 'pulse']
+    export_fields = ['id', 'systolic', 'diastolic', 'pulse', 'timestamp', 'notes', 'created_at', 'updated_at']
     
     def get_queryset(self):
         # Users can only see their own blood pressure readings
         return BloodPressureReading.objects.filter(user=self.request.user)
     
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        add_reading(serializer.instance)
+        self.invalidate_user_cache()
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_timestamp = serializer.instance.timestamp
+        serializer.save()
+        refresh_buckets(
+            BloodPressureReading, serializer.instance.user_id, [previous_timestamp, serializer.instance.timestamp]
+        )
+        self.invalidate_user_cache()
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        refresh_buckets(BloodPressureReading, instance.user_id, [instance.timestamp])
+        self.invalidate_user_cache()
 
 
-class ProgressPhotoViewSet(viewsets.ModelViewSet):
+class ProgressPhotoViewSet(ServerTimingMixin, ResponseCacheMixin, ConditionalGetMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = ProgressPhoto.objects.all()
     serializer_class = ProgressPhotoSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    pagination_class = TimeSeriesPagination
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
     
     def get_queryset(self):
         # Users can only see their own progress photos
         return ProgressPhoto.objects.filter(user=self.request.user)
     
+    def get_representation_version(self):
+        # Signed image URLs are renewed once per period; don't let a 304 keep expired ones
+        return str(url_expiry())
+    
+    @transaction.atomic
     def perform_create(self, serializer):
+        # The image's blob reference is taken while saving; keep it only with the row
         serializer.save(user=self.request.user)
+        schedule_derivatives(serializer.instance)
+        self.invalidate_user_cache()
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # Saving a new image releases the old one (see core.storage)
+        serializer.save()
+        if 'image' in serializer.validated_data:
+            schedule_derivatives(serializer.instance)
+        self.invalidate_user_cache()
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
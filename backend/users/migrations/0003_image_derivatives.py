@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_profilepicture'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilepicture',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized renditions by size name'),
+        ),
+    ]
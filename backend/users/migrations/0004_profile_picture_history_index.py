@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_image_derivatives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profilepicture',
+            index=models.Index(fields=['user', '-uploaded_at'], name='profilepic_user_uploaded_idx'),
+        ),
+    ]
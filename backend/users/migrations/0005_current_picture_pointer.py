@@ -0,0 +1,45 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_current_flags(apps, schema_editor):
+    # Point each profile at its newest flagged picture
+    ProfilePicture = apps.get_model('users', 'ProfilePicture')
+    UserProfile = apps.get_model('users', 'UserProfile')
+    current = ProfilePicture.objects.filter(is_current=True).order_by('user_id', '-uploaded_at')
+    seen = set()
+    for picture_id, user_id in current.values_list('id', 'user_id').iterator():
+        if user_id not in seen:
+            seen.add(user_id)
+            UserProfile.objects.filter(user_id=user_id).update(current_picture_id=picture_id)
+
+
+def copy_current_pointers(apps, schema_editor):
+    ProfilePicture = apps.get_model('users', 'ProfilePicture')
+    UserProfile = apps.get_model('users', 'UserProfile')
+    picture_ids = UserProfile.objects.exclude(current_picture=None).values('current_picture_id')
+    ProfilePicture.objects.filter(id__in=picture_ids).update(is_current=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_profile_picture_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='current_picture',
+            field=models.ForeignKey(blank=True, help_text="Picture shown as the user's current profile picture", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.profilepicture'),
+        ),
+        migrations.RunPython(copy_current_flags, copy_current_pointers),
+        migrations.RemoveField(
+            model_name='profilepicture',
+            name='is_current',
+        ),
+    ]
@@ -1,27 +1,63 @@
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 import os
 
 
+class ProfilePictureQuerySet(models.QuerySet):
+    def with_is_current(self):
+        """Annotate ``is_current`` in the same query instead of one lookup per picture"""
+        return self.annotate(is_current=Exists(
+            UserProfile.objects.filter(user=OuterRef('user'), current_picture=OuterRef('pk'))
+        ))
+
+
 class ProfilePicture(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='profile_pictures')
     image = models.ImageField(upload_to='profile_pictures/%Y/%m/')
-    is_current = models.BooleanField(default=False)
+    derivatives = models.JSONField(default=dict, blank=True, help_text="Resized renditions by size name")
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    objects = ProfilePictureQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['user', '-uploaded_at'], name='profilepic_user_uploaded_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.uploaded_at.strftime('%Y-%m-%d %H:%M')}"
     
-    def save(self, *args, **kwargs):
-        # If this is being set as current, unset all other current pictures for this user
-        if self.is_current:
-            ProfilePicture.objects.filter(user=self.user, is_current=True).update(is_current=False)
-        super().save(*args, **kwargs)
+    @property
+    def is_current(self):
+        """Whether the user's profile points at this picture"""
+        if not hasattr(self, '_is_current'):
+            self._is_current = UserProfile.objects.filter(user_id=self.user_id, current_picture=self).exists()
+        return self._is_current
+    
+    @is_current.setter
+    def is_current(self, value):
+        # Set by with_is_current() and by views that already know
+        self._is_current = value
+
+
+class UserProfileQuerySet(models.QuerySet):
+    def with_current_picture(self):
+        """Join in the user and their current profile picture, in one query"""
+        return self.select_related('user', 'current_picture')
+    
+    def set_current_picture(self, picture):
+        """
+        Point the owner's profile at ``picture`` with a single UPDATE.
+
+        Concurrent switches and uploads cannot leave two current pictures:
+        there is only one pointer, and the last UPDATE wins.
+        """
+        return self.filter(user_id=picture.user_id).update(current_picture=picture, updated_at=timezone.now())
 
 
 class UserProfile(models.Model):
@@ -37,19 +73,25 @@ class UserProfile(models.Model):
     height = models.FloatField(null=True, blank=True, help_text="Height in cm")
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, null=True, blank=True)
     goals = models.TextField(blank=True)
+    current_picture = models.ForeignKey(
+        ProfilePicture, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        help_text="Picture shown as the user's current profile picture"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserProfileQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.user.username}'s Profile"
     
     @property
     def current_profile_picture(self):
         """Get the current profile picture for this user"""
-        try:
-            return self.user.profile_pictures.filter(is_current=True).first()
-        except AttributeError:
-            return None
+        picture = self.current_picture
+        if picture is not None:
+            picture.is_current = True
+        return picture
 
 
 @receiver(post_save, sender=User)
@@ -60,4 +102,5 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+    # instance.profile may predate a set_current_picture(), so only touch it
+    instance.profile.save(update_fields=['updated_at'])
\ No newline at end of file
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from core.media import ProtectedImageField, derivative_urls
 from .models import UserProfile, ProfilePicture
 
 
@@ -11,26 +12,42 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class ProfilePictureSerializer(serializers.ModelSerializer):
+    image = ProtectedImageField()
+    is_current = serializers.BooleanField(read_only=True)
+    image_urls = serializers.SerializerMethodField()
+    
     class Meta:
         model = ProfilePicture
-        fields = ['id', 'image', 'is_current', 'uploaded_at']
+        fields = ['id', 'image', 'image_urls', 'is_current', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at']
+    
+    def get_image_urls(self, obj):
+        # Empty until the derivatives have been rendered
+        return derivative_urls(obj.image, obj.derivatives, self.context.get('request'))
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     current_profile_picture = serializers.SerializerMethodField()
-    profile_pictures = ProfilePictureSerializer(source='user.profile_pictures', many=True, read_only=True)
     
     class Meta:
         model = UserProfile
-        fields = ['id', 'user', 'age', 'weight', 'height', 'gender', 'goals', 'created_at', 'updated_at', 'current_profile_picture', 'profile_pictures']
+        # Picture history is paged separately by the profile_pictures action
+        fields = ['id', 'user', 'age', 'weight', 'height', 'gender', 'goals', 'created_at', 'updated_at', 'current_profile_picture']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Only the edited fields: the current picture moves through
+        # set_current_picture(), possibly after this instance was loaded
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+    
     def get_current_profile_picture(self, obj):
         current_pic = obj.current_profile_picture
         if current_pic:
-            return ProfilePictureSerializer(current_pic).data
+            return ProfilePictureSerializer(current_pic, context=self.context).data
         return None
 
 
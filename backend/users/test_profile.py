@@ -0,0 +1,146 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import ProfilePicture, UserProfile
+from .serializers import UserProfileSerializer
+
+
+class LeanProfileTest(TestCase):
+    """Test that the profile stays one query however many pictures were uploaded"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def add_pictures(self, count):
+        # Rows only: the files are never opened
+        for index in range(count):
+            ProfilePicture.objects.create(user=self.user, image=f'profile_pictures/{index}.jpg')
+
+    def add_current_picture(self):
+        picture = ProfilePicture.objects.create(user=self.user, image='profile_pictures/me.jpg')
+        UserProfile.objects.set_current_picture(picture)
+        return picture
+
+    def test_my_profile_is_one_query(self):
+        """Test that profile, user and current picture come from one joined query"""
+        self.add_pictures(30)
+        current = self.add_current_picture()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('userprofile-my-profile'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['username'], 'testuser1')
+        self.assertEqual(response.data['current_profile_picture']['id'], current.id)
+        self.assertTrue(response.data['current_profile_picture']['is_current'])
+        self.assertNotIn('profile_pictures', response.data)
+
+    def test_profile_without_current_picture(self):
+        """Test that the current picture is null when none is set"""
+        self.add_pictures(2)
+        response = self.client.get(reverse('userprofile-my-profile'))
+        self.assertIsNone(response.data['current_profile_picture'])
+
+    def test_profile_detail_joins_current_picture(self):
+        """Test that the detail endpoint uses the same single query"""
+        self.add_current_picture()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('userprofile-detail', args=[self.user.profile.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['current_profile_picture'])
+
+    def test_picture_history_is_paginated(self):
+        """Test that the picture history is served in pages, newest first"""
+        self.add_pictures(30)
+
+        response = self.client.get(reverse('userprofile-profile-pictures'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertIsNotNone(response.data['next'])
+        uploaded = [picture['uploaded_at'] for picture in response.data['results']]
+        self.assertEqual(uploaded, sorted(uploaded, reverse=True))
+
+        response = self.client.get(reverse('userprofile-profile-pictures'), {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), 25)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 5)
+
+
+class CurrentPictureTest(TestCase):
+    """Test that the current profile picture is a single pointer on the profile"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.first = ProfilePicture.objects.create(user=self.user, image='profile_pictures/1.jpg')
+        self.second = ProfilePicture.objects.create(user=self.user, image='profile_pictures/2.jpg')
+
+    def test_switch_is_one_update(self):
+        """Test that switching the current picture writes one row with one statement"""
+        UserProfile.objects.set_current_picture(self.first)
+        with self.assertNumQueries(1):
+            UserProfile.objects.set_current_picture(self.second)
+        self.assertEqual(UserProfile.objects.get(user=self.user).current_picture, self.second)
+
+    def test_set_current_picture_endpoint(self):
+        """Test that the endpoint switches the pointer and history reports the flag"""
+        response = self.client.post(reverse('userprofile-set-current-picture'), {'picture_id': self.first.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['profile_picture']['is_current'])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('userprofile-profile-pictures'))
+        flags = {picture['id']: picture['is_current'] for picture in response.data['results']}
+        self.assertEqual(flags, {self.first.id: True, self.second.id: False})
+
+    def test_other_users_picture_cannot_be_set(self):
+        """Test that a picture of another user is not found"""
+        other = User.objects.create_user(username='testuser2', email='test2@example.com', password='password123')
+        picture = ProfilePicture.objects.create(user=other, image='profile_pictures/3.jpg')
+        response = self.client.post(reverse('userprofile-set-current-picture'), {'picture_id': picture.id})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(UserProfile.objects.get(user=self.user).current_picture)
+
+    def test_stale_profile_edit_keeps_pointer(self):
+        """Test that editing a profile loaded before a switch does not switch it back"""
+        stale = UserProfile.objects.get(user=self.user)
+        UserProfile.objects.set_current_picture(self.second)
+
+        serializer = UserProfileSerializer(stale, data={'age': 40}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.user.save()
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.age, 40)
+        self.assertEqual(profile.current_picture, self.second)
+
+    def test_full_save_writes_pointer(self):
+        """Test that assigning the pointer and saving the profile is not silently ignored"""
+        profile = UserProfile.objects.get(user=self.user)
+        profile.current_picture = self.first
+        profile.save()
+        self.assertEqual(UserProfile.objects.get(user=self.user).current_picture, self.first)
+
+    def test_deleting_current_picture_clears_pointer(self):
+        """Test that the profile has no current picture once it is deleted"""
+        UserProfile.objects.set_current_picture(self.first)
+        self.first.delete()
+        self.assertIsNone(UserProfile.objects.get(user=self.user).current_picture)
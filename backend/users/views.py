@@ -3,11 +3,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth.models import User
+from django.db import transaction
+from core.derivatives import schedule_derivatives
+from core.pagination import TimeSeriesPagination
+from core.profiling import ServerTimingMixin
 from .models import UserProfile, ProfilePicture
 from .serializers import UserSerializer, UserProfileSerializer, UserRegistrationSerializer, ProfilePictureSerializer
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(ServerTimingMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -19,20 +23,22 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         return User.objects.all()
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(ServerTimingMixin, viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        # Regular users can only see and edit their own profile
+        # Regular users can only see and edit their own profile. The user
+        # and current picture are joined in, so a profile is one query.
+        profiles = UserProfile.objects.with_current_picture()
         if not self.request.user.is_staff:
-            return UserProfile.objects.filter(user=self.request.user)
-        return UserProfile.objects.all()
+            return profiles.filter(user=self.request.user)
+        return profiles
     
     @action(detail=False, methods=['get'])
     def my_profile(self, request):
-        profile = UserProfile.objects.get(user=request.user)
+        profile = UserProfile.objects.with_current_picture().get(user=request.user)
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
     
@@ -42,25 +48,26 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         if 'image' not in request.FILES:
             return Response({'error': 'No image file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create new profile picture
-        profile_picture = ProfilePicture.objects.create(
-            user=request.user,
-            image=request.FILES['image'],
-            is_current=True  # This will automatically unset other current pictures
-        )
+        # Create new profile picture and make it the current one
+        with transaction.atomic():
+            profile_picture = ProfilePicture.objects.create(user=request.user, image=request.FILES['image'])
+            UserProfile.objects.set_current_picture(profile_picture)
+        profile_picture.is_current = True
+        schedule_derivatives(profile_picture)
         
-        serializer = ProfilePictureSerializer(profile_picture)
+        serializer = ProfilePictureSerializer(profile_picture, context=self.get_serializer_context())
         return Response({
             'message': 'Profile picture uploaded successfully',
             'profile_picture': serializer.data
         }, status=status.HTTP_201_CREATED)
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], pagination_class=TimeSeriesPagination)
     def profile_pictures(self, request):
-        """Get all profile pictures for the user"""
-        pictures = ProfilePicture.objects.filter(user=request.user)
-        serializer = ProfilePictureSerializer(pictures, many=True)
-        return Response(serializer.data)
+        """Get the user's profile pictures, newest first, one page at a time"""
+        pictures = ProfilePicture.objects.filter(user=request.user).with_is_current()
+        page = self.paginate_queryset(pictures)
+        serializer = ProfilePictureSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['post'])
     def set_current_picture(self, request):
@@ -71,13 +78,10 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         
         try:
             picture = ProfilePicture.objects.get(id=picture_id, user=request.user)
-            # Unset all current pictures for this user
-            ProfilePicture.objects.filter(user=request.user, is_current=True).update(is_current=False)
-            # Set this picture as current
+            UserProfile.objects.set_current_picture(picture)
             picture.is_current = True
-            picture.save()
             
-            serializer = ProfilePictureSerializer(picture)
+            serializer = ProfilePictureSerializer(picture, context=self.get_serializer_context())
             return Response({
                 'message': 'Profile picture set as current',
                 'profile_picture': serializer.data
@@ -86,7 +90,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Profile picture not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class RegistrationViewSet(viewsets.GenericViewSet):
+class RegistrationViewSet(ServerTimingMixin, viewsets.GenericViewSet):
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
     
@@ -32,12 +32,15 @@ INSTALLED_APPS = [
     'corsheaders',
     
     # Local apps
+    'core',
     'users',
     'workouts',
     'health',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',  # First, so it times everything below
+    'core.profiling.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -68,6 +71,14 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'workout_backend.wsgi.application'
+ASGI_APPLICATION = 'workout_backend.asgi.application'
+
+# 'wsgi' (sync gunicorn workers) or 'asgi' (uvicorn workers), see gunicorn.conf.py
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+# Answer list/retrieve of AsyncReadMixin viewsets from async views; only
+# worth it under an ASGI server, where sync views each hold a thread
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', str(SERVER_MODE == 'asgi')) == 'True'
 
 # Database
 if os.environ.get('DB_HOST'):
@@ -118,8 +129,15 @@ STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 STATICFILES_DIRS = []
 
-# WhiteNoise configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Uploads are stored once per distinct content; WhiteNoise serves static files
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Media files (user uploads)
 MEDIA_URL = '/media/'
@@ -131,7 +149,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -164,6 +182,64 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
 
 CORS_ALLOW_CREDENTIALS = True
 
-# File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
\ No newline at end of file
+# File upload settings: uploads are streamed to disk and probed as they
+# arrive, so only the non-file form fields are held in memory
+FILE_UPLOAD_HANDLERS = ['core.uploads.BoundedImageUploadHandler']
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB, the Django default
+IMAGE_UPLOAD_MAX_SIZE = int(os.environ.get('IMAGE_UPLOAD_MAX_SIZE', 10 * 1024 * 1024))  # 10MB, as in nginx
+IMAGE_UPLOAD_MAX_PIXELS = int(os.environ.get('IMAGE_UPLOAD_MAX_PIXELS', 50_000_000))
+
+# Maximum number of rows read from one bulk ingest request body
+HEALTH_INGEST_MAX_ROWS = int(os.environ.get('HEALTH_INGEST_MAX_ROWS', 100000))
+
+# Days deletions are kept for delta sync; older cursors get a full resync
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+
+# Cache: Redis when REDIS_URL is set, otherwise per-process local memory
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'fit-forty',
+        }
+    }
+
+# Whether every server process uses the same cache. Per-user responses and
+# authenticated users are only cached then: with per-process memory a write
+# invalidates the cache of the worker that served it while the others keep
+# answering from theirs.
+# A single-process server may set it without Redis.
+SHARED_CACHE = os.environ.get('SHARED_CACHE', str(bool(os.environ.get('REDIS_URL')))) == 'True'
+
+# Seconds an authenticated user is served from the cache (saves invalidate it
+# earlier; writes that skip signals, such as QuerySet.update(), wait this long)
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Seconds a cached per-user API response is kept (writes invalidate it earlier)
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Seconds between checks of the in-process exercise catalog against the database
+EXERCISE_CATALOG_REVALIDATE_SECONDS = int(os.environ.get('EXERCISE_CATALOG_REVALIDATE_SECONDS', 60))
+
+# Threads rendering photo derivatives in the background (0 renders inline on commit)
+IMAGE_DERIVATIVE_WORKERS = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2))
+
+# Signed media links stay valid for between one and two of these periods (seconds)
+MEDIA_URL_MAX_AGE = int(os.environ.get('MEDIA_URL_MAX_AGE', 6 * 3600))
+
+# Hand media transfers to nginx's internal location; off without nginx in front
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', str(not DEBUG)) == 'True'
+MEDIA_ACCEL_REDIRECT_LOCATION = '/protected-media/'
+
+# Bearer token required by /metrics when set (it is never proxied by nginx either way)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Server-Timing breakdown on responses: 'off', 'staff' (staff users only) or 'all'
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'off')
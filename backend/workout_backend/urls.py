@@ -5,6 +5,9 @@ from django.conf.urls.static import static
 from rest_framework import routers
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from core.media import ProtectedMediaView
+from core.metrics import metrics_view
+from core.views import ResponseCacheStatsViewSet, SyncViewSet
 from users.views import UserViewSet, UserProfileViewSet, RegistrationViewSet
 from workouts.views import ExerciseViewSet, WorkoutLogViewSet, ExerciseLogViewSet
 from health.views import WeightEntryViewSet, BloodPressureReadingViewSet, ProgressPhotoViewSet
@@ -23,16 +26,21 @@ router.register(r'exercise-logs', ExerciseLogViewSet)
 router.register(r'weight-entries', WeightEntryViewSet)
 router.register(r'blood-pressure', BloodPressureReadingViewSet)
 router.register(r'progress-photos', ProgressPhotoViewSet)
+# Sync
+router.register(r'sync', SyncViewSet, basename='sync')
+router.register(r'cache-stats', ResponseCacheStatsViewSet, basename='cache-stats')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('api/media/<slug:kind>/<int:pk>/<str:variant>/', ProtectedMediaView.as_view(), name='protected-media'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api-auth/', include('rest_framework.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
-# Debug mode only - in production, Nginx will serve these
+# Debug mode only - in production, Nginx will serve these. Media is only
+# served through the authenticated api/media/ endpoint.
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Exercise, WorkoutLog, ExerciseLog
+from .models import Exercise, WorkoutLog, ExerciseLog, PersonalRecord
 
 
 @admin.register(Exercise)
@@ -26,4 +26,11 @@ class WorkoutLogAdmin(admin.ModelAdmin):
 class ExerciseLogAdmin(admin.ModelAdmin):
     list_display = ('exercise', 'workout', 'sets', 'reps', 'weight')
     list_filter = ('exercise', 'workout__date')
-    search_fields = ('exercise__name', 'workout__user__username', 'notes')
\ No newline at end of file
+    search_fields = ('exercise__name', 'workout__user__username', 'notes')
+
+
+@admin.register(PersonalRecord)
+class PersonalRecordAdmin(admin.ModelAdmin):
+    list_display = ('user', 'exercise', 'heaviest_weight', 'best_epley_1rm', 'best_set_volume')
+    list_filter = ('exercise',)
+    search_fields = ('user__username', 'exercise__name')
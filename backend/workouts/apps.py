@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WorkoutsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workouts'
+
+    def ready(self):
+        # Connects the signals keeping the exercise catalog cache current
+        from . import catalog  # noqa: F401
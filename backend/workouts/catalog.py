@@ -0,0 +1,105 @@
+"""
+In-process cache of the exercise catalog.
+
+The catalog only changes through staff writes, so every process keeps the
+serialized exercises in memory, stamped with a version shared through the
+Django cache. Saving or deleting an exercise bumps that version and every
+process reloads on its next access. A row count and newest ``updated_at``
+check against the database every ``EXERCISE_CATALOG_REVALIDATE_SECONDS``
+also catches writes the version never saw, such as those made by another
+process with a per-process cache backend.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_version, get_version, invalidate_all
+from .models import Exercise
+
+
+VERSION_KEY = 'exercise-catalog:version'
+
+
+class CatalogSnapshot:
+    """Immutable serialized catalog as of one version"""
+
+    def __init__(self, version, exercises, stamp):
+        self.version = version
+        self.exercises = exercises
+        self.by_id = {exercise['id']: exercise for exercise in exercises}
+        self.stamp = stamp
+        self.digest = hashlib.sha1(
+            json.dumps(exercises, cls=DjangoJSONEncoder, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        self.checked_at = time.monotonic()
+
+
+class ExerciseCatalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def get(self):
+        """Return the current snapshot, reloading it if the version moved on"""
+        snapshot = self._snapshot
+        version = self._shared_version()
+        if snapshot is not None and snapshot.version == version:
+            if time.monotonic() - snapshot.checked_at < settings.EXERCISE_CATALOG_REVALIDATE_SECONDS:
+                return snapshot
+            if self._database_stamp() == snapshot.stamp:
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+        return self.reload(version)
+
+    def reload(self, version=None):
+        from .serializers import ExerciseSerializer
+
+        with self._lock:
+            if version is None:
+                version = self._shared_version()
+            instances = list(Exercise.objects.order_by('id'))
+            stamp = (len(instances), max((exercise.updated_at for exercise in instances), default=None))
+            exercises = [dict(row) for row in ExerciseSerializer(instances, many=True).data]
+            self._snapshot = CatalogSnapshot(version, exercises, stamp)
+            return self._snapshot
+
+    def lookup(self, exercise_id, snapshot=None):
+        """
+        Catalog entry of ``exercise_id``, or ``None`` if it does not exist.
+        Pass a ``snapshot`` from ``get()`` when looking up many ids, so the
+        shared version is checked once rather than per id.
+        """
+        exercise = (snapshot or self.get()).by_id.get(exercise_id)
+        if exercise is None:
+            # Referenced by a log, so it was created since the last load
+            exercise = self.reload().by_id.get(exercise_id)
+        return exercise
+
+    def invalidate(self):
+        self._snapshot = None
+        bump_version(VERSION_KEY)
+
+    def _shared_version(self):
+        return get_version(VERSION_KEY)
+
+    def _database_stamp(self):
+        values = Exercise.objects.aggregate(count=Count('pk'), updated=Max('updated_at'))
+        return values['count'], values['updated']
+
+
+exercise_catalog = ExerciseCatalog()
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_catalog(sender, **kwargs):
+    exercise_catalog.invalidate()
+    # Exercise names are rendered in every user's cached workouts
+    invalidate_all()
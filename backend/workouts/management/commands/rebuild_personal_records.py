@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from workouts.records import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the personal records table from all exercise logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild records for this username')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        written = rebuild(user=user)
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {written} personal records'))
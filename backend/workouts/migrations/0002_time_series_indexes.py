@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exerciselog',
+            index=models.Index(fields=['workout', 'exercise'], name='exerciselog_workout_ex_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutlog',
+            index=models.Index(fields=['user', '-date'], name='workoutlog_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0002_time_series_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('heaviest_weight', models.FloatField(blank=True, help_text='Weight in kg', null=True)),
+                ('best_epley_1rm', models.FloatField(blank=True, help_text='Estimated 1RM in kg (Epley)', null=True)),
+                ('best_brzycki_1rm', models.FloatField(blank=True, help_text='Estimated 1RM in kg (Brzycki)', null=True)),
+                ('best_set_volume', models.FloatField(blank=True, help_text='Reps x weight of a single set', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('best_brzycki_1rm_workout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='workouts.workoutlog')),
+                ('best_epley_1rm_workout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='workouts.workoutlog')),
+                ('best_set_volume_workout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='workouts.workoutlog')),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to='workouts.exercise')),
+                ('heaviest_weight_workout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='workouts.workoutlog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='personalrecord',
+            constraint=models.UniqueConstraint(fields=('user', 'exercise'), name='unique_personal_record'),
+        ),
+    ]
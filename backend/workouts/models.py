@@ -38,6 +38,10 @@ class WorkoutLog(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', '-date'], name='workoutlog_user_date_idx'),
+            models.Index(fields=['user', 'updated_at'], name='workoutlog_user_upd_idx'),
+        ]
 
 
 class ExerciseLog(models.Model):
@@ -51,4 +55,40 @@ class ExerciseLog(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"{self.exercise.name} - {self.sets}x{self.reps} @ {self.weight}kg"
\ No newline at end of file
+        return f"{self.exercise.name} - {self.sets}x{self.reps} @ {self.weight}kg"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['workout', 'exercise'], name='exerciselog_workout_ex_idx'),
+            models.Index(fields=['workout', 'updated_at'], name='exerciselog_workout_upd_idx'),
+        ]
+
+class PersonalRecord(models.Model):
+    """Best lifts of a user for one exercise, kept current on every exercise log write"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='personal_records')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='personal_records')
+    heaviest_weight = models.FloatField(null=True, blank=True, help_text="Weight in kg")
+    heaviest_weight_workout = models.ForeignKey(
+        WorkoutLog, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    best_epley_1rm = models.FloatField(null=True, blank=True, help_text="Estimated 1RM in kg (Epley)")
+    best_epley_1rm_workout = models.ForeignKey(
+        WorkoutLog, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    best_brzycki_1rm = models.FloatField(null=True, blank=True, help_text="Estimated 1RM in kg (Brzycki)")
+    best_brzycki_1rm_workout = models.ForeignKey(
+        WorkoutLog, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    best_set_volume = models.FloatField(null=True, blank=True, help_text="Reps x weight of a single set")
+    best_set_volume_workout = models.ForeignKey(
+        WorkoutLog, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.exercise.name} records"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'exercise'], name='unique_personal_record'),
+        ]
@@ -0,0 +1,151 @@
+"""
+Personal records per user and exercise.
+
+Newly inserted exercise logs can only raise a record, so they are compared
+against the stored row directly. Updates and deletes may lower a record, so
+they rescan the user's logs of the affected exercises instead.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ExerciseLog, PersonalRecord
+
+
+def epley_1rm(weight, reps):
+    if reps == 1:
+        return weight
+    return weight * (1 + reps / 30)
+
+
+def brzycki_1rm(weight, reps):
+    # The formula is undefined from 37 reps on
+    if reps >= 37:
+        return None
+    return weight * 36 / (37 - reps)
+
+
+RECORD_FORMULAS = {
+    'heaviest_weight': lambda weight, reps: weight,
+    'best_epley_1rm': epley_1rm,
+    'best_brzycki_1rm': brzycki_1rm,
+    'best_set_volume': lambda weight, reps: weight * reps,
+}
+
+RECORD_FIELDS = [
+    field
+    for name in RECORD_FORMULAS
+    for field in (name, f'{name}_workout_id')
+]
+
+
+def _apply(record, logs):
+    """Raise ``record`` with ``(workout_id, weight, reps)`` logs; returns whether it changed"""
+    changed = False
+    for workout_id, weight, reps in logs:
+        if reps < 1:
+            continue
+        for field, formula in RECORD_FORMULAS.items():
+            value = formula(weight, reps)
+            if value is None:
+                continue
+            current = getattr(record, field)
+            # Ties keep the earlier workout as the record holder
+            if current is None or value > current:
+                setattr(record, field, value)
+                setattr(record, f'{field}_workout_id', workout_id)
+                changed = True
+    return changed
+
+
+def record_new_logs(user_id, exercise_logs):
+    """Raise the records beaten by newly inserted exercise logs"""
+    logs_by_exercise = defaultdict(list)
+    for exercise_log in exercise_logs:
+        logs_by_exercise[exercise_log.exercise_id].append(
+            (exercise_log.workout_id, exercise_log.weight, exercise_log.reps)
+        )
+    if not logs_by_exercise:
+        return
+
+    try:
+        with transaction.atomic():
+            records = {
+                record.exercise_id: record
+                for record in PersonalRecord.objects.select_for_update().filter(
+                    user_id=user_id, exercise_id__in=logs_by_exercise
+                )
+            }
+
+            to_create = []
+            to_update = []
+            for exercise_id, logs in logs_by_exercise.items():
+                record = records.get(exercise_id)
+                if record is None:
+                    record = PersonalRecord(user_id=user_id, exercise_id=exercise_id)
+                    if _apply(record, logs):
+                        to_create.append(record)
+                elif _apply(record, logs):
+                    to_update.append(record)
+
+            if to_update:
+                # bulk_update skips auto_now, so stamp updated_at explicitly
+                now = timezone.now()
+                for record in to_update:
+                    record.updated_at = now
+                PersonalRecord.objects.bulk_update(to_update, RECORD_FIELDS + ['updated_at'])
+            if to_create:
+                PersonalRecord.objects.bulk_create(to_create)
+    except IntegrityError:
+        # A concurrent write created the same record first; rescan instead
+        recompute(user_id, logs_by_exercise.keys())
+
+
+def recompute(user_id, exercise_ids):
+    """Rebuild the records of ``exercise_ids`` from all of the user's exercise logs"""
+    with transaction.atomic():
+        for exercise_id in set(exercise_ids):
+            logs = ExerciseLog.objects.filter(
+                workout__user_id=user_id, exercise_id=exercise_id
+            ).order_by('workout__date', 'id').values_list('workout_id', 'weight', 'reps')
+
+            record = PersonalRecord(user_id=user_id, exercise_id=exercise_id)
+            if not _apply(record, logs):
+                PersonalRecord.objects.filter(user_id=user_id, exercise_id=exercise_id).delete()
+                continue
+
+            PersonalRecord.objects.update_or_create(
+                user_id=user_id,
+                exercise_id=exercise_id,
+                defaults={field: getattr(record, field) for field in RECORD_FIELDS},
+            )
+
+
+def rebuild(user=None):
+    """Recompute all personal records, optionally for a single user; returns the rows written"""
+    with transaction.atomic():
+        records = PersonalRecord.objects.all()
+        logs = ExerciseLog.objects.all()
+        if user is not None:
+            records = records.filter(user=user)
+            logs = logs.filter(workout__user=user)
+        records.delete()
+
+        rows = logs.order_by('workout__user_id', 'exercise_id', 'workout__date', 'id').values_list(
+            'workout__user_id', 'exercise_id', 'workout_id', 'weight', 'reps'
+        ).iterator(chunk_size=2000)
+
+        to_create = []
+        record = None
+        for user_id, exercise_id, workout_id, weight, reps in rows:
+            if record is None or (record.user_id, record.exercise_id) != (user_id, exercise_id):
+                record = PersonalRecord(user_id=user_id, exercise_id=exercise_id)
+                to_create.append(record)
+            _apply(record, [(workout_id, weight, reps)])
+
+        # Exercises whose every log had zero reps hold no record
+        to_create = [record for record in to_create if record.heaviest_weight is not None]
+        PersonalRecord.objects.bulk_create(to_create, batch_size=1000)
+
+    return len(to_create)
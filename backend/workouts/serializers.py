@@ -1,5 +1,9 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Exercise, WorkoutLog, ExerciseLog
+from .catalog import exercise_catalog
+from .models import Exercise, WorkoutLog, ExerciseLog, PersonalRecord
+from .records import record_new_logs, recompute
 
 
 class ExerciseSerializer(serializers.ModelSerializer):
@@ -11,19 +15,52 @@ class ExerciseSerializer(serializers.ModelSerializer):
 
 
 class ExerciseLogSerializer(serializers.ModelSerializer):
-    exercise_name = serializers.ReadOnlyField(source='exercise.name')
+    exercise_name = serializers.SerializerMethodField()
     
     class Meta:
         model = ExerciseLog
         fields = ['id', 'workout', 'exercise', 'exercise_name', 'sets', 'reps', 'weight', 
                  'notes', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_exercise_name(self, obj):
+        # Looked up in the in-process catalog instead of joining exercises. The
+        # context is the root serializer's, so all rows share one snapshot
+        snapshot = self.context.get('exercise_catalog')
+        if snapshot is None:
+            snapshot = self.context['exercise_catalog'] = exercise_catalog.get()
+        exercise = exercise_catalog.lookup(obj.exercise_id, snapshot)
+        return exercise['name'] if exercise else None
+
+
+class WorkoutLogSummarySerializer(serializers.ModelSerializer):
+    """Workout without its nested exercise logs, for clients that fetch logs separately"""
+    
+    class Meta:
+        model = WorkoutLog
+        fields = ['id', 'user', 'date', 'notes', 'duration_minutes', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class NestedExerciseLogSerializer(serializers.ModelSerializer):
+    """Exercise log written through its parent workout.
+
+    The workout is implied by the parent, and an optional ``id`` identifies an
+    existing log to update instead of inserting a new one.
+    """
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = ExerciseLog
+        fields = ['id', 'exercise', 'sets', 'reps', 'weight', 'notes']
 
 
 class WorkoutLogSerializer(serializers.ModelSerializer):
+    NESTED_LOG_FIELDS = ['exercise', 'sets', 'reps', 'weight', 'notes']
+    
     exercise_logs = ExerciseLogSerializer(many=True, read_only=True)
     exercise_logs_data = serializers.ListField(
-        child=ExerciseLogSerializer(),
+        child=NestedExerciseLogSerializer(),
         write_only=True,
         required=False
     )
@@ -34,15 +71,20 @@ class WorkoutLogSerializer(serializers.ModelSerializer):
                  'exercise_logs', 'exercise_logs_data', 'created_at', 'updated_at']
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
     
+    @transaction.atomic
     def create(self, validated_data):
         exercise_logs_data = validated_data.pop('exercise_logs_data', [])
         workout_log = WorkoutLog.objects.create(**validated_data)
         
-        for exercise_log_data in exercise_logs_data:
-            ExerciseLog.objects.create(workout=workout_log, **exercise_log_data)
+        exercise_logs = ExerciseLog.objects.bulk_create([
+            ExerciseLog(workout=workout_log, **self._log_fields(exercise_log_data))
+            for exercise_log_data in exercise_logs_data
+        ])
+        record_new_logs(workout_log.user_id, exercise_logs)
         
         return workout_log
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         exercise_logs_data = validated_data.pop('exercise_logs_data', None)
         
@@ -51,13 +93,97 @@ class WorkoutLogSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
         
-        # If exercise logs were provided, update them
+        # If exercise logs were provided, apply only the differences
         if exercise_logs_data is not None:
-            # Delete existing logs
-            instance.exercise_logs.all().delete()
+            self._sync_exercise_logs(instance, exercise_logs_data)
+        
+        return instance
+    
+    def _sync_exercise_logs(self, workout_log, exercise_logs_data):
+        """
+        Reconcile the workout's exercise logs with the submitted list.
+
+        Entries with an ``id`` update the matching log when a field changed,
+        entries without one are inserted, and logs missing from the list are
+        deleted. Each kind of change is a single batched statement.
+        """
+        existing = {log.id: log for log in workout_log.exercise_logs.all()}
+        to_create = []
+        to_update = []
+        seen_ids = set()
+        # Exercises whose personal records may have dropped and need a rescan
+        rescan_exercise_ids = set()
+        
+        for exercise_log_data in exercise_logs_data:
+            log_id = exercise_log_data.get('id')
+            fields = self._log_fields(exercise_log_data)
+            
+            if log_id is None:
+                to_create.append(ExerciseLog(workout=workout_log, **fields))
+                continue
             
-            # Create new logs
-            for exercise_log_data in exercise_logs_data:
-                ExerciseLog.objects.create(workout=instance, **exercise_log_data)
+            exercise_log = existing.get(log_id)
+            if exercise_log is None or log_id in seen_ids:
+                raise serializers.ValidationError({
+                    'exercise_logs_data': f"Exercise log {log_id} does not belong to this workout"
+                })
+            seen_ids.add(log_id)
+            
+            previous_exercise_id = exercise_log.exercise_id
+            changed = False
+            for attr, value in fields.items():
+                # Compare foreign keys by id to avoid loading the related row
+                current = exercise_log.exercise_id if attr == 'exercise' else getattr(exercise_log, attr)
+                if current != (value.pk if attr == 'exercise' else value):
+                    setattr(exercise_log, attr, value)
+                    changed = True
+            if changed:
+                to_update.append(exercise_log)
+                rescan_exercise_ids.update({previous_exercise_id, exercise_log.exercise_id})
+        
+        removed_ids = existing.keys() - seen_ids
+        if removed_ids:
+            ExerciseLog.objects.filter(id__in=removed_ids).delete()
+            rescan_exercise_ids.update(existing[log_id].exercise_id for log_id in removed_ids)
+        
+        if to_update:
+            # bulk_update skips auto_now, so stamp updated_at explicitly
+            now = timezone.now()
+            for exercise_log in to_update:
+                exercise_log.updated_at = now
+            ExerciseLog.objects.bulk_update(to_update, self.NESTED_LOG_FIELDS + ['updated_at'])
+        
+        if to_create:
+            ExerciseLog.objects.bulk_create(to_create)
         
-        return instance
\ No newline at end of file
+        if rescan_exercise_ids:
+            recompute(workout_log.user_id, rescan_exercise_ids)
+        record_new_logs(
+            workout_log.user_id,
+            [log for log in to_create if log.exercise_id not in rescan_exercise_ids]
+        )
+    
+    def _log_fields(self, exercise_log_data):
+        return {
+            attr: exercise_log_data[attr]
+            for attr in self.NESTED_LOG_FIELDS
+            if attr in exercise_log_data
+        }
+
+
+class PersonalRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PersonalRecord
+        fields = ['exercise', 'heaviest_weight', 'heaviest_weight_workout',
+                 'best_epley_1rm', 'best_epley_1rm_workout', 'best_brzycki_1rm', 'best_brzycki_1rm_workout',
+                 'best_set_volume', 'best_set_volume_workout', 'updated_at']
+        read_only_fields = fields
+
+
+class VolumeQuerySerializer(serializers.Serializer):
+    """Query parameters of the ``volume`` action"""
+    PERIOD_CHOICES = [('week', 'Week'), ('month', 'Month')]
+    
+    period = serializers.ChoiceField(choices=PERIOD_CHOICES, default='week')
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
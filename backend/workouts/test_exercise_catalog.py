@@ -0,0 +1,109 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timezone
+from workouts.catalog import exercise_catalog
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+class ExerciseCatalogTest(TestCase):
+    """Test the in-process exercise catalog cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        self.squat = Exercise.objects.create(name='Squat', muscles_targeted='Legs', equipment_type='BB')
+        self.list_url = reverse('exercise-list')
+
+    def test_warm_catalog_costs_no_queries(self):
+        """Test that list and detail reads are served without database queries"""
+        self.client.get(self.list_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+            detail = self.client.get(reverse('exercise-detail', args=[self.squat.id]))
+        self.assertEqual([row['name'] for row in response.data['results']], ['Bench Press', 'Squat'])
+        self.assertEqual(detail.data['muscles_targeted'], 'Legs')
+
+    def test_strong_etag(self):
+        """Test that catalog responses carry a strong ETag honoured with 304"""
+        etag = self.client.get(self.list_url)['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        detail_url = reverse('exercise-detail', args=[self.bench.id])
+        self.assertNotEqual(self.client.get(detail_url)['ETag'], etag)
+
+    def test_staff_writes_bump_the_version(self):
+        """Test that an admin edit is visible on the next read"""
+        etag = self.client.get(self.list_url)['ETag']
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.patch(
+            reverse('exercise-detail', args=[self.bench.id]), {'name': 'Flat Bench'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['name'], 'Flat Bench')
+
+    def test_revalidation_catches_writes_without_signals(self):
+        """Test that the periodic database check picks up writes that bypassed the version"""
+        self.client.get(self.list_url)
+        Exercise.objects.filter(pk=self.squat.pk).update(name='Back Squat', updated_at=datetime.now(timezone.utc))
+
+        response = self.client.get(reverse('exercise-detail', args=[self.squat.id]))
+        self.assertEqual(response.data['name'], 'Squat')
+
+        with self.settings(EXERCISE_CATALOG_REVALIDATE_SECONDS=0):
+            response = self.client.get(reverse('exercise-detail', args=[self.squat.id]))
+        self.assertEqual(response.data['name'], 'Back Squat')
+
+    def test_missing_exercise(self):
+        """Test that unknown ids are not found"""
+        response = self.client.get(reverse('exercise-detail', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_exercise_log_names_come_from_catalog(self):
+        """Test that exercise log rows get their names without joining exercises"""
+        workout = WorkoutLog.objects.create(user=self.user, date=datetime.now(timezone.utc))
+        ExerciseLog.objects.create(workout=workout, exercise=self.squat, sets=3, reps=5, weight=100.0)
+        exercise_catalog.get()
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('exerciselog-list'))
+        self.assertEqual(response.data['results'][0]['exercise_name'], 'Squat')
+
+    def test_version_checked_once_per_response(self):
+        """Test that serializing many logs reads the shared version once, not per row"""
+        for _ in range(3):
+            workout = WorkoutLog.objects.create(user=self.user, date=datetime.now(timezone.utc))
+            for exercise in (self.bench, self.squat):
+                ExerciseLog.objects.create(workout=workout, exercise=exercise, sets=3, reps=5, weight=100.0)
+
+        with mock.patch.object(exercise_catalog, '_shared_version', wraps=exercise_catalog._shared_version) as version:
+            response = self.client.get(reverse('workoutlog-list'))
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(version.call_count, 1)
@@ -0,0 +1,125 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timezone
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+class WorkoutNestedWriteTest(TestCase):
+    """Test creating and updating workouts together with their exercise logs"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        self.bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        self.squat = Exercise.objects.create(name='Squat', muscles_targeted='Legs', equipment_type='BB')
+        self.row = Exercise.objects.create(name='Row', muscles_targeted='Back', equipment_type='DB')
+
+        self.workout = WorkoutLog.objects.create(user=self.user1, date=datetime.now(timezone.utc))
+        self.bench_log = ExerciseLog.objects.create(
+            workout=self.workout, exercise=self.bench, sets=3, reps=10, weight=60.0
+        )
+        self.squat_log = ExerciseLog.objects.create(
+            workout=self.workout, exercise=self.squat, sets=5, reps=5, weight=100.0
+        )
+
+        self.list_url = reverse('workoutlog-list')
+        self.detail_url = reverse('workoutlog-detail', args=[self.workout.id])
+
+    def test_create_workout_with_exercise_logs(self):
+        """Test that nested exercise logs are inserted with the workout"""
+        data = {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'exercise_logs_data': [
+                {'exercise': self.bench.id, 'sets': 3, 'reps': 8, 'weight': 70.0},
+                {'exercise': self.row.id, 'sets': 4, 'reps': 12, 'weight': 30.0, 'notes': 'Slow'},
+            ]
+        }
+
+        response = self.client.post(self.list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        workout = WorkoutLog.objects.get(id=response.data['id'])
+        self.assertEqual(workout.user, self.user1)
+        self.assertEqual(workout.exercise_logs.count(), 2)
+        self.assertEqual(len(response.data['exercise_logs']), 2)
+
+    def test_update_only_changes_modified_logs(self):
+        """Test that unchanged logs keep their primary key and timestamps"""
+        squat_updated_at = self.squat_log.updated_at
+        data = {
+            'exercise_logs_data': [
+                {'id': self.bench_log.id, 'exercise': self.bench.id, 'sets': 3, 'reps': 10, 'weight': 65.0},
+                {'id': self.squat_log.id, 'exercise': self.squat.id, 'sets': 5, 'reps': 5, 'weight': 100.0},
+                {'exercise': self.row.id, 'sets': 3, 'reps': 12, 'weight': 25.0},
+            ]
+        }
+
+        response = self.client.patch(self.detail_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['exercise_logs']), 3)
+
+        self.bench_log.refresh_from_db()
+        self.squat_log.refresh_from_db()
+        self.assertEqual(self.bench_log.weight, 65.0)
+        self.assertGreater(self.bench_log.updated_at, self.bench_log.created_at)
+        self.assertEqual(self.squat_log.updated_at, squat_updated_at)
+        self.assertTrue(self.workout.exercise_logs.filter(exercise=self.row).exists())
+
+    def test_update_deletes_omitted_logs(self):
+        """Test that logs missing from the submitted list are deleted"""
+        data = {
+            'exercise_logs_data': [
+                {'id': self.bench_log.id, 'exercise': self.bench.id, 'sets': 3, 'reps': 10, 'weight': 60.0},
+            ]
+        }
+
+        response = self.client.patch(self.detail_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(self.workout.exercise_logs.values_list('id', flat=True)),
+            [self.bench_log.id]
+        )
+
+    def test_update_without_exercise_logs_keeps_them(self):
+        """Test that omitting exercise_logs_data leaves the logs untouched"""
+        response = self.client.patch(self.detail_url, {'notes': 'Felt strong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.workout.exercise_logs.count(), 2)
+
+    def test_update_rejects_foreign_log_id(self):
+        """Test that logs of another workout cannot be modified and nothing is written"""
+        other_workout = WorkoutLog.objects.create(user=self.user2, date=datetime.now(timezone.utc))
+        other_log = ExerciseLog.objects.create(
+            workout=other_workout, exercise=self.bench, sets=1, reps=1, weight=200.0
+        )
+        data = {
+            'notes': 'Should be rolled back',
+            'exercise_logs_data': [
+                {'id': other_log.id, 'exercise': self.bench.id, 'sets': 1, 'reps': 1, 'weight': 1.0},
+            ]
+        }
+
+        response = self.client.patch(self.detail_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other_log.refresh_from_db()
+        self.workout.refresh_from_db()
+        self.assertEqual(other_log.weight, 200.0)
+        self.assertEqual(self.workout.notes, '')
+        self.assertEqual(self.workout.exercise_logs.count(), 2)
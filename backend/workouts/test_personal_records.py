@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from workouts.models import Exercise, WorkoutLog, ExerciseLog, PersonalRecord
+from workouts.records import brzycki_1rm, epley_1rm
+
+
+class PersonalRecordTest(TestCase):
+    """Test that personal records follow exercise log writes"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        self.bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        self.squat = Exercise.objects.create(name='Squat', muscles_targeted='Legs', equipment_type='BB')
+        self.now = datetime.now(timezone.utc)
+
+    def create_workout(self, logs, days_ago=0):
+        response = self.client.post(reverse('workoutlog-list'), {
+            'date': (self.now - timedelta(days=days_ago)).isoformat(),
+            'exercise_logs_data': [
+                {'exercise': exercise.id, 'sets': 3, 'reps': reps, 'weight': weight}
+                for exercise, reps, weight in logs
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def record(self, exercise, user=None):
+        return PersonalRecord.objects.get(user=user or self.user1, exercise=exercise)
+
+    def test_formulas(self):
+        """Test the estimated one-rep-max formulas"""
+        self.assertEqual(epley_1rm(100, 1), 100)
+        self.assertAlmostEqual(epley_1rm(100, 10), 133.33, places=2)
+        self.assertAlmostEqual(brzycki_1rm(100, 10), 133.33, places=2)
+        self.assertIsNone(brzycki_1rm(100, 37))
+
+    def test_new_logs_raise_records(self):
+        """Test that each record tracks its own best set and workout"""
+        first = self.create_workout([(self.bench, 10, 80.0)], days_ago=2)
+        second = self.create_workout([(self.bench, 1, 100.0)], days_ago=1)
+
+        record = self.record(self.bench)
+        self.assertEqual(record.heaviest_weight, 100.0)
+        self.assertEqual(record.heaviest_weight_workout_id, second['id'])
+        self.assertEqual(record.best_set_volume, 800.0)
+        self.assertEqual(record.best_set_volume_workout_id, first['id'])
+        self.assertAlmostEqual(record.best_epley_1rm, epley_1rm(80.0, 10))
+
+    def test_deleting_record_workout_lowers_record(self):
+        """Test that deleting the workout holding a record falls back to the next best"""
+        self.create_workout([(self.bench, 5, 80.0)], days_ago=2)
+        best = self.create_workout([(self.bench, 5, 120.0), (self.squat, 5, 140.0)], days_ago=1)
+
+        response = self.client.delete(reverse('workoutlog-detail', args=[best['id']]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.record(self.bench).heaviest_weight, 80.0)
+        self.assertFalse(PersonalRecord.objects.filter(exercise=self.squat).exists())
+
+    def test_nested_update_rescans_changed_exercises(self):
+        """Test that lowering a logged weight through the workout lowers the record"""
+        workout = self.create_workout([(self.bench, 5, 120.0)])
+        log_id = workout['exercise_logs'][0]['id']
+
+        response = self.client.patch(reverse('workoutlog-detail', args=[workout['id']]), {
+            'exercise_logs_data': [
+                {'id': log_id, 'exercise': self.bench.id, 'sets': 3, 'reps': 5, 'weight': 90.0},
+                {'exercise': self.squat.id, 'sets': 3, 'reps': 5, 'weight': 100.0},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.record(self.bench).heaviest_weight, 90.0)
+        self.assertEqual(self.record(self.squat).heaviest_weight, 100.0)
+
+    def test_exercise_log_endpoint_keeps_records_current(self):
+        """Test that writes through the exercise-logs endpoint update records"""
+        workout = self.create_workout([])
+        response = self.client.post(reverse('exerciselog-list'), {
+            'workout': workout['id'], 'exercise': self.bench.id, 'sets': 1, 'reps': 3, 'weight': 110.0
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.record(self.bench).heaviest_weight, 110.0)
+
+        log_url = reverse('exerciselog-detail', args=[response.data['id']])
+        self.client.patch(log_url, {'weight': 105.0}, format='json')
+        self.assertEqual(self.record(self.bench).heaviest_weight, 105.0)
+
+        self.client.delete(log_url)
+        self.assertFalse(PersonalRecord.objects.filter(exercise=self.bench).exists())
+
+    def test_records_action(self):
+        """Test that the records action only reports the current user's records"""
+        self.create_workout([(self.bench, 5, 100.0)])
+        WorkoutLog.objects.create(user=self.user2, date=self.now)
+        url = reverse('exercise-records', args=[self.bench.id])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['heaviest_weight'], 100.0)
+
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['heaviest_weight'])
+
+    def test_rebuild_command(self):
+        """Test that a rebuild reproduces records for logs written outside the API"""
+        workout = WorkoutLog.objects.create(user=self.user2, date=self.now)
+        ExerciseLog.objects.create(workout=workout, exercise=self.squat, sets=1, reps=2, weight=150.0)
+
+        out = StringIO()
+        call_command('rebuild_personal_records', stdout=out)
+        self.assertIn('Successfully rebuilt 1 personal records', out.getvalue())
+        self.assertEqual(self.record(self.squat, user=self.user2).heaviest_weight_workout_id, workout.id)
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timedelta, timezone
+from workouts.catalog import exercise_catalog
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+# Maximum number of SQL queries each endpoint may issue for a full page,
+# independent of how many workouts or exercise logs the user has.
+# Exercise names come from the in-process catalog, which is warmed up first.
+QUERY_BUDGETS = {
+    'workoutlog-list': 4,      # validators, count, workouts, exercise logs
+    'workoutlog-detail': 3,    # validators, workout, exercise logs
+    'exerciselog-list': 3,     # validators, count, exercise logs
+    'exerciselog-detail': 2,   # validators, exercise log
+}
+
+
+class WorkoutQueryBudgetTest(TestCase):
+    """Test that workout endpoints stay within their query budgets"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.exercises = [
+            Exercise.objects.create(name=f'Exercise {i}', muscles_targeted='Chest', equipment_type='BB')
+            for i in range(4)
+        ]
+
+        # Create a full page of workouts, each with one log per exercise
+        now = datetime.now(timezone.utc)
+        for day in range(25):
+            workout = WorkoutLog.objects.create(user=self.user, date=now - timedelta(days=day))
+            for exercise in self.exercises:
+                ExerciseLog.objects.create(workout=workout, exercise=exercise, sets=3, reps=10, weight=50.0)
+
+        self.workout = WorkoutLog.objects.filter(user=self.user).first()
+        self.exercise_log = self.workout.exercise_logs.first()
+        exercise_catalog.get()
+
+    def assertWithinBudget(self, url_name, url):
+        with self.assertNumQueries(QUERY_BUDGETS[url_name]):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_workout_list_budget(self):
+        """Test that listing workouts does not issue a query per workout or log"""
+        response = self.assertWithinBudget('workoutlog-list', reverse('workoutlog-list'))
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertEqual(response.data['results'][0]['exercise_logs'][0]['exercise_name'], 'Exercise 0')
+
+    def test_workout_detail_budget(self):
+        """Test that retrieving a workout loads its exercise logs in one query"""
+        response = self.assertWithinBudget(
+            'workoutlog-detail', reverse('workoutlog-detail', args=[self.workout.id])
+        )
+        self.assertEqual(len(response.data['exercise_logs']), 4)
+
+    def test_exercise_log_list_budget(self):
+        """Test that listing exercise logs joins the exercise instead of querying it per row"""
+        response = self.assertWithinBudget('exerciselog-list', reverse('exerciselog-list'))
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_exercise_log_detail_budget(self):
+        """Test that retrieving an exercise log joins its exercise"""
+        response = self.assertWithinBudget(
+            'exerciselog-detail', reverse('exerciselog-detail', args=[self.exercise_log.id])
+        )
+        self.assertEqual(response.data['exercise_name'], self.exercise_log.exercise.name)
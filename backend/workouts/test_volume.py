@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import datetime, timezone
+from workouts.models import Exercise, WorkoutLog, ExerciseLog
+
+
+class TrainingVolumeTest(TestCase):
+    """Test the training volume analytics endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='password123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+        bench = Exercise.objects.create(name='Bench Press', muscles_targeted='Chest', equipment_type='BB')
+        fly = Exercise.objects.create(name='Fly', muscles_targeted='Chest', equipment_type='DB')
+        squat = Exercise.objects.create(name='Squat', muscles_targeted='Legs', equipment_type='BB')
+
+        # Two sessions in the week of 2024-01-01 and one in the week of 2024-01-08
+        monday = WorkoutLog.objects.create(user=self.user1, date=datetime(2024, 1, 1, 9, tzinfo=timezone.utc))
+        thursday = WorkoutLog.objects.create(user=self.user1, date=datetime(2024, 1, 4, 9, tzinfo=timezone.utc))
+        next_week = WorkoutLog.objects.create(user=self.user1, date=datetime(2024, 1, 9, 9, tzinfo=timezone.utc))
+        ExerciseLog.objects.create(workout=monday, exercise=bench, sets=3, reps=10, weight=50.0)
+        ExerciseLog.objects.create(workout=monday, exercise=fly, sets=3, reps=12, weight=10.0)
+        ExerciseLog.objects.create(workout=thursday, exercise=bench, sets=5, reps=5, weight=60.0)
+        ExerciseLog.objects.create(workout=next_week, exercise=squat, sets=5, reps=5, weight=100.0)
+
+        other = WorkoutLog.objects.create(user=self.user2, date=datetime(2024, 1, 2, tzinfo=timezone.utc))
+        ExerciseLog.objects.create(workout=other, exercise=bench, sets=10, reps=10, weight=100.0)
+
+        self.url = reverse('workoutlog-volume')
+
+    def test_weekly_volume(self):
+        """Test that volume and sessions are grouped per week, muscles and equipment"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = {
+            (row['period_start'].date().isoformat(), row['muscles_targeted'], row['equipment_type']): row
+            for row in response.data['results']
+        }
+        self.assertEqual(len(rows), 3)
+
+        chest_barbell = rows[('2024-01-01', 'Chest', 'BB')]
+        self.assertEqual(chest_barbell['volume'], 3 * 10 * 50.0 + 5 * 5 * 60.0)
+        self.assertEqual(chest_barbell['total_sets'], 8)
+        self.assertEqual(chest_barbell['sessions'], 2)
+        self.assertEqual(rows[('2024-01-01', 'Chest', 'DB')]['volume'], 360.0)
+        self.assertEqual(rows[('2024-01-08', 'Legs', 'BB')]['sessions'], 1)
+
+    def test_monthly_volume_with_range(self):
+        """Test monthly grouping restricted to a date range"""
+        response = self.client.get(self.url, {
+            'period': 'month',
+            'end': datetime(2024, 1, 5, tzinfo=timezone.utc).isoformat(),
+        })
+        self.assertEqual(response.data['period'], 'month')
+        self.assertEqual(sum(row['volume'] for row in response.data['results']), 1500.0 + 360.0 + 1500.0)
+        self.assertEqual({row['period_start'].day for row in response.data['results']}, {1})
+
+    def test_invalid_period(self):
+        """Test that unknown periods are rejected"""
+        response = self.client.get(self.url, {'period': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
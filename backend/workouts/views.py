@@ -1,6 +1,25 @@
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import viewsets, permissions, serializers
-from .models import Exercise, WorkoutLog, ExerciseLog
-from .serializers import ExerciseSerializer, WorkoutLogSerializer, ExerciseLogSerializer
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from core.async_views import AsyncReadMixin
+from core.cache import ResponseCacheMixin, invalidate_user_cache
+from core.conditional import ConditionalGetMixin
+from core.export import ExportMixin
+from core.pagination import TimeSeriesPagination
+from core.profiling import ServerTimingMixin
+from .catalog import exercise_catalog
+from .models import Exercise, WorkoutLog, ExerciseLog, PersonalRecord
+from .records import record_new_logs, recompute
+from .serializers import (
+    ExerciseSerializer, WorkoutLogSerializer, ExerciseLogSerializer, PersonalRecordSerializer, VolumeQuerySerializer
+)
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -12,11 +31,12 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         
-        # Write permissions are only allowed to the owner
-        return obj.user == request.user
+        # Write permissions are only allowed to the owner; comparing ids
+        # doesn't load the owner's row
+        return obj.user_id == request.user.id
 
 
-class ExerciseViewSet(viewsets.ModelViewSet):
+class ExerciseViewSet(ServerTimingMixin, viewsets.ModelViewSet):
     queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -26,25 +46,107 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
+    
+    # Reads are served from the in-process catalog without touching the database
+    def list(self, request, *args, **kwargs):
+        catalog = exercise_catalog.get()
+        return self.catalog_response(request, catalog, catalog.exercises, paginate=True)
+    
+    def retrieve(self, request, *args, **kwargs):
+        catalog = exercise_catalog.get()
+        try:
+            exercise = catalog.by_id[int(kwargs['pk'])]
+        except (KeyError, ValueError):
+            raise NotFound()
+        return self.catalog_response(request, catalog, exercise)
+    
+    def catalog_response(self, request, catalog, data, paginate=False):
+        # The same catalog version always renders to the same bytes for a
+        # given URL and media type, so the ETag can be strong
+        key = '|'.join([catalog.digest, request.get_full_path(), request.accepted_media_type or ''])
+        etag = '"%s"' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+        
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            page = self.paginate_queryset(data) if paginate else None
+            response = self.get_paginated_response(page) if page is not None else Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def records(self, request, pk=None):
+        """Get the current user's personal records for this exercise"""
+        exercise = self.get_object()
+        record = PersonalRecord.objects.filter(user=request.user, exercise=exercise).first()
+        if record is None:
+            # No logs yet: report the exercise with empty records
+            record = PersonalRecord(user=request.user, exercise=exercise)
+        return Response(PersonalRecordSerializer(record).data)
 
 
-class WorkoutLogViewSet(viewsets.ModelViewSet):
+class WorkoutLogViewSet(ServerTimingMixin, ResponseCacheMixin, ConditionalGetMixin, ExportMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = WorkoutLog.objects.all()
     serializer_class = WorkoutLogSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+    pagination_class = TimeSeriesPagination
+    conditional_related = ['exercise_logs', 'exercise_logs__exercise']
+    export_fields = ['id', 'date', 'notes', 'duration_minutes', 'created_at', 'updated_at']
     
     def get_queryset(self):
-        # Users can only see their own workout logs
-        return WorkoutLog.objects.filter(user=self.request.user)
+        # Users can only see their own workout logs. Exercise logs are
+        # prefetched so a page costs a fixed number of queries; exercise
+        # names come from the in-process catalog.
+        return WorkoutLog.objects.filter(user=self.request.user).prefetch_related('exercise_logs')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        self.invalidate_user_cache()
+    
+    @action(detail=False, methods=['get'])
+    def volume(self, request):
+        """
+        Training volume (sets x reps x weight), set and session counts per
+        week or month, grouped by targeted muscles and equipment type.
+        """
+        params = VolumeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        trunc = TruncWeek if params.validated_data['period'] == 'week' else TruncMonth
+        
+        exercise_logs = ExerciseLog.objects.filter(workout__user=request.user)
+        if params.validated_data.get('start'):
+            exercise_logs = exercise_logs.filter(workout__date__gte=params.validated_data['start'])
+        if params.validated_data.get('end'):
+            exercise_logs = exercise_logs.filter(workout__date__lte=params.validated_data['end'])
+        
+        rows = exercise_logs.annotate(
+            period_start=trunc('workout__date'),
+            muscles_targeted=F('exercise__muscles_targeted'),
+            equipment_type=F('exercise__equipment_type'),
+        ).values('period_start', 'muscles_targeted', 'equipment_type').annotate(
+            volume=Sum(F('sets') * F('reps') * F('weight'), output_field=FloatField()),
+            total_sets=Sum('sets'),
+            sessions=Count('workout', distinct=True),
+        ).order_by('period_start', 'muscles_targeted', 'equipment_type')
+        
+        return Response({'period': params.validated_data['period'], 'results': list(rows)})
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        exercise_ids = set(instance.exercise_logs.values_list('exercise_id', flat=True))
+        instance.delete()
+        recompute(instance.user_id, exercise_ids)
+        self.invalidate_user_cache()
 
 
-class ExerciseLogViewSet(viewsets.ModelViewSet):
+class ExerciseLogViewSet(ServerTimingMixin, ConditionalGetMixin, ExportMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = ExerciseLog.objects.all()
     serializer_class = ExerciseLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = ['exercise']
+    export_fields = ['id', 'workout', 'workout__date', 'exercise', 'exercise__name', 'sets', 'reps', 'weight',
+                     'notes', 'created_at', 'updated_at']
+    export_ordering = ['workout__date', 'id']
     
     def get_queryset(self):
         # Users can only see their own exercise logs
@@ -55,6 +157,22 @@ class ExerciseLogViewSet(viewsets.ModelViewSet):
         workout = serializer.validated_data.get('workout')
         if not workout:
             raise serializers.ValidationError("Workout is required")
-        if workout.user != self.request.user:
+        if workout.user_id != self.request.user.id:
             raise permissions.PermissionDenied("You cannot add exercises to another user's workout")
-        serializer.save()
\ No newline at end of file
+        with transaction.atomic():
+            serializer.save()
+            record_new_logs(workout.user_id, [serializer.instance])
+            invalidate_user_cache(workout.user_id)
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_exercise_id = serializer.instance.exercise_id
+        serializer.save()
+        recompute(self.request.user.id, {previous_exercise_id, serializer.instance.exercise_id})
+        invalidate_user_cache(self.request.user.id)
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        recompute(self.request.user.id, {instance.exercise_id})
+        invalidate_user_cache(self.request.user.id)
\ No newline at end of file
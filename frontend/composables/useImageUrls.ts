@@ -0,0 +1,26 @@
+import type { ImageUrls } from '~/types/models'
+
+/**
+ * Composable to pick the smallest rendered derivative of an image that
+ * still covers the displayed size, preferring WebP.
+ * Falls back to the original upload while derivatives are being rendered.
+ */
+export function useImageUrls() {
+  const pickImageUrl = (urls: ImageUrls | undefined, fallback: string, minEdge: number): string => {
+    const derivatives = Object.values(urls || {}).sort(
+      (a, b) => Math.max(a.width, a.height) - Math.max(b.width, b.height)
+    )
+    if (derivatives.length === 0) {
+      return fallback
+    }
+
+    // The largest derivative is used when none covers the requested size
+    const derivative = derivatives.find(d => Math.max(d.width, d.height) >= minEdge)
+      || derivatives[derivatives.length - 1]
+    return derivative.webp || derivative.jpeg
+  }
+
+  return {
+    pickImageUrl
+  }
+}
@@ -1,12 +1,23 @@
 import { defineStore } from 'pinia';
 import { useApi } from '~/composables/useApi';
-import type { WeightEntry, BloodPressureReading, ProgressPhoto, PaginatedResponse } from '~/types/models';
+import type { WeightEntry, BloodPressureReading, ProgressPhoto, PaginatedResponse, SeriesResponse, SeriesParams } from '~/types/models';
+
+// Chart labels and values of a series; bucketed series plot each bucket's average
+const seriesLabels = (series: SeriesResponse | null) =>
+  series ? series.t.map(t => new Date(t).toLocaleDateString()) : [];
+
+const seriesValues = (series: SeriesResponse | null, field: string): (number | null)[] => {
+  if (!series || !series[field]) return [];
+  return series.method === 'buckets' ? series[field].avg : series[field];
+};
 
 export const useHealthStore = defineStore('health', {
   state: () => ({
     weightEntries: [] as WeightEntry[],
     bloodPressureReadings: [] as BloodPressureReading[],
     progressPhotos: [] as ProgressPhoto[],
+    weightSeries: null as SeriesResponse | null,
+    bpSeries: null as SeriesResponse | null,
     loading: false,
     error: null as string | null,
   }),
@@ -39,87 +50,38 @@ export const useHealthStore = defineStore('health', {
       );
     },
     
-    // Get weight data for charts
-    weightChartData: (state) => {
-      // Check if the array is empty or undefined
-      if (!state.weightEntries || state.weightEntries.length === 0) {
-        return {
-          labels: [],
-          datasets: [{
-            label: 'Weight (kg)',
-            data: [],
-            borderColor: '#0ea5e9',
-            backgroundColor: 'rgba(14, 165, 233, 0.2)',
-            tension: 0.3,
-          }]
-        };
-      }
-      
-      const sorted = [...state.weightEntries].sort((a, b) => 
-        new Date(a.timestamp).getTime() - new Date(b.timestamp).getTime()
-      );
-      
-      return {
-        labels: sorted.map(entry => new Date(entry.timestamp).toLocaleDateString()),
-        datasets: [{
-          label: 'Weight (kg)',
-          data: sorted.map(entry => entry.weight_kg),
-          borderColor: '#0ea5e9',
-          backgroundColor: 'rgba(14, 165, 233, 0.2)',
-          tension: 0.3,
-        }]
-      };
-    },
+    // Weight chart, drawn from the downsampled series
+    weightChartData: (state) => ({
+      labels: seriesLabels(state.weightSeries),
+      datasets: [{
+        label: 'Weight (kg)',
+        data: seriesValues(state.weightSeries, 'weight_kg'),
+        borderColor: '#0ea5e9',
+        backgroundColor: 'rgba(14, 165, 233, 0.2)',
+        tension: 0.3,
+      }]
+    }),
     
-    // Get BP data for charts
-    bpChartData: (state) => {
-      // Check if the array is empty or undefined
-      if (!state.bloodPressureReadings || state.bloodPressureReadings.length === 0) {
-        return {
-          labels: [],
-          datasets: [
-            {
-              label: 'Systolic',
-              data: [],
-              borderColor: '#ef4444',
-              backgroundColor: 'rgba(239, 68, 68, 0.2)',
-              tension: 0.3,
-            },
-            {
-              label: 'Diastolic',
-              data: [],
-              borderColor: '#3b82f6',
-              backgroundColor: 'rgba(59, 130, 246, 0.2)',
-              tension: 0.3,
-            }
-          ]
-        };
-      }
-      
-      const sorted = [...state.bloodPressureReadings].sort((a, b) => 
-        new Date(a.timestamp).getTime() - new Date(b.timestamp).getTime()
-      );
-      
-      return {
-        labels: sorted.map(entry => new Date(entry.timestamp).toLocaleDateString()),
-        datasets: [
-          {
-            label: 'Systolic',
-            data: sorted.map(entry => entry.systolic),
-            borderColor: '#ef4444',
-            backgroundColor: 'rgba(239, 68, 68, 0.2)',
-            tension: 0.3,
-          },
-          {
-            label: 'Diastolic',
-            data: sorted.map(entry => entry.diastolic),
-            borderColor: '#3b82f6',
-            backgroundColor: 'rgba(59, 130, 246, 0.2)',
-            tension: 0.3,
-          }
-        ]
-      };
-    },
+    // BP chart, drawn from the downsampled series
+    bpChartData: (state) => ({
+      labels: seriesLabels(state.bpSeries),
+      datasets: [
+        {
+          label: 'Systolic',
+          data: seriesValues(state.bpSeries, 'systolic'),
+          borderColor: '#ef4444',
+          backgroundColor: 'rgba(239, 68, 68, 0.2)',
+          tension: 0.3,
+        },
+        {
+          label: 'Diastolic',
+          data: seriesValues(state.bpSeries, 'diastolic'),
+          borderColor: '#3b82f6',
+          backgroundColor: 'rgba(59, 130, 246, 0.2)',
+          tension: 0.3,
+        }
+      ]
+    }),
   },
   
   actions: {
@@ -242,6 +204,7 @@ export const useHealthStore = defineStore('health', {
         // Remove from state
         if (!this.weightEntries) this.weightEntries = [];
         this.weightEntries = this.weightEntries.filter(e => e.id !== id);
+        if (this.weightSeries) await this.fetchWeightSeries();
         
         return true;
       } catch (error: any) {
@@ -360,6 +323,7 @@ export const useHealthStore = defineStore('health', {
         // Remove from state
         if (!this.bloodPressureReadings) this.bloodPressureReadings = [];
         this.bloodPressureReadings = this.bloodPressureReadings.filter(r => r.id !== id);
+        if (this.bpSeries) await this.fetchBPSeries();
         
         return true;
       } catch (error: any) {
@@ -371,6 +335,31 @@ export const useHealthStore = defineStore('health', {
       }
     },
     
+    // Downsampled chart series
+    async fetchWeightSeries(params: SeriesParams = {}) {
+      try {
+        const api = useApi();
+        this.weightSeries = await api.get<SeriesResponse>('/weight-entries/series/', { params });
+        return this.weightSeries;
+      } catch (error: any) {
+        this.error = error.response?.data?.detail || 'Failed to fetch weight series';
+        console.error('Error fetching weight series:', error);
+        return null;
+      }
+    },
+    
+    async fetchBPSeries(params: SeriesParams = {}) {
+      try {
+        const api = useApi();
+        this.bpSeries = await api.get<SeriesResponse>('/blood-pressure/series/', { params });
+        return this.bpSeries;
+      } catch (error: any) {
+        this.error = error.response?.data?.detail || 'Failed to fetch BP series';
+        console.error('Error fetching BP series:', error);
+        return null;
+      }
+    },
+    
     // Progress photos
     async fetchProgressPhotos() {
       this.loading = true;
@@ -7,9 +7,20 @@ export interface User {
   last_name: string;
 }
 
+export interface ImageDerivative {
+  width: number;
+  height: number;
+  webp: string;
+  jpeg: string;
+}
+
+// Derivative size name (thumb, small, medium, large) -> rendered image
+export type ImageUrls = Record<string, ImageDerivative>;
+
 export interface ProfilePicture {
   id: number;
   image: string;
+  image_urls: ImageUrls;
   is_current: boolean;
   uploaded_at: string;
 }
@@ -25,7 +36,6 @@ export interface UserProfile {
   created_at: string;
   updated_at: string;
   current_profile_picture?: ProfilePicture;
-  profile_pictures: ProfilePicture[];
 }
 
 // Workout related types
@@ -86,6 +96,30 @@ export interface BloodPressureReading {
   updated_at: string;
 }
 
+export interface SeriesStats {
+  min: (number | null)[];
+  avg: (number | null)[];
+  max: (number | null)[];
+}
+
+// Downsampled series from /weight-entries/series/ and /blood-pressure/series/.
+// With method 'buckets' each value column is a SeriesStats triple; with
+// 'lttb' it is a plain array aligned with t.
+export interface SeriesResponse {
+  method: 'buckets' | 'lttb';
+  total: number;
+  t: number[];
+  n?: number[];
+  [column: string]: any;
+}
+
+export interface SeriesParams {
+  start?: string;
+  end?: string;
+  points?: number;
+  method?: 'buckets' | 'lttb';
+}
+
 export type BodyPartTag = 'shoulders' | 'upper_body' | 'back' | 'stomach' | 'legs' | 'full_body';
 
 export interface ProgressPhoto {
@@ -93,6 +127,7 @@ export interface ProgressPhoto {
   user: number;
   image: string;
   image_url: string;
+  image_urls: ImageUrls;
   timestamp: string;
   notes?: string;
   body_part_tags: BodyPartTag[];